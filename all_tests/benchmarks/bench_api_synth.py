@@ -0,0 +1,198 @@
+"""
+Synth time of ProductApi for many versions and routes, built from generated configs in
+place of PRODUCT_API_VERSIONS / PRODUCT_API_RESOURCES.
+
+Runs offline: the lambdas are inline code in the benchmark stack and the secret lookups
+ProductApi makes are answered with placeholders. Each shape is built into a fresh
+cdk.App in the same process, and reports the construct count, the CloudFormation
+resources and templates (the routes are partitioned over nested stacks, see
+cdk_configs/utilities/partitions.py), the lambda integrations built and the build and
+synth time per route. Per route times that stay flat as the shapes grow mean the
+construct tree grows linearly with versions x routes.
+
+    python -m all_tests.benchmarks.bench_api_synth
+    python -m all_tests.benchmarks.bench_api_synth --versions 5 --routes 100
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from all_tests.benchmarks.offline import placeholder_secret, scratch_placement
+
+# the default shapes, (versions, routes) - the last is the one the api should scale to
+SHAPES = [(1, 20), (5, 20), (1, 100), (5, 100)]
+METHODS = ("GET", "POST")
+LAMBDAS = 10
+
+
+def generated_api(versions: int, routes: int, lambda_names: list):
+    """
+    Returns:
+        (PRODUCT_API_VERSIONS, PRODUCT_API_RESOURCES) like dicts of versions v1..vN and
+        routes, each with a GET and a POST on the lambdas in turn.
+    """
+    from cdk_configs.resource_configurations.common_configs import NoCommonConfigs
+    from cdk_configs.resource_configurations.constructs import (
+        RestApiMethodConfigs,
+        RestApiResourceConfigs,
+    )
+
+    api_versions = {
+        f"v{index + 1}": RestApiResourceConfigs(
+            common=NoCommonConfigs, path_part=f"v{index + 1}"
+        )
+        for index in range(versions)
+    }
+    api_resources = {
+        f"Route{index:03d}": {
+            "resource": RestApiResourceConfigs(
+                common=NoCommonConfigs, path_part=f"route{index:03d}"
+            ),
+            "methods": {
+                method: RestApiMethodConfigs(
+                    common=NoCommonConfigs,
+                    http_method=method,
+                    x_lambda_integration=lambda_names[
+                        (index * len(METHODS) + offset) % len(lambda_names)
+                    ],
+                )
+                for offset, method in enumerate(METHODS)
+            },
+        }
+        for index in range(routes)
+    }
+    return api_versions, api_resources
+
+
+def placeholder_properties() -> SimpleNamespace:
+    """
+    Stands in for DeploymentProperties - ProductApi only needs the secrets, the domain
+    and to place the generated routes (in the scratch placement file).
+    """
+    return SimpleNamespace(
+        secret=placeholder_secret,
+        COMPLETE_DOMAIN_NAME="api.example.com",
+        UPDATE_PLACEMENTS=True,
+    )
+
+
+def run_shape(versions: int, routes: int) -> dict:
+    import aws_cdk as cdk
+    from aws_cdk import aws_lambda
+
+    from stacks.product.nested_stacks import api_stack
+
+    with tempfile.TemporaryDirectory() as outdir:
+        app = cdk.App(outdir=outdir)
+        stack = cdk.Stack(app, "ApiBenchmark")
+
+        lambda_mapping = {
+            f"Lambda{index}": aws_lambda.Function(
+                stack,
+                f"Lambda{index}",
+                runtime=aws_lambda.Runtime.PYTHON_3_12,
+                handler="index.handler",
+                code=aws_lambda.InlineCode("def handler(event, context): pass"),
+            )
+            for index in range(LAMBDAS)
+        }
+        api_versions, api_resources = generated_api(
+            versions, routes, list(lambda_mapping)
+        )
+
+        integrations = []
+        original = api_stack.LambdaIntegrations.__missing__
+
+        def counted(self, name):
+            integrations.append(name)
+            return original(self, name)
+
+        with mock.patch.multiple(
+            api_stack,
+            PRODUCT_API_VERSIONS=api_versions,
+            PRODUCT_API_RESOURCES=api_resources,
+            UNSCOPED_API_VERSIONS={next(iter(api_versions))},
+        ), mock.patch.object(
+            api_stack.LambdaIntegrations, "__missing__", counted
+        ), scratch_placement():
+            start = time.perf_counter()
+            api_stack.ProductApi(
+                stack,
+                "ProductAPI",
+                deployment_properties=placeholder_properties(),
+                lambda_mapping=lambda_mapping,
+            )
+            built = time.perf_counter()
+
+        constructs = len(app.node.find_all())
+
+        synth_start = time.perf_counter()
+        app.synth()
+        synthesized = time.perf_counter()
+
+        templates = {}
+        template_bytes = 0
+        for name in os.listdir(outdir):
+            if name.endswith(".template.json"):
+                path = os.path.join(outdir, name)
+                template_bytes += os.path.getsize(path)
+                with open(path) as template:
+                    templates[name] = len(json.load(template).get("Resources", {}))
+
+    route_versions = versions * routes
+    return {
+        "shape": f"{versions}x{routes}",
+        "constructs": constructs,
+        "templates": len(templates),
+        "resources": sum(templates.values()),
+        "largest template": max(templates.values()),
+        "template kb": template_bytes / 1024,
+        "integrations": len(integrations),
+        "build s": built - start,
+        "synth s": synthesized - synth_start,
+        "ms / route": (synthesized - start) * 1000 / route_versions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--versions", type=int, help="run only this shape")
+    parser.add_argument("--routes", type=int, help="run only this shape")
+    args = parser.parse_args()
+
+    shapes = SHAPES
+    if args.versions or args.routes:
+        shapes = [(args.versions or 5, args.routes or 100)]
+
+    # (result key, column width, format)
+    columns = [
+        ("shape", 8, ""),
+        ("constructs", 12, "d"),
+        ("templates", 11, "d"),
+        ("resources", 11, "d"),
+        ("largest template", 18, "d"),
+        ("template kb", 13, ".0f"),
+        ("integrations", 14, "d"),
+        ("build s", 9, ".2f"),
+        ("synth s", 9, ".2f"),
+        ("ms / route", 12, ".2f"),
+    ]
+    # the first app built in a process also pays for loading aws-cdk-lib in node
+    run_shape(1, 1)
+
+    print("".join(f"{name:>{width}}" for name, width, _ in columns))
+
+    for versions, routes in shapes:
+        result = run_shape(versions, routes)
+        print(
+            "".join(f"{result[name]:>{width}{spec}}" for name, width, spec in columns)
+        )
+
+
+if __name__ == "__main__":
+    main()
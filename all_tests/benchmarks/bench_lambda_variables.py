@@ -0,0 +1,106 @@
+"""
+Benchmark for LambdaVariables.as_dict / as_json.
+
+Compares the cached per class serializer against the original implementation (kept
+below as legacy_as_dict / legacy_as_json) for a wide dataclass and for a deeply nested
+payload, and checks both produce the same values.
+
+Run from the repository root:
+    python -m all_tests.benchmarks.bench_lambda_variables [--number 2000]
+"""
+
+import argparse
+import json
+import timeit
+from dataclasses import field, make_dataclass
+
+from common.aws import aws_lambda
+from common.aws.aws_lambda import LambdaVariables
+
+
+def legacy_as_dict(self, include_none: bool = False) -> dict:
+    return {
+        key: value
+        for key, value in self.__dict__.items()
+        if (value is not None or include_none) and (key[0] != "_" and key != "event")
+    }
+
+
+def legacy_as_json(self, include_none: bool = False, best_naming: bool = True) -> str:
+    output = legacy_as_dict(self, include_none=include_none)
+
+    if best_naming:
+        cleaned_output = {}
+        for key, value in output.items():
+            first_letter = key[0].lower()
+            cleaned_key = key.lower().replace("_", " ").capitalize().replace(" ", "")
+            cleaned_key = first_letter + cleaned_key[1:]
+            cleaned_output[cleaned_key] = value
+
+        return json.dumps(cleaned_output)
+
+    return json.dumps(output)
+
+
+def wide_variables(width: int) -> LambdaVariables:
+    cls = make_dataclass(
+        f"Wide{width}",
+        [
+            (f"some_field_name_{index}", int, field(default=index))
+            for index in range(width)
+        ]
+        + [("_private_value", str, field(default="hidden"))],
+        bases=(LambdaVariables,),
+    )
+    return cls(event={})
+
+
+def nested_variables(depth: int, breadth: int) -> LambdaVariables:
+    def payload(level):
+        if level == 0:
+            return {f"leaf_value_{index}": index for index in range(breadth)}
+        return {
+            f"child_node_{index}": payload(level - 1) for index in range(breadth)
+        } | {"node_items": [payload(0)]}
+
+    cls = make_dataclass(
+        "Nested",
+        [("request_body", dict, field(default=None)), ("status_code", int, 200)],
+        bases=(LambdaVariables,),
+    )
+    return cls(event={}, request_body=payload(depth))
+
+
+def run(name: str, variables: LambdaVariables, number: int):
+    assert legacy_as_dict(variables) == variables.as_dict()
+    assert json.loads(legacy_as_json(variables)) == json.loads(variables.as_json())
+
+    cases = {
+        "as_dict legacy": lambda: legacy_as_dict(variables),
+        "as_dict": lambda: variables.as_dict(),
+        "as_json legacy": lambda: legacy_as_json(variables),
+        "as_json": lambda: variables.as_json(),
+        "as_json nested": lambda: variables.as_json(nested=True),
+    }
+
+    print(f"\n{name} ({number} calls, json backend: {backend()})")
+    for case, call in cases.items():
+        seconds = min(timeit.repeat(call, number=number, repeat=3))
+        print(f"    {case:<16} {seconds / number * 1e6:10.2f} us/call")
+
+
+def backend() -> str:
+    return "orjson" if aws_lambda.orjson is not None else "json"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    run("wide, 200 fields", wide_variables(200), args.number)
+    run("nested, depth 4 x 4", nested_variables(4, 4), max(args.number // 10, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+"""
+Synth time, peak memory and template size of the real Product and Pipeline stacks as the
+configs grow to N lambdas, api routes, dynamo tables and s3 buckets (N = 10, 100 and 500
+by default).
+
+Each N is synthesized by app.py's build_app() in its own interpreter, with the config
+dicts (PRODUCT_LAMBDAS, PRODUCT_API_RESOURCES, PRODUCT_DYNAMO_DBS, PRODUCT_S3_BUCKETS)
+extended in place to N entries copied from their first entry. It runs offline: secrets
+come from placeholders and the VPC lookup is left to cdk's dummy vpc, see offline.py.
+The layer zips have to exist (`make` builds them).
+
+The results are compared with the baseline stored in baselines/bench_scale.json - the
+baseline was recorded on one machine, so compare runs on similar ones.
+
+    python -m all_tests.benchmarks.bench_scale
+    python -m all_tests.benchmarks.bench_scale --sizes 10 100 --max-regression 0.25
+    python -m all_tests.benchmarks.bench_scale --save-baseline
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+SIZES = [10, 100, 500]
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "bench_scale.json")
+CDK_JSON_FILE_NAME = "cdk.json"
+
+# compared against the baseline, higher is worse
+COMPARED = ("seconds", "python peak mb", "node peak mb", "template kb")
+
+
+def grow(configs: dict, size: int, renamed: Dict[str, str], name: str):
+    """
+    Adds copies of the first entry of configs until it has size entries.
+
+    Parameters:
+        configs: [dict] - a config dict, changed in place.
+        size: [int] - the number of entries it should have.
+        renamed: [Dict[str, str]] - {field: prefix} of the fields that have to be unique,
+            each copy gets prefix + its number.
+        name: [str] - the prefix of the dict keys of the copies.
+    """
+    first = next(iter(configs.values()))
+    for index in range(len(configs), size):
+        configs[f"{name}{index:03d}"] = dataclasses.replace(
+            first,
+            **{field: f"{prefix}{index:03d}" for field, prefix in renamed.items()},
+        )
+
+
+def grow_configs(size: int):
+    """
+    Extends the config dicts the stacks are built from to size lambdas, routes, tables
+    and buckets. The routes call the lambdas in turn.
+    """
+    from cdk_configs.resource_configurations import (
+        api_configs,
+        lambda_configs,
+        storage_configs,
+    )
+
+    grow(
+        lambda_configs.PRODUCT_LAMBDAS,
+        size,
+        {"function_name": "ScaleLambda"},
+        "ScaleLambda",
+    )
+    grow(
+        storage_configs.PRODUCT_DYNAMO_DBS,
+        size,
+        {"table_name": "ScaleTable"},
+        "ScaleTable",
+    )
+    grow(
+        storage_configs.PRODUCT_S3_BUCKETS,
+        size,
+        {"bucket_name": "scale-bucket-"},
+        "ScaleBucket",
+    )
+
+    lambda_names = list(lambda_configs.PRODUCT_LAMBDAS)
+    routes = api_configs.PRODUCT_API_RESOURCES
+    first = next(iter(routes.values()))
+    for index in range(len(routes), size):
+        routes[f"ScaleRoute{index:03d}"] = {
+            "resource": dataclasses.replace(
+                first["resource"], path_part=f"scale-route-{index:03d}"
+            ),
+            "methods": {
+                method_name: dataclasses.replace(
+                    method,
+                    x_lambda_integration=lambda_names[index % len(lambda_names)],
+                )
+                for method_name, method in first["methods"].items()
+            },
+        }
+
+
+def _children(pid: str) -> List[str]:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as task_children:
+            children.extend(task_children.read().split())
+    return children
+
+
+def node_peak_mb() -> Optional[float]:
+    """
+    Returns:
+        [float] the peak resident memory of the node processes jsii started (its runtime
+        starts node again, so all of the descendants), None where /proc is not there to
+        read it from.
+    """
+    peak = 0
+    try:
+        pending = _children("self")
+        while pending:
+            pid = pending.pop()
+            pending.extend(_children(pid))
+            with open(f"/proc/{pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmHWM:"):
+                        peak += int(line.split()[1])
+    except OSError:
+        return None
+    return peak / 1024 if peak else None
+
+
+def python_peak_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_size(size: int, outdir: str) -> dict:
+    """
+    Builds and synthesizes the app with configs grown to size, in this process. Runs
+    in the child interpreter started by measure().
+    """
+    result = {"size": size, "error": None}
+
+    # loading aws-cdk-lib into node is the same for every size, and not timed
+    import aws_cdk as cdk
+
+    from all_tests.benchmarks.offline import offline_lookups
+    from app import build_app
+
+    grow_configs(size)
+
+    with open(CDK_JSON_FILE_NAME) as cdk_json:
+        context = json.load(cdk_json).get("context", {})
+
+    start = time.perf_counter()
+    try:
+        # the app's printing would end up in the json on stdout
+        with offline_lookups(), redirect_stdout(sys.stderr):
+            # the generated configs are placed in the scratch placement file
+            app = cdk.App(
+                outdir=outdir,
+                context={**context, "deploy_tag": "DEV", "update_placements": "True"},
+            )
+            build_app(app)
+            app.synth()
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["seconds"] = time.perf_counter() - start
+    result["python peak mb"] = python_peak_mb()
+    result["node peak mb"] = node_peak_mb()
+
+    templates = {}
+    for name in os.listdir(outdir):
+        if name.endswith(".template.json"):
+            path = os.path.join(outdir, name)
+            with open(path) as template:
+                templates[name] = (
+                    os.path.getsize(path),
+                    len(json.load(template).get("Resources", {})),
+                )
+
+    result["templates"] = len(templates)
+    result["resources"] = sum(resources for _, resources in templates.values())
+    result["largest template"] = max(
+        (resources for _, resources in templates.values()), default=0
+    )
+    result["template kb"] = sum(size for size, _ in templates.values()) / 1024
+    return result
+
+
+def measure(size: int) -> dict:
+    """
+    Runs run_size() in a fresh interpreter - the config dicts are changed in place, and
+    the peak memory is only the peak of one synth in a new process.
+    """
+    with tempfile.TemporaryDirectory() as outdir:
+        child = subprocess.run(
+            [sys.executable, "-m", __spec__.name, "--child", str(size), outdir],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+    if child.returncode != 0:
+        return {"size": size, "error": child.stderr.strip().splitlines()[-1]}
+    return json.loads(child.stdout)
+
+
+def machine() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline() -> dict:
+    """
+    Returns:
+        [dict] {size: result} of the stored baseline, empty if there is none.
+    """
+    if not os.path.isfile(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as baseline_file:
+        baseline = json.load(baseline_file)
+    return {result["size"]: result for result in baseline["results"]}
+
+
+def save_baseline(results: List[dict]):
+    os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+    with open(BASELINE_FILE, "w") as baseline_file:
+        json.dump(
+            {
+                "machine": machine(),
+                "results": [
+                    {
+                        key: round(value, 2) if isinstance(value, float) else value
+                        for key, value in result.items()
+                    }
+                    for result in results
+                ],
+            },
+            baseline_file,
+            indent=2,
+        )
+        baseline_file.write("\n")
+
+
+def regressions(result: dict, baseline: dict, max_regression: float) -> List[str]:
+    """
+    Returns:
+        [List[str]] the measurements of result more than max_regression (a fraction)
+        above the baseline's.
+    """
+    slower = []
+    for key in COMPARED:
+        now, before = result.get(key), baseline.get(key)
+        if now is not None and before and now > before * (1 + max_regression):
+            slower.append(f"{key} {before:.1f} -> {now:.1f}")
+    if result.get("error") and not baseline.get("error"):
+        slower.append("failed, the baseline did not")
+    return slower
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=None,
+        help="exit 1 if a measurement is this fraction above the baseline (0.25 = 25%%)",
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        size, outdir = args.child
+        print(json.dumps(run_size(int(size), outdir)))
+        return 0
+
+    # (result key, column width, format)
+    columns = [
+        ("size", 6, "d"),
+        ("seconds", 10, ".2f"),
+        ("python peak mb", 16, ".0f"),
+        ("node peak mb", 14, ".0f"),
+        ("templates", 11, "d"),
+        ("resources", 11, "d"),
+        ("largest template", 18, "d"),
+        ("template kb", 13, ".0f"),
+    ]
+    baseline = load_baseline()
+
+    print("".join(f"{name:>{width}}" for name, width, _ in columns) + "  vs baseline")
+
+    results = []
+    failed = False
+    for size in args.sizes:
+        result = measure(size)
+        results.append(result)
+
+        row = "".join(
+            (
+                f"{result[name]:>{width}{spec}}"
+                if result.get(name) is not None
+                else f"{'-':>{width}}"
+            )
+            for name, width, spec in columns
+        )
+        if size in baseline:
+            compared = [
+                f"{key} {result[key] / baseline[size][key] - 1:+.0%}"
+                for key in COMPARED
+                if result.get(key) is not None and baseline[size].get(key)
+            ]
+            row += "  " + ", ".join(compared)
+        print(row)
+
+        if result["error"]:
+            print(f"{'':>6}FAILED {result['error']}")
+        if args.max_regression is not None and size in baseline:
+            slower = regressions(result, baseline[size], args.max_regression)
+            if slower:
+                failed = True
+                print(f"{'':>6}REGRESSED {'; '.join(slower)}")
+
+    if args.save_baseline:
+        save_baseline(results)
+        print(f"\nsaved {BASELINE_FILE}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Benchmark for SlottedLambdaVariables against LambdaVariables.
+
+Builds the same child class on both bases and reports the memory used per instance
+(measured with tracemalloc) and the time taken to construct and to serialize them.
+
+Run from the repository root:
+    python -m all_tests.benchmarks.bench_slotted_lambda_variables [--count 10000]
+"""
+
+import argparse
+import gc
+import timeit
+import tracemalloc
+from dataclasses import dataclass, field
+
+from common.aws.aws_lambda import LambdaVariables, SlottedLambdaVariables, slotted
+
+EVENT = {"quoteId": "Q-1234", "state": "OH", "premium": 1200.5, "agentCode": None}
+
+
+@dataclass
+class QuoteVariables(LambdaVariables):
+    quote_id: str = field(default=None, init=False)
+    state: str = field(default=None, init=False)
+    premium: float = field(default=None, init=False)
+    agent_code: str = field(default=None, init=False)
+    _raw_state: str = field(default=None, init=False)
+
+    def __post_init__(self):
+        self.quote_id = self.event.get("quoteId")
+        self.state = self.event.get("state")
+        self.premium = self.event.get("premium")
+        self.agent_code = self.event.get("agentCode")
+        self._raw_state = self.state
+
+
+@slotted
+class SlottedQuoteVariables(SlottedLambdaVariables):
+    quote_id: str = field(default=None, init=False)
+    state: str = field(default=None, init=False)
+    premium: float = field(default=None, init=False)
+    agent_code: str = field(default=None, init=False)
+    _raw_state: str = field(default=None, init=False)
+
+    def __post_init__(self):
+        self.quote_id = self.event.get("quoteId")
+        self.state = self.event.get("state")
+        self.premium = self.event.get("premium")
+        self.agent_code = self.event.get("agentCode")
+        self._raw_state = self.state
+
+
+def bytes_per_instance(cls, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    instances = [cls(EVENT) for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # The list itself is not part of the instance cost.
+    list_size = instances.__sizeof__()
+    return (after - before - list_size) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    assert QuoteVariables(EVENT).as_dict() == SlottedQuoteVariables(EVENT).as_dict()
+    assert QuoteVariables(EVENT).as_json() == SlottedQuoteVariables(EVENT).as_json()
+
+    print(f"{args.count} instances of each")
+    print(
+        f"    {'class':<24} {'bytes/instance':>15} {'construct us':>13} {'as_dict us':>11}"
+    )
+    for cls in (QuoteVariables, SlottedQuoteVariables):
+        memory = bytes_per_instance(cls, args.count)
+        construct = min(timeit.repeat(lambda: cls(EVENT), number=args.count, repeat=3))
+        instance = cls(EVENT)
+        serialize = min(timeit.repeat(instance.as_dict, number=args.count, repeat=3))
+        print(
+            f"    {cls.__name__:<24} {memory:>15.1f} "
+            f"{construct / args.count * 1e6:>13.3f} "
+            f"{serialize / args.count * 1e6:>11.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
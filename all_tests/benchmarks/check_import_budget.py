@@ -0,0 +1,113 @@
+"""
+Import time budget for the constant and config modules.
+
+Each module is imported in a fresh interpreter with `python -X importtime`. The check
+fails if importing it pulls in aws_cdk / jsii, GitPython or boto3 (they must stay lazy,
+see cdk_configs/utilities/lazy.py) or if its cumulative import time is over the budget.
+
+all_tests/unit_tests/cdk_configs/test_import_budget.py runs the same check with the unit
+tests. Run from the repository root, exits 1 on a failure:
+    python -m all_tests.benchmarks.check_import_budget [--budget-ms 250]
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).parents[2]
+
+MODULES = [
+    "common.constants.environment",
+    "common.aws.dynamodb.constants",
+    "cdk_configs.resource_names",
+    "cdk_configs.product_properties.pipeline_and_deployment_props",
+    "cdk_configs.product_properties.product_properties",
+    "cdk_configs.product_properties.common_props",
+    "cdk_configs.product_properties.environment_variables",
+    "cdk_configs.resource_configurations.common_configs",
+    "cdk_configs.resource_configurations.constructs",
+    "cdk_configs.resource_configurations.lambda_configs",
+    "cdk_configs.resource_configurations.storage_configs",
+    "cdk_configs.resource_configurations.api_configs",
+    "cdk_configs.resource_configurations.codebuild_configs",
+    "cdk_configs.default_tags",
+]
+
+# Top level packages that must only be imported when a construct is built.
+FORBIDDEN = ("aws_cdk", "jsii", "constructs", "git", "boto3", "botocore")
+
+# Cumulative import time allowed per module
+BUDGET_MS = 250
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """
+    Returns:
+        {imported module name: cumulative microseconds} from -X importtime for a fresh
+        interpreter importing module.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def forbidden_imports(times: Dict[str, int]) -> List[str]:
+    """
+    Returns:
+        [List[str]] the FORBIDDEN top level packages among the modules of times.
+    """
+    return sorted({name.split(".")[0] for name in times} & set(FORBIDDEN))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=BUDGET_MS,
+        help=f"cumulative import time allowed per module (default {BUDGET_MS}ms)",
+    )
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<64}{'import ms':>10}")
+    for module in MODULES:
+        times = import_times(module)
+        milliseconds = times.get(module, 0) / 1000
+        forbidden = forbidden_imports(times)
+
+        print(f"{module:<64}{milliseconds:>10.1f}")
+        if forbidden:
+            failures.append(f"{module} imports {', '.join(forbidden)}")
+        if milliseconds > args.budget_ms:
+            failures.append(
+                f"{module} took {milliseconds:.1f}ms, budget is {args.budget_ms:.0f}ms"
+            )
+
+    if failures:
+        print("\nFAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+
+    print(
+        f"\nAll modules within {args.budget_ms:.0f}ms and free of {', '.join(FORBIDDEN)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Placeholders for the lookups a synth makes against an AWS account, so the synth
+benchmarks run offline and without credentials.
+
+* DeploymentProperties.secret() answers from PLACEHOLDER_SECRETS instead of Secrets
+  Manager.
+* The VPC lookup needs nothing: without a cdk.context.json entry (the benchmarks do not
+  pass it in) cdk builds a placeholder vpc and only records the lookup as missing.
+* Partition placements of the generated configs go to a scratch copy of the committed
+  placement file (see cdk_configs/utilities/partitions.py).
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+from cdk_configs.product_properties.pipeline_and_deployment_props import (
+    DeploymentSecretKey,
+)
+
+PLACEHOLDER_SECRETS = {
+    DeploymentSecretKey.CROSS_ACCOUNT_ROLE: "arn:aws:iam::123456789012:role/benchmark",
+    DeploymentSecretKey.DOMAIN_CERT: (
+        "arn:aws:acm:us-east-1:123456789012:certificate/benchmark"
+    ),
+    DeploymentSecretKey.HOST_ZONE_ID: "Z0000000000BENCHMARK",
+    DeploymentSecretKey.HOST_ZONE_NAME: "example.com",
+}
+
+
+def placeholder_secret(secret_key: str, default_value: str = "NoSecretDefault") -> str:
+    return PLACEHOLDER_SECRETS.get(secret_key, default_value)
+
+
+@contextmanager
+def scratch_placement():
+    """
+    Within it, partition placements are read from and written to a copy of the
+    committed placement file, which is left as it is.
+    """
+    from cdk_configs.utilities import partitions
+
+    with tempfile.TemporaryDirectory() as directory:
+        scratch = os.path.join(directory, partitions.PLACEMENT_FILE.name)
+        if partitions.PLACEMENT_FILE.exists():
+            shutil.copyfile(partitions.PLACEMENT_FILE, scratch)
+        with mock.patch.object(partitions, "PLACEMENT_FILE", Path(scratch)):
+            yield
+
+
+@contextmanager
+def offline_lookups():
+    """
+    Within it, every DeploymentProperties answers secret() from PLACEHOLDER_SECRETS,
+    and placements go to scratch_placement().
+    """
+    from cdk_configs.product_properties.common_props import DeploymentProperties
+
+    with mock.patch.object(
+        DeploymentProperties,
+        "secret",
+        lambda self, secret_key, default_value="NoSecretDefault": placeholder_secret(
+            secret_key, default_value
+        ),
+    ), scratch_placement():
+        yield
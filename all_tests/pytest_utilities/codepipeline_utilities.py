@@ -0,0 +1,53 @@
+import json
+
+import boto3
+from botocore.stub import Stubber
+
+from common.aws.codepipeline import PIPELINE_JOB_KEY
+
+
+def stubbed_codepipeline_client():
+    """
+    Returns:
+        (client, Stubber) a CodePipeline client with no credentials behind it, and the
+        botocore Stubber its calls have to be queued on. The stubber checks every
+        call's parameters against the CodePipeline api, as the real client would.
+    """
+    client = boto3.client(
+        "codepipeline",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+    return client, Stubber(client)
+
+
+def codepipeline_job(
+    job_id: str = "job-1",
+    user_parameters: dict = None,
+    continuation_token: str = None,
+) -> dict:
+    """
+    Returns:
+        [dict] the job data CodePipeline gives a custom action or lambda job, with no
+        artifacts.
+    """
+    data = {
+        "actionConfiguration": {
+            "configuration": {"UserParameters": json.dumps(user_parameters or {})}
+        },
+        "inputArtifacts": [],
+        "outputArtifacts": [],
+    }
+    if continuation_token is not None:
+        data["continuationToken"] = continuation_token
+    return {"id": job_id, "data": data}
+
+
+def codepipeline_event(**kwargs) -> dict:
+    """
+    Returns:
+        [dict] the event CodePipeline invokes a lambda action with, see
+        codepipeline_job() for the parameters.
+    """
+    return {PIPELINE_JOB_KEY: codepipeline_job(**kwargs)}
@@ -0,0 +1,174 @@
+import fnmatch
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+from typing import Dict, Iterable, List, Optional
+
+from layers.build_layers import PIP, LayerBuild
+
+# The layers built in tests are byte-compiled by the python running them
+TEST_PYTHON_VERSION = "%d.%d" % sys.version_info[:2]
+
+
+def write_wheel(
+    directory: str,
+    distribution: str,
+    files: Dict[str, str],
+    version: str = "1.0",
+    tag: str = "py3-none-any",
+) -> str:
+    """
+    Writes a wheel of files, {path in the wheel: contents}, with the .dist-info pip
+    would install with it (a RECORD of every file).
+
+    Returns:
+        [str] the path of the wheel.
+    """
+    dist_info = f"{distribution}-{version}.dist-info"
+    contents = {
+        **files,
+        f"{dist_info}/METADATA": f"Name: {distribution}\nVersion: {version}\n",
+        f"{dist_info}/WHEEL": f"Wheel-Version: 1.0\nTag: {tag}\n",
+    }
+    contents[f"{dist_info}/RECORD"] = "".join(
+        f"{path},,\n" for path in [*contents, f"{dist_info}/RECORD"]
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    wheel = os.path.join(directory, f"{distribution}-{version}-{tag}.whl")
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, content in contents.items():
+            archive.writestr(path, content)
+    return wheel
+
+
+class FakePip:
+    """
+    An offline stand in for the pip commands layers/build_layers.py runs (its _run),
+    serving the wheels of index as the package index. It understands the options
+    install_requirements gives pip: -r, -d, -w, -t and --find-links. Like pip, it fails
+    with a CalledProcessError on a requirement it finds nowhere.
+
+    Parameters:
+        index: [str] - a directory of wheels, see write_wheel().
+        sdist_only: [Dict[str, Dict[str, str]]][OPTIONAL] - {distribution: its files}
+            of requirements the index only has an sdist of: `pip download` fails on
+            them unless a --find-links directory has their wheel, and `pip wheel`
+            builds it.
+
+    Properties:
+        commands: [List[List[str]]] - every pip command run, without PIP.
+        downloaded: [List[str]] - the wheels taken from the index, in order.
+    """
+
+    def __init__(self, index: str, sdist_only: Dict[str, Dict[str, str]] = None):
+        self.index = index
+        self.sdist_only = dict(sdist_only or {})
+        self.commands: List[List[str]] = []
+        self.downloaded: List[str] = []
+
+    def __call__(self, command: List[str]):
+        arguments = command[len(PIP) :]
+        self.commands.append(arguments)
+        action = arguments[0]
+        requirements = _requirements(_option(arguments, "-r")[0])
+        find_links = _option(arguments, "--find-links")
+
+        if action == "download":
+            destination = _option(arguments, "-d")[0]
+            for requirement in requirements:
+                wheel = _find_wheel(find_links, requirement)
+                if wheel is None and requirement not in self.sdist_only:
+                    wheel = _find_wheel([self.index], requirement)
+                    if wheel is not None:
+                        self.downloaded.append(os.path.basename(wheel))
+                _copy_to(_found(wheel, requirement, command), destination)
+
+        elif action == "wheel":
+            destination = _option(arguments, "-w")[0]
+            for requirement in requirements:
+                if requirement in self.sdist_only:
+                    write_wheel(destination, requirement, self.sdist_only[requirement])
+                else:
+                    wheel = _find_wheel([*find_links, self.index], requirement)
+                    _copy_to(_found(wheel, requirement, command), destination)
+
+        elif action == "install":
+            target = _option(arguments, "-t")[0]
+            os.makedirs(target, exist_ok=True)
+            for requirement in requirements:
+                with zipfile.ZipFile(_find_wheel(find_links, requirement)) as wheel:
+                    wheel.extractall(target)
+
+        else:
+            raise ValueError(f"FakePip does not know `pip {action}`")
+
+    def runs(self, action: str) -> List[List[str]]:
+        """
+        Returns:
+            [List[List[str]]] the arguments of every `pip <action>` run.
+        """
+        return [arguments for arguments in self.commands if arguments[0] == action]
+
+
+def _option(arguments: List[str], name: str) -> List[str]:
+    return [
+        arguments[index + 1]
+        for index, argument in enumerate(arguments[:-1])
+        if argument == name
+    ]
+
+
+def _requirements(path: str) -> List[str]:
+    with open(path) as requirements:
+        return [
+            line.split("#")[0].split("=")[0].strip()
+            for line in requirements
+            if line.split("#")[0].strip()
+        ]
+
+
+def _find_wheel(directories: Iterable[str], distribution: str) -> Optional[str]:
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if fnmatch.fnmatch(name, f"{distribution}-*.whl"):
+                return os.path.join(directory, name)
+    return None
+
+
+def _found(wheel: Optional[str], requirement: str, command: List[str]) -> str:
+    if wheel is None:
+        raise subprocess.CalledProcessError(
+            1, command, stderr=f"No matching distribution found for {requirement}"
+        )
+    return wheel
+
+
+def _copy_to(path: str, directory: str):
+    os.makedirs(directory, exist_ok=True)
+    destination = os.path.join(directory, os.path.basename(path))
+    # pip leaves a file that is already there
+    if not os.path.exists(destination):
+        shutil.copyfile(path, destination)
+
+
+def layer_build(**kwargs) -> LayerBuild:
+    """
+    Returns:
+        [LayerBuild] a layer of the requirements.txt and common/ of a test repository
+        (see the layer_repository fixture), built for the python running the tests.
+    """
+    return LayerBuild(
+        **{
+            "name": "test_layer",
+            "requirements": "requirements.txt",
+            "output": os.path.join("layers", "test_layer.zip"),
+            "sources": ("common",),
+            "python_version": TEST_PYTHON_VERSION,
+            **kwargs,
+        }
+    )
@@ -0,0 +1,70 @@
+from typing import List
+
+from botocore.exceptions import ClientError
+
+
+class S3Calls:
+    """
+    Records the calls made with a boto3 s3 client - in unit tests, one talking to moto's
+    S3 - through the client's events, so tests can check which requests were sent
+    without standing in for S3 themselves. Every call is recorded in `calls` as
+    (operation, params), and `bytes_read` counts the bytes of the objects returned.
+
+    Parameters:
+        client: [boto3 s3 client] - the client to record.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.calls: List[tuple] = []
+        self.bytes_read = 0
+        client.meta.events.register("provide-client-params.s3", self._record)
+        client.meta.events.register("after-call.s3.GetObject", self._count)
+
+    def operations(self, name: str) -> List[dict]:
+        """
+        Returns:
+            [List[dict]] the params of every call made of the operation name, such as
+            "get_object".
+        """
+        return [params for operation, params in self.calls if operation == name]
+
+    def fail(self, name: str, exception: Exception):
+        """
+        Raises exception from every later call of the operation name, before it
+        reaches S3.
+        """
+
+        def raise_exception(**kwargs):
+            raise exception
+
+        api_name = self.client.meta.method_to_api_mapping[name]
+        self.client.meta.events.register(f"before-call.s3.{api_name}", raise_exception)
+
+    def _record(self, params: dict, model, **kwargs):
+        self.calls.append((_method_name(self.client, model.name), dict(params)))
+
+    def _count(self, parsed: dict, **kwargs):
+        self.bytes_read += parsed.get("ContentLength", 0)
+
+
+def client_error(code: str, status: int, operation: str) -> ClientError:
+    """
+    Returns:
+        [ClientError] the error boto3 raises for an S3 error response of code.
+    """
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": code},
+            "ResponseMetadata": {"HTTPStatusCode": status},
+        },
+        operation,
+    )
+
+
+def _method_name(client, api_name: str) -> str:
+    return next(
+        method
+        for method, api in client.meta.method_to_api_mapping.items()
+        if api == api_name
+    )
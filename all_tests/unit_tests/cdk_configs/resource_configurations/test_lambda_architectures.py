@@ -0,0 +1,116 @@
+import pytest
+
+from cdk_configs.resource_configurations.common_configs import (
+    LambdaArchitecture,
+    PipelineLambdaFunctionConfigs,
+    PipelineLayerConfigs,
+    ProductLambdaFunctionConfigs,
+    ProductLayerConfigs,
+)
+from cdk_configs.resource_configurations.constructs import (
+    LambdaFunctionConfigs,
+    LambdaLayerConfigs,
+    _check_architectures,
+)
+
+
+def product_lambda(**kwargs) -> LambdaFunctionConfigs:
+    return LambdaFunctionConfigs(
+        common=ProductLambdaFunctionConfigs,
+        function_name="Hello-World",
+        location="hello_world.hello_world_lambda.lambda_handler",
+        **kwargs,
+    )
+
+
+def product_layer(**kwargs) -> LambdaLayerConfigs:
+    return LambdaLayerConfigs(
+        common=ProductLayerConfigs,
+        layer_version_name="common-utilities",
+        description="common utilities",
+        code="common_layer.zip",
+        **kwargs,
+    )
+
+
+def test_lambdas_and_layers_default_to_x86_64():
+    assert product_lambda().architecture == LambdaArchitecture.X86_64
+    assert product_layer().compatible_architectures == [LambdaArchitecture.X86_64]
+    assert (
+        LambdaFunctionConfigs(
+            common=PipelineLambdaFunctionConfigs,
+            function_name="Update-Jira",
+            location="jira_status.jira_status_lambda.lambda_handler",
+        ).architecture
+        == LambdaArchitecture.X86_64
+    )
+    assert LambdaLayerConfigs(
+        common=PipelineLayerConfigs,
+        layer_version_name="pipeline",
+        description="pipeline",
+        code="pipeline_layer.zip",
+    ).compatible_architectures == [LambdaArchitecture.X86_64]
+
+
+def test_a_lambda_opts_in_to_arm64_over_its_common_configs():
+    assert (
+        product_lambda(architecture=LambdaArchitecture.ARM_64).architecture
+        == LambdaArchitecture.ARM_64
+    )
+
+
+def test_a_layer_lists_the_architectures_it_is_compatible_with():
+    layer = product_layer(
+        compatible_architectures=[LambdaArchitecture.X86_64, LambdaArchitecture.ARM_64]
+    )
+
+    assert layer.compatible_architectures == [
+        LambdaArchitecture.X86_64,
+        LambdaArchitecture.ARM_64,
+    ]
+
+
+@pytest.mark.parametrize("architectures", [["aarch64"], ["x86_64", "arm"], []])
+def test_unknown_or_no_architectures_raise(architectures):
+    with pytest.raises(ValueError, match="Unknown architecture"):
+        _check_architectures("Hello-World", architectures)
+
+
+def test_a_lambda_with_an_unknown_architecture_raises():
+    with pytest.raises(ValueError, match="Hello-World"):
+        product_lambda(architecture="aarch64")
+
+
+def test_a_layer_with_no_architectures_falls_back_to_x86_64():
+    # an empty list is no override, so common's architectures apply
+    assert product_layer(compatible_architectures=[]).compatible_architectures == [
+        LambdaArchitecture.X86_64
+    ]
+
+
+def test_check_layers_passes_compatible_layers():
+    product_lambda().check_layers([product_layer()])
+    product_lambda(architecture=LambdaArchitecture.ARM_64).check_layers(
+        [
+            product_layer(
+                compatible_architectures=[
+                    LambdaArchitecture.X86_64,
+                    LambdaArchitecture.ARM_64,
+                ]
+            )
+        ]
+    )
+
+
+def test_check_layers_raises_on_a_layer_of_another_architecture():
+    arm_lambda = product_lambda(architecture=LambdaArchitecture.ARM_64)
+
+    with pytest.raises(ValueError) as error:
+        arm_lambda.check_layers([product_layer()])
+
+    assert "Hello-World runs on arm64" in str(error.value)
+    assert "common-utilities ['x86_64']" in str(error.value)
+
+
+def test_check_layers_passes_no_layers():
+    product_lambda(architecture=LambdaArchitecture.ARM_64).check_layers([])
@@ -0,0 +1,60 @@
+import aws_cdk as cdk
+from aws_cdk import aws_apigateway as apigateway
+from aws_cdk import aws_lambda
+from aws_cdk.assertions import Match, Template
+
+from cdk_configs.resource_configurations.constructs import LambdaIntegrations
+
+
+def api_template(routes: dict) -> Template:
+    """
+    Returns:
+        [Template] of a stack with a RestApi and a method on it for each {path: lambda
+        name} of routes, integrated with LambdaIntegrations.
+    """
+    stack = cdk.Stack(cdk.App(), "Api")
+    api = apigateway.RestApi(stack, "Api")
+    lambdas = {
+        name: aws_lambda.Function(
+            stack,
+            name,
+            runtime=aws_lambda.Runtime.PYTHON_3_9,
+            handler="handler.lambda_handler",
+            code=aws_lambda.Code.from_inline("def lambda_handler(event, context): 0"),
+        )
+        for name in set(routes.values())
+    }
+    integrations = LambdaIntegrations(lambdas, api)
+    for path, name in routes.items():
+        api.root.add_resource(path).add_method("GET", integrations[name])
+    integrations.scope_permissions()
+    return Template.from_stack(stack)
+
+
+def test_one_permission_per_lambda():
+    template = api_template({"hello": "Hello", "again": "Hello", "bye": "Goodbye"})
+
+    template.resource_count_is("AWS::Lambda::Permission", 2)
+
+
+def test_the_permissions_allow_only_the_deployed_stage():
+    template = api_template({"hello": "Hello"})
+
+    template.has_resource_properties(
+        "AWS::Lambda::Permission",
+        {
+            "Principal": "apigateway.amazonaws.com",
+            "SourceArn": {
+                "Fn::Join": [
+                    "",
+                    Match.array_with(
+                        [
+                            "/",
+                            {"Ref": Match.string_like_regexp("ApiDeploymentStageprod")},
+                            "/*/*",
+                        ]
+                    ),
+                ]
+            },
+        },
+    )
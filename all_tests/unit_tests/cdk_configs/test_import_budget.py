@@ -0,0 +1,17 @@
+import pytest
+
+from all_tests.benchmarks.check_import_budget import (
+    BUDGET_MS,
+    MODULES,
+    forbidden_imports,
+    import_times,
+)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_config_modules_import_no_construct_dependencies(module):
+    # each in a fresh interpreter, where nothing is imported yet
+    times = import_times(module)
+
+    assert forbidden_imports(times) == [], "see cdk_configs/utilities/lazy.py"
+    assert times[module] / 1000 <= BUDGET_MS
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from cdk_configs.utilities.partitions import partition, stable_partition
+
+
+def lambdas(count: int, resources: int = 10) -> dict:
+    return {f"f{index}": resources for index in range(count)}
+
+
+def test_first_fit_in_declared_order():
+    placement = partition(lambdas(40))
+
+    # partition 0 keeps 50 of its 400 free for the stack's own resources
+    assert [placement[f"f{index}"] for index in range(40)] == [0] * 35 + [1] * 5
+
+
+def test_growth_of_a_placed_entry_moves_nothing():
+    placed = partition(lambdas(40))
+
+    grown = {**lambdas(40), "f0": 12}
+
+    assert partition(grown, placed) == placed
+    # without the placement f34 would no longer fit in partition 0
+    assert partition(grown)["f34"] == 1
+
+
+def test_new_entries_fill_the_room_left_by_placed_ones():
+    placed = partition(lambdas(40))
+    counts = {**lambdas(40), "f0": 30, "new": 10, "big": 380}
+
+    placement = partition(counts, placed)
+
+    assert {name: placement[name] for name in placed} == placed
+    assert placement["new"] == 1
+    assert placement["big"] == 2
+
+
+def test_removed_entries_are_dropped():
+    placed = partition(lambdas(3))
+
+    assert partition({"f0": 10, "f2": 10}, placed) == {"f0": 0, "f2": 0}
+
+
+def test_placed_partition_past_the_limit_raises():
+    placed = partition(lambdas(35))
+
+    with pytest.raises(ValueError, match="Partition 0 has grown"):
+        partition({**lambdas(35), "f0": 200}, placed)
+
+
+def test_entry_over_the_budget_raises():
+    with pytest.raises(ValueError, match="more than the 400"):
+        partition({"huge": 401})
+
+
+def test_stable_partition_reads_the_placement_file(tmp_path):
+    placement_file = tmp_path / "partition_placement.json"
+    placement_file.write_text(json.dumps({"Lambdas": {"f0": 1, "f1": 0}}))
+    before = placement_file.read_text()
+
+    placement = stable_partition(
+        "Lambdas", {"f0": 10, "f1": 10}, placement_file=placement_file
+    )
+
+    assert placement == {"f0": 1, "f1": 0}
+    assert placement_file.read_text() == before
+
+
+def test_stable_partition_fails_on_a_missing_placement(tmp_path):
+    placement_file = tmp_path / "partition_placement.json"
+    placement_file.write_text(json.dumps({"Lambdas": {"f0": 0}}))
+    before = placement_file.read_text()
+
+    with pytest.raises(ValueError, match="f1 of Lambdas have no placement"):
+        stable_partition("Lambdas", lambdas(2), placement_file=placement_file)
+
+    assert placement_file.read_text() == before
+
+
+def test_stable_partition_update_places_new_entries(tmp_path):
+    placement_file = tmp_path / "partition_placement.json"
+    placement_file.write_text(json.dumps({"Other": {"a": 3}}))
+
+    first = stable_partition("Lambdas", lambdas(40), True, placement_file)
+    grown = stable_partition(
+        "Lambdas", {**lambdas(40), "f0": 12, "new": 10}, True, placement_file
+    )
+
+    assert grown == {**first, "new": 1}
+    assert json.loads(placement_file.read_text()) == {
+        "Other": {"a": 3},
+        "Lambdas": grown,
+    }
+    assert [path.name for path in tmp_path.iterdir()] == [placement_file.name]
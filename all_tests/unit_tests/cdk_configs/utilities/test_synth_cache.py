@@ -0,0 +1,137 @@
+import os
+import tarfile
+import tempfile
+import uuid
+
+import pytest
+
+from cdk_configs.utilities import synth_cache
+from cdk_configs.utilities.synth_cache import (
+    SynthKeyError,
+    main,
+    restore,
+    store,
+    synth_key,
+)
+
+CONTEXT = "-c deploy_tag=ADHOC -c use_prod=False"
+
+
+def write(path, content: str = ""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    monkeypatch.setattr(synth_cache, "_deployment_secret_version", lambda: "v1")
+    write(tmp_path / "app.py", "app = App()")
+    write(tmp_path / "cdk.json", '{"app": "python3 app.py"}')
+    write(tmp_path / "stacks" / "product" / "product_stack.py", "class ProductStack:")
+    write(tmp_path / "common" / "aws" / "aws_lambda.py", "def api_response():")
+    return tmp_path
+
+
+def test_key_ignores_what_a_deploy_writes(repository):
+    key = synth_key(CONTEXT, str(repository))
+
+    write(repository / "cdk.out" / "manifest.json", "{}")
+    store(key, str(repository / "cdk.out"))
+    write(repository / "cdk-outputs.json", '{"ApiEndpoint": "https://example.com"}')
+    write(repository / "test_output.txt", "passed")
+    write(repository / "aws_lambda_functions" / "common_layer.zip", "zip")
+    write(repository / "stacks" / "pipeline" / "pipeline_lambdas" / "bundles" / "a.zip")
+    write(repository / "common" / "aws" / "__pycache__" / "aws_lambda.pyc", "pyc")
+
+    assert synth_key(CONTEXT, str(repository)) == key
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["app.py", "cdk.context.json", "stacks/product/product_stack.py", "layers/a.txt"],
+)
+def test_key_changes_with_the_sources(repository, path):
+    key = synth_key(CONTEXT, str(repository))
+
+    write(repository / path, "changed")
+
+    assert synth_key(CONTEXT, str(repository)) != key
+
+
+def test_key_changes_with_the_context(repository):
+    key = synth_key(CONTEXT, str(repository))
+
+    assert synth_key("-c use_prod=False -c deploy_tag=ADHOC", str(repository)) == key
+    assert synth_key("-c deploy_tag=DEV -c use_prod=False", str(repository)) != key
+
+
+def test_key_changes_with_the_deployment_secret(repository, monkeypatch):
+    key = synth_key(CONTEXT, str(repository))
+
+    monkeypatch.setattr(synth_cache, "_deployment_secret_version", lambda: "v2")
+
+    assert synth_key(CONTEXT, str(repository)) != key
+
+
+def test_an_unreadable_secret_version_has_no_key(repository, monkeypatch):
+    monkeypatch.setattr(synth_cache, "_deployment_secret_version", lambda: None)
+
+    with pytest.raises(SynthKeyError):
+        synth_key(CONTEXT, str(repository))
+
+
+def test_an_unreadable_secret_version_misses_and_stores_nothing(
+    repository, monkeypatch, tmp_path
+):
+    outdir, location = repository / "cdk.out", tmp_path / "cache"
+    write(outdir / "manifest.json", "{}")
+    monkeypatch.setattr(synth_cache, "_deployment_secret_version", lambda: None)
+    arguments = ["--root", str(repository), "--outdir", str(outdir)]
+
+    assert main(["store", *arguments, "--location", str(location)]) == 0
+    assert main(["restore", *arguments, "--location", str(location)]) == 1
+    assert not location.exists()
+    assert not (outdir / synth_cache.KEY_FILE_NAME).exists()
+
+
+def test_the_pipeline_key_does_not_depend_on_the_build_user(repository, monkeypatch):
+    monkeypatch.setenv("IS_PIPELINE", "True")
+    monkeypatch.setattr(synth_cache.getpass, "getuser", lambda: "root")
+    key = synth_key(CONTEXT, str(repository))
+
+    monkeypatch.setattr(synth_cache.getpass, "getuser", lambda: "codebuild-user")
+
+    assert synth_key(CONTEXT, str(repository)) == key
+
+
+def test_a_stored_synth_is_restored(repository, tmp_path):
+    key = synth_key(CONTEXT, str(repository))
+    write(repository / "cdk.out" / "manifest.json", "{}")
+    store(key, str(repository / "cdk.out"), str(tmp_path / "cache"))
+
+    assert restore(key, str(tmp_path / "restored"), str(tmp_path / "cache"))
+    assert (tmp_path / "restored" / "manifest.json").read_text() == "{}"
+
+
+@pytest.mark.parametrize("extraction_filters", [True, False])
+def test_an_entry_writing_outside_the_assembly_is_not_restored(
+    tmp_path, monkeypatch, extraction_filters
+):
+    if not extraction_filters:
+        # as on a python without them, which checks the members itself
+        monkeypatch.delattr(tarfile, "data_filter", raising=False)
+    key = "a" * 64
+    write(tmp_path / "assembly" / synth_cache.KEY_FILE_NAME, key)
+    write(tmp_path / "escape.txt", "outside")
+    escape = f"escape-{uuid.uuid4().hex}.txt"
+    (tmp_path / "cache").mkdir()
+    with tarfile.open(tmp_path / "cache" / f"{key}.tar.gz", "w:gz") as tar:
+        tar.add(tmp_path / "assembly", arcname=".")
+        # beside the temporary directory restore extracts into
+        tar.add(tmp_path / "escape.txt", arcname=f"../../{escape}")
+
+    restored = restore(key, str(tmp_path / "restored"), str(tmp_path / "cache"))
+
+    assert not restored
+    assert not (tmp_path / "restored").exists()
+    assert not os.path.exists(os.path.join(tempfile.gettempdir(), escape))
@@ -0,0 +1,128 @@
+import base64
+import gzip
+import json
+from dataclasses import field
+
+import pytest
+
+from common.aws.aws_lambda import (
+    DEFAULT_COMPRESS_ABOVE,
+    SlottedLambdaVariables,
+    api_response,
+    slotted,
+)
+from common.aws.event_schema import event_field
+
+
+@slotted
+class QuoteVariables(SlottedLambdaVariables):
+    quote_id: str = event_field("quoteId", str)
+    status: str = field(default=None, init=False)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.status = "quoted" if self.quote_id else "new"
+
+    @property
+    def reference(self) -> str:
+        return f"{type(self).__name__}-{__class__.__name__}-{self.quote_id}"
+
+
+@slotted
+class RenewalVariables(QuoteVariables):
+    renewal: bool = field(default=False, init=False)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.renewal = self.status == "quoted"
+
+
+def test_slotted_child_can_call_super():
+    variables = QuoteVariables({"quoteId": "q-1"})
+
+    assert variables.quote_id == "q-1"
+    assert variables.status == "quoted"
+    assert variables.as_dict() == {"quote_id": "q-1", "status": "quoted"}
+
+
+def test_slotted_grandchild_can_call_super():
+    variables = RenewalVariables({"quoteId": "q-1"})
+
+    assert (variables.quote_id, variables.status, variables.renewal) == (
+        "q-1",
+        "quoted",
+        True,
+    )
+    assert variables.reference == "RenewalVariables-QuoteVariables-q-1"
+
+
+def test_slotted_instances_have_no_dict():
+    variables = RenewalVariables({})
+
+    assert not hasattr(variables, "__dict__")
+    with pytest.raises(AttributeError):
+        variables.undeclared = 1
+
+
+def test_slotted_fields_not_in_the_event_keep_their_defaults():
+    variables = RenewalVariables({})
+
+    assert (variables.quote_id, variables.status, variables.renewal) == (
+        None,
+        "new",
+        False,
+    )
+
+
+def http_api_event(**headers) -> dict:
+    return {
+        "version": "2.0",
+        "headers": headers,
+        "requestContext": {"http": {"method": "GET"}},
+    }
+
+
+def test_api_response_compresses_large_http_api_bodies_by_default():
+    body = {"quotes": ["q"] * DEFAULT_COMPRESS_ABOVE}
+
+    response = api_response(http_api_event(**{"Accept-Encoding": "gzip, br"}), body)
+
+    assert response["isBase64Encoded"]
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(base64.b64decode(response["body"]))) == body
+
+
+@pytest.mark.parametrize(
+    "event, body, compress_above",
+    [
+        (http_api_event(), "x" * 2048, DEFAULT_COMPRESS_ABOVE),
+        (
+            http_api_event(**{"accept-encoding": "gzip"}),
+            "x" * 100,
+            DEFAULT_COMPRESS_ABOVE,
+        ),
+        (http_api_event(**{"accept-encoding": "gzip"}), "x" * 2048, None),
+        (
+            {"httpMethod": "GET", "headers": {"accept-encoding": "gzip"}},
+            "x" * 2048,
+            DEFAULT_COMPRESS_ABOVE,
+        ),
+    ],
+    ids=["not accepted", "small", "turned off", "rest api"],
+)
+def test_api_response_does_not_compress(event, body, compress_above):
+    response = api_response(event, body, compress_above=compress_above)
+
+    assert not response["isBase64Encoded"]
+    assert "Content-Encoding" not in response["headers"]
+    assert response["body"] == body
+
+
+def test_api_response_not_modified_only_for_http_api_reads():
+    etag = api_response(http_api_event(), "hello")["headers"]["ETag"]
+
+    read = http_api_event(**{"if-none-match": etag})
+    write = {**read, "requestContext": {"http": {"method": "POST"}}}
+
+    assert api_response(read, "hello")["statusCode"] == 304
+    assert api_response(write, "hello")["statusCode"] == 200
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from all_tests.pytest_utilities.codepipeline_utilities import codepipeline_event
+from common.aws.codepipeline import MAX_CONTINUATION_TOKEN_LENGTH, PipelineTokens
+
+
+def test_put_job_success_without_output_variables(stubbed_client):
+    stubbed_client.add_response("put_job_success_result", {}, {"jobId": "job-1"})
+
+    PipelineTokens(codepipeline_event()).put_job_success()
+
+
+def test_put_job_success_with_output_variables(stubbed_client):
+    stubbed_client.add_response(
+        "put_job_success_result",
+        {},
+        {"jobId": "job-1", "outputVariables": {"tag": "v1.2.0"}},
+    )
+
+    PipelineTokens(codepipeline_event()).put_job_success({"tag": "v1.2.0"})
+
+
+def test_put_job_continuation_sends_the_token_as_json(stubbed_client):
+    stubbed_client.add_response(
+        "put_job_success_result",
+        {},
+        {"jobId": "job-1", "continuationToken": '{"page":2}'},
+    )
+
+    PipelineTokens(codepipeline_event()).put_job_continuation({"page": 2})
+
+
+def test_continuation_token_that_is_too_long_raises(stubbed_client):
+    tokens = PipelineTokens(codepipeline_event())
+
+    with pytest.raises(ValueError):
+        tokens.put_job_continuation({"page": "x" * MAX_CONTINUATION_TOKEN_LENGTH})
+
+
+@pytest.mark.parametrize(
+    "token, expected",
+    [(json.dumps({"page": 2}), {"page": 2}), ("not json", {"token": "not json"})],
+)
+def test_continuation_token_is_decoded(stubbed_client, token, expected):
+    tokens = PipelineTokens(codepipeline_event(continuation_token=token))
+
+    assert tokens.continuation_token == expected
+
+
+def test_put_job_failure(stubbed_client):
+    stubbed_client.add_response(
+        "put_job_failure_result",
+        {},
+        {
+            "jobId": "job-1",
+            "failureDetails": {"type": "JobFailed", "message": "it broke"},
+        },
+    )
+
+    PipelineTokens(codepipeline_event()).put_job_failure("it broke")
@@ -0,0 +1,187 @@
+from all_tests.pytest_utilities.codepipeline_utilities import codepipeline_job
+from common.aws.job_worker import CustomActionJobWorker
+
+ACTION_TYPE_ID = {
+    "category": "Invoke",
+    "owner": "Custom",
+    "provider": "Update-Github-Tag",
+    "version": "1",
+}
+
+
+class FakeContext:
+    """
+    A lambda context whose remaining time drops by step_ms every time it is asked.
+    """
+
+    def __init__(self, remaining_ms: int, step_ms: int = 0):
+        self.remaining_ms = remaining_ms
+        self.step_ms = step_ms
+
+    def get_remaining_time_in_millis(self) -> int:
+        remaining = self.remaining_ms
+        self.remaining_ms -= self.step_ms
+        return remaining
+
+
+def polled_job(job_id: str, **kwargs) -> dict:
+    return {
+        **codepipeline_job(job_id, **kwargs),
+        "nonce": f"nonce-{job_id}",
+        "accountId": "123456789012",
+    }
+
+
+def add_poll(stubber, *jobs: dict):
+    stubber.add_response(
+        "poll_for_jobs",
+        {"jobs": list(jobs)},
+        {"actionTypeId": ACTION_TYPE_ID, "maxBatchSize": 10},
+    )
+
+
+def add_acknowledge(stubber, job: dict, status: str = "InProgress"):
+    stubber.add_response(
+        "acknowledge_job",
+        {"status": status},
+        {"jobId": job["id"], "nonce": job["nonce"]},
+    )
+
+
+def add_success(stubber, job: dict):
+    stubber.add_response("put_job_success_result", {}, {"jobId": job["id"]})
+
+
+def succeed(pipeline_values):
+    pipeline_values.put_job_success()
+
+
+def worker(stubber, process_job=succeed) -> CustomActionJobWorker:
+    return CustomActionJobWorker(ACTION_TYPE_ID, process_job, client=stubber.client)
+
+
+def test_run_batch_claims_and_processes_every_job(stubbed_client):
+    jobs = [polled_job("job-1", user_parameters={"tag": "v1"}), polled_job("job-2")]
+    add_poll(stubbed_client, *jobs)
+    for job in jobs:
+        add_acknowledge(stubbed_client, job)
+        add_success(stubbed_client, job)
+
+    processed = []
+
+    def process_job(pipeline_values):
+        processed.append((pipeline_values.job_id, pipeline_values.input_parameters))
+        assert pipeline_values.client is stubbed_client.client
+        succeed(pipeline_values)
+
+    summary = worker(stubbed_client, process_job).run_batch()
+
+    assert summary.as_dict() == {"polled": 2, "claimed": 2, "processed": 2, "failed": 0}
+    assert processed == [("job-1", {"tag": "v1"}), ("job-2", {})]
+
+
+def test_run_batch_with_no_jobs(stubbed_client):
+    add_poll(stubbed_client)
+
+    summary = worker(stubbed_client).run_batch()
+
+    assert summary.as_dict() == {"polled": 0, "claimed": 0, "processed": 0, "failed": 0}
+
+
+def test_job_claimed_by_another_worker_is_skipped(stubbed_client):
+    taken, free = polled_job("job-1"), polled_job("job-2")
+    add_poll(stubbed_client, taken, free)
+    stubbed_client.add_client_error(
+        "acknowledge_job",
+        service_error_code="InvalidNonceException",
+        expected_params={"jobId": taken["id"], "nonce": taken["nonce"]},
+    )
+    add_acknowledge(stubbed_client, free)
+    add_success(stubbed_client, free)
+
+    summary = worker(stubbed_client).run_batch()
+
+    assert summary.as_dict() == {"polled": 2, "claimed": 1, "processed": 1, "failed": 0}
+
+
+def test_job_not_in_progress_after_acknowledge_is_skipped(stubbed_client):
+    job = polled_job("job-1")
+    add_poll(stubbed_client, job)
+    add_acknowledge(stubbed_client, job, status="Failed")
+
+    processed = []
+    summary = worker(stubbed_client, processed.append).run_batch()
+
+    assert processed == []
+    assert summary.as_dict() == {"polled": 1, "claimed": 0, "processed": 0, "failed": 0}
+
+
+def test_job_that_raises_is_failed(stubbed_client):
+    failing, passing = polled_job("job-1"), polled_job("job-2")
+    add_poll(stubbed_client, failing, passing)
+    add_acknowledge(stubbed_client, failing)
+    stubbed_client.add_response(
+        "put_job_failure_result",
+        {},
+        {
+            "jobId": failing["id"],
+            "failureDetails": {
+                "type": "JobFailed",
+                "message": "Job worker failed: no such tag",
+            },
+        },
+    )
+    add_acknowledge(stubbed_client, passing)
+    add_success(stubbed_client, passing)
+
+    def process_job(pipeline_values):
+        if pipeline_values.job_id == failing["id"]:
+            raise ValueError("no such tag")
+        succeed(pipeline_values)
+
+    summary = worker(stubbed_client, process_job).run_batch()
+
+    assert summary.as_dict() == {"polled": 2, "claimed": 2, "processed": 1, "failed": 1}
+
+
+def test_run_stops_when_a_poll_comes_back_empty(stubbed_client):
+    job = polled_job("job-1")
+    add_poll(stubbed_client, job)
+    add_acknowledge(stubbed_client, job)
+    add_success(stubbed_client, job)
+    add_poll(stubbed_client)
+
+    summary = worker(stubbed_client).run(FakeContext(60000))
+
+    assert summary == {"polled": 1, "claimed": 1, "processed": 1, "failed": 0}
+
+
+def test_run_stops_when_time_runs_out(stubbed_client):
+    # Every poll has a job waiting, but only the first batch starts with more than the
+    # reserve left
+    job = polled_job("job-1")
+    add_poll(stubbed_client, job)
+    add_acknowledge(stubbed_client, job)
+    add_success(stubbed_client, job)
+
+    summary = worker(stubbed_client).run(FakeContext(15000, step_ms=10000), 10000)
+
+    assert summary == {"polled": 1, "claimed": 1, "processed": 1, "failed": 0}
+
+
+def test_run_without_time_left_does_not_poll(stubbed_client):
+    summary = worker(stubbed_client).run(FakeContext(5000), 10000)
+
+    assert summary == {"polled": 0, "claimed": 0, "processed": 0, "failed": 0}
+
+
+def test_from_environment(monkeypatch, stubbed_client):
+    monkeypatch.setenv("JOB_WORKER_CATEGORY", "Invoke")
+    monkeypatch.setenv("JOB_WORKER_PROVIDER", "Update-Github-Tag")
+    monkeypatch.setenv("JOB_WORKER_VERSION", "1")
+
+    job_worker = CustomActionJobWorker.from_environment(
+        succeed, client=stubbed_client.client
+    )
+
+    assert job_worker.action_type_id == ACTION_TYPE_ID
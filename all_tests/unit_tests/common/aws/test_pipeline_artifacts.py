@@ -0,0 +1,487 @@
+import io
+import json
+import os
+import zipfile
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from all_tests.pytest_utilities.s3_utilities import S3Calls, client_error
+from common.aws.pipeline_artifacts import (
+    MINIMUM_PART_SIZE,
+    ArtifactReader,
+    ArtifactWriter,
+    S3MultipartFile,
+    S3RangeFile,
+    get_artifact_location,
+)
+
+BUCKET = "artifact-bucket"
+KEY = "pipeline/BuildArtif/abc123"
+BLOCK_SIZE = 64
+
+
+def artifact_entry(name: str = "BuildArtifact") -> dict:
+    return {
+        "name": name,
+        "location": {
+            "type": "S3",
+            "s3Location": {"bucketName": BUCKET, "objectKey": KEY},
+        },
+    }
+
+
+@pytest.fixture
+def s3():
+    """
+    A boto3 s3 client of moto's S3, with the artifact bucket created.
+    """
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def read_object(s3) -> bytes:
+    return s3.get_object(Bucket=BUCKET, Key=KEY)["Body"].read()
+
+
+def object_exists(s3) -> bool:
+    return s3.list_objects_v2(Bucket=BUCKET, Prefix=KEY)["KeyCount"] > 0
+
+
+def range_file(s3, data: bytes, block_size: int = BLOCK_SIZE):
+    s3.put_object(Bucket=BUCKET, Key=KEY, Body=data)
+    return S3Calls(s3), S3RangeFile(s3, BUCKET, KEY, block_size)
+
+
+#######################################################################################
+#   S3RangeFile                                                                       #
+#######################################################################################
+
+
+def test_size_is_read_with_a_suffix_range_that_primes_the_block(s3):
+    data = bytes(range(256))
+    calls, file = range_file(s3, data)
+
+    assert file.size == 256
+    assert calls.operations("get_object") == [
+        {"Bucket": BUCKET, "Key": KEY, "Range": f"bytes=-{BLOCK_SIZE}"}
+    ]
+
+    # the tail is already cached
+    file.seek(-10, io.SEEK_END)
+    assert file.read() == data[-10:]
+    assert file.requests == 1
+
+
+def test_small_read_fetches_one_block_from_the_position(s3):
+    data = bytes(range(256))
+    calls, file = range_file(s3, data)
+
+    file.seek(10)
+    assert file.read(5) == data[10:15]
+    assert calls.operations("get_object")[-1]["Range"] == "bytes=10-73"
+
+    # served from the block just fetched
+    assert file.read(20) == data[15:35]
+    assert file.requests == 2
+
+
+def test_read_near_the_end_anchors_the_block_to_the_end(s3):
+    data = bytes(range(256))
+    calls, file = range_file(s3, data, block_size=32)
+    assert file.size == 256
+
+    file.seek(200)
+    assert file.read(4) == data[200:204]
+    assert calls.operations("get_object")[-1]["Range"] == "bytes=200-231"
+
+    # a block from 240 would run past the end, so it ends at the end instead
+    file.seek(240)
+    assert file.read(4) == data[240:244]
+    assert calls.operations("get_object")[-1]["Range"] == "bytes=224-255"
+
+    file.seek(226)
+    assert file.read(30) == data[226:256]
+    assert file.requests == 3
+
+
+def test_large_read_goes_straight_to_s3_for_exactly_its_range(s3):
+    data = os.urandom(1000)
+    calls, file = range_file(s3, data)
+
+    file.seek(100)
+    assert file.read(500) == data[100:600]
+    assert calls.operations("get_object")[-1]["Range"] == "bytes=100-599"
+    assert file.tell() == 600
+
+
+def test_object_smaller_than_a_block_is_fetched_once(s3):
+    data = b"a small object"
+    calls, file = range_file(s3, data)
+
+    assert file.read() == data
+    file.seek(2)
+    assert file.read(5) == data[2:7]
+    assert file.requests == 1
+
+
+def test_read_past_the_end_is_truncated_and_read_at_the_end_is_empty(s3):
+    data = bytes(range(100))
+    _, file = range_file(s3, data)
+
+    file.seek(95)
+    assert file.read(50) == data[95:]
+    assert file.tell() == 100
+    assert file.read(10) == b""
+    assert file.read() == b""
+
+
+def test_seek_beyond_the_end_reads_nothing(s3):
+    _, file = range_file(s3, bytes(100))
+
+    assert file.seek(150) == 150
+    assert file.read(10) == b""
+    assert file.tell() == 150
+
+
+def test_seek_whence(s3):
+    data = bytes(range(100))
+    _, file = range_file(s3, data)
+
+    assert file.seek(10) == 10
+    assert file.seek(5, io.SEEK_CUR) == 15
+    assert file.seek(-5, io.SEEK_CUR) == 10
+    assert file.seek(-1, io.SEEK_END) == 99
+    assert file.read() == data[99:]
+
+
+@pytest.mark.parametrize(
+    "offset, whence",
+    [(-1, io.SEEK_SET), (-101, io.SEEK_END), (-1, io.SEEK_CUR)],
+)
+def test_seek_before_the_start_raises(s3, offset, whence):
+    _, file = range_file(s3, bytes(100))
+
+    with pytest.raises(OSError):
+        file.seek(offset, whence)
+
+
+def test_seek_with_an_invalid_whence_raises(s3):
+    _, file = range_file(s3, bytes(100))
+
+    with pytest.raises(ValueError):
+        file.seek(0, 3)
+
+
+def test_readinto(s3):
+    data = bytes(range(100))
+    _, file = range_file(s3, data)
+    buffer = bytearray(30)
+
+    file.seek(90)
+    assert file.readinto(buffer) == 10
+    assert bytes(buffer[:10]) == data[90:]
+
+
+def test_empty_object_reads_nothing(s3):
+    _, file = range_file(s3, b"")
+
+    assert file.size == 0
+    assert file.read() == b""
+    assert file.seek(0, io.SEEK_END) == 0
+    assert file.requests == 1
+
+
+def test_empty_object_answered_with_invalid_range_reads_nothing(s3):
+    # S3 answers a suffix range on an empty object with a 416, where moto sends it all
+    calls, file = range_file(s3, b"")
+    calls.fail("get_object", client_error("InvalidRange", 416, "GetObject"))
+
+    assert file.size == 0
+    assert file.read() == b""
+    assert file.requests == 1
+
+
+def test_missing_object_raises(s3):
+    file = S3RangeFile(s3, BUCKET, "missing", BLOCK_SIZE)
+
+    with pytest.raises(ClientError, match="NoSuchKey"):
+        file.read()
+
+
+#######################################################################################
+#   ArtifactReader                                                                    #
+#######################################################################################
+
+
+@pytest.fixture
+def artifact_zip() -> dict:
+    """
+    {member: content} of a zip artifact with one large member stored uncompressed, so
+    reading the others must not fetch it.
+    """
+    members = {
+        "cdk-outputs.json": json.dumps(
+            {"Stack": {"ApiEndpoint": "https://x"}}
+        ).encode(),
+        "notes.txt": b"hello world\n" * 20,
+        "large.bin": os.urandom(200_000),
+    }
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return {"members": members, "data": buffer.getvalue()}
+
+
+def artifact_reader(s3, data: bytes, block_size: int = 4096):
+    s3.put_object(Bucket=BUCKET, Key=KEY, Body=data)
+    return S3Calls(s3), ArtifactReader(
+        artifact_entry(), client=s3, block_size=block_size
+    )
+
+
+def test_reader_lists_and_reads_members(s3, artifact_zip):
+    _, reader = artifact_reader(s3, artifact_zip["data"])
+
+    with reader:
+        assert reader.namelist() == list(artifact_zip["members"])
+        assert reader.read("notes.txt") == artifact_zip["members"]["notes.txt"]
+        assert reader.read_json("cdk-outputs.json") == {
+            "Stack": {"ApiEndpoint": "https://x"}
+        }
+
+
+def test_reader_only_fetches_what_it_reads(s3, artifact_zip):
+    calls, reader = artifact_reader(s3, artifact_zip["data"])
+
+    with reader:
+        reader.read_json("cdk-outputs.json")
+
+    assert calls.bytes_read < len(artifact_zip["data"]) / 10
+
+
+def test_reader_streams_a_member_in_chunks(s3, artifact_zip):
+    _, reader = artifact_reader(s3, artifact_zip["data"])
+
+    with reader:
+        chunks = list(reader.iter_chunks("large.bin", chunk_size=50_000))
+
+    assert [len(chunk) for chunk in chunks] == [50_000] * 4
+    assert b"".join(chunks) == artifact_zip["members"]["large.bin"]
+
+
+def test_reader_raises_key_error_for_a_missing_member(s3, artifact_zip):
+    _, reader = artifact_reader(s3, artifact_zip["data"])
+
+    with reader, pytest.raises(KeyError):
+        reader.open("missing.txt")
+
+
+def test_reader_raises_bad_zip_file_for_an_empty_artifact(s3):
+    _, reader = artifact_reader(s3, b"")
+
+    with reader, pytest.raises(zipfile.BadZipFile):
+        reader.namelist()
+
+
+def test_artifact_location_must_be_s3(s3):
+    artifact = {"name": "Other", "location": {"type": "CodeCommit"}}
+
+    with pytest.raises(ValueError):
+        get_artifact_location(artifact)
+
+    assert get_artifact_location(artifact_entry()) == (BUCKET, KEY)
+
+
+#######################################################################################
+#   S3MultipartFile                                                                   #
+#######################################################################################
+
+PART = MINIMUM_PART_SIZE
+KMS_ARGS = {"ServerSideEncryption": "aws:kms", "SSEKMSKeyId": "key-id"}
+
+
+def multipart_file(s3, **kwargs):
+    return S3Calls(s3), S3MultipartFile(s3, BUCKET, KEY, **kwargs)
+
+
+def part_sizes(calls: S3Calls) -> list:
+    return [len(call["Body"]) for call in calls.operations("upload_part")]
+
+
+def test_small_object_is_sent_with_a_single_put(s3):
+    calls, file = multipart_file(s3, extra_args=KMS_ARGS)
+
+    file.write(b"small ")
+    file.write(b"object")
+    file.close()
+
+    assert read_object(s3) == b"small object"
+    assert calls.operations("put_object") == [
+        {"Bucket": BUCKET, "Key": KEY, "Body": b"small object", **KMS_ARGS}
+    ]
+    assert calls.operations("create_multipart_upload") == []
+
+
+def test_empty_object_is_put(s3):
+    calls, file = multipart_file(s3)
+
+    file.close()
+
+    assert read_object(s3) == b""
+
+
+def test_exactly_one_part_is_uploaded_while_writing_and_completed_on_close(s3):
+    calls, file = multipart_file(s3, extra_args=KMS_ARGS)
+    data = os.urandom(PART)
+
+    file.write(data)
+    assert part_sizes(calls) == [PART]
+    file.close()
+
+    assert part_sizes(calls) == [PART]
+    assert calls.operations("create_multipart_upload")[0] == {
+        "Bucket": BUCKET,
+        "Key": KEY,
+        **KMS_ARGS,
+    }
+    assert read_object(s3) == data
+    assert calls.operations("put_object") == []
+
+
+def test_one_byte_over_a_part_is_uploaded_as_a_last_part_on_close(s3):
+    calls, file = multipart_file(s3)
+    data = os.urandom(PART + 1)
+
+    file.write(data)
+    assert part_sizes(calls) == [PART]
+    file.close()
+
+    assert part_sizes(calls) == [PART, 1]
+    assert read_object(s3) == data
+
+
+def test_writes_are_split_on_part_boundaries(s3):
+    calls, file = multipart_file(s3)
+    chunks = [os.urandom(4 * 1024 * 1024) for _ in range(3)]
+
+    for chunk in chunks:
+        file.write(chunk)
+    assert file.tell() == 12 * 1024 * 1024
+    file.close()
+
+    assert part_sizes(calls) == [PART, PART, 2 * 1024 * 1024]
+    assert [call["PartNumber"] for call in calls.operations("upload_part")] == [
+        1,
+        2,
+        3,
+    ]
+    assert read_object(s3) == b"".join(chunks)
+
+
+def test_part_size_below_the_s3_minimum_raises(s3):
+    with pytest.raises(ValueError):
+        multipart_file(s3, part_size=PART - 1)
+
+
+def test_write_after_close_raises(s3):
+    _, file = multipart_file(s3)
+    file.close()
+
+    with pytest.raises(ValueError):
+        file.write(b"late")
+
+
+def test_failed_complete_aborts_the_upload(s3):
+    calls, file = multipart_file(s3)
+    calls.fail(
+        "complete_multipart_upload",
+        client_error("InternalError", 500, "CompleteMultipartUpload"),
+    )
+    file.write(os.urandom(PART + 10))
+
+    with pytest.raises(ClientError):
+        file.close()
+
+    upload_id = calls.operations("upload_part")[0]["UploadId"]
+    assert calls.operations("abort_multipart_upload") == [
+        {"Bucket": BUCKET, "Key": KEY, "UploadId": upload_id}
+    ]
+    assert not object_exists(s3)
+    assert file.closed
+
+
+def test_failed_single_put_does_not_abort_an_upload_that_never_started(s3):
+    calls, file = multipart_file(s3)
+    calls.fail("put_object", client_error("InternalError", 500, "PutObject"))
+    file.write(b"small")
+
+    with pytest.raises(ClientError):
+        file.close()
+
+    assert calls.operations("abort_multipart_upload") == []
+    assert file.closed
+
+
+#######################################################################################
+#   ArtifactWriter                                                                    #
+#######################################################################################
+
+
+def artifact_writer(s3, **kwargs) -> ArtifactWriter:
+    return ArtifactWriter(
+        artifact_entry("OutputArtifact"),
+        encryption_key={"type": "KMS", "id": "key-id"},
+        client=s3,
+        **kwargs,
+    )
+
+
+def test_writer_uploads_a_readable_zip(s3):
+    calls = S3Calls(s3)
+
+    with artifact_writer(s3) as artifact:
+        artifact.write("notes.txt", "hello")
+        artifact.write_json("cards.json", ["ABC-1", "ABC-2"])
+        with artifact.open("large.bin") as member:
+            member.write(b"x" * 1000)
+
+    with zipfile.ZipFile(io.BytesIO(read_object(s3))) as archive:
+        assert archive.read("notes.txt") == b"hello"
+        assert json.loads(archive.read("cards.json")) == ["ABC-1", "ABC-2"]
+        assert archive.read("large.bin") == b"x" * 1000
+
+    assert calls.operations("put_object")[0]["SSEKMSKeyId"] == "key-id"
+
+
+def test_writer_streams_a_large_artifact_in_parts(s3):
+    calls = S3Calls(s3)
+    data = os.urandom(2 * PART + 100)
+
+    with artifact_writer(s3, compression=zipfile.ZIP_STORED) as artifact:
+        with artifact.open("large.bin") as member:
+            for start in range(0, len(data), 1024 * 1024):
+                member.write(data[start : start + 1024 * 1024])
+
+    assert len(calls.operations("upload_part")) == 3
+    with zipfile.ZipFile(io.BytesIO(read_object(s3))) as archive:
+        assert archive.read("large.bin") == data
+
+
+def test_writer_aborts_when_the_with_block_raises(s3):
+    calls = S3Calls(s3)
+
+    with pytest.raises(KeyError):
+        with artifact_writer(s3, compression=zipfile.ZIP_STORED) as artifact:
+            artifact.write("large.bin", os.urandom(PART + 100))
+            raise KeyError("failed half way")
+
+    assert len(calls.operations("abort_multipart_upload")) == 1
+    assert calls.operations("complete_multipart_upload") == []
+    assert s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads", []) == []
+    assert not object_exists(s3)
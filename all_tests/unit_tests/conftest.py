@@ -0,0 +1,78 @@
+import pytest
+from aws_lambda_powertools import Logger
+
+from all_tests.pytest_utilities.codepipeline_utilities import (
+    stubbed_codepipeline_client,
+)
+from all_tests.pytest_utilities.layer_utilities import FakePip, write_wheel
+from common.aws import codepipeline
+from layers import build_layers
+
+
+@pytest.fixture(scope="session", autouse=True)
+def lambda_logger():
+    """
+    The parent Logger a lambda handler creates, which the Logger(child=True) of the
+    common modules need before they can append keys.
+    """
+    return Logger()
+
+
+@pytest.fixture
+def stubbed_client(monkeypatch):
+    """
+    The Stubber of the CodePipeline client PipelineTokens get, which its client is
+    stubber.client. Every response queued on it must be used by the end of the test.
+    """
+    client, stubber = stubbed_codepipeline_client()
+    monkeypatch.setattr(codepipeline, "get_codepipeline_client", lambda: client)
+    with stubber:
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+@pytest.fixture
+def layer_repository(tmp_path):
+    """
+    A repository to build a layer of (see layer_utilities.layer_build) in tmp_path:
+    requirements.txt of the distributions in its index/ - tinyjson, the module
+    tinyhttp that imports it, and unused - and common/, whose helpers imports tinyjson.
+    """
+    index = tmp_path / "index"
+    write_wheel(
+        str(index),
+        "tinyjson",
+        {
+            "tinyjson/__init__.py": "from tinyjson.core import dumps\n",
+            "tinyjson/__init__.pyi": "def dumps(value: object) -> str: ...\n",
+            "tinyjson/core.py": "import json\n\n\ndef dumps(value):\n"
+            + "    return json.dumps(value)\n",
+            "tinyjson/py.typed": "",
+            "tinyjson/tests/test_core.py": "import pytest\n",
+            "tinyjson/docs/index.md": "# tinyjson\n",
+        },
+    )
+    write_wheel(
+        str(index),
+        "tinyhttp",
+        {"tinyhttp.py": "import tinyjson\n\n\ndef get(url):\n    return url\n"},
+    )
+    write_wheel(str(index), "unused", {"unused/__init__.py": "VALUE = 1\n"})
+
+    repository = tmp_path / "repository"
+    (repository / "common").mkdir(parents=True)
+    (repository / "requirements.txt").write_text("tinyjson==1.0\ntinyhttp\nunused\n")
+    (repository / "common" / "__init__.py").write_text("")
+    (repository / "common" / "helpers.py").write_text("import tinyjson\n")
+    (repository / "common" / "other.py").write_text("import unused\n")
+    return repository
+
+
+@pytest.fixture
+def fake_pip(monkeypatch, layer_repository):
+    """
+    The FakePip the layer builds run instead of pip, serving layer_repository's index.
+    """
+    pip = FakePip(str(layer_repository.parent / "index"))
+    monkeypatch.setattr(build_layers, "_run", pip)
+    return pip
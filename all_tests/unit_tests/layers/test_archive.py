@@ -0,0 +1,73 @@
+import os
+import zipfile
+
+from all_tests.pytest_utilities.layer_utilities import layer_build
+from layers.archive import FIXED_DATE_TIME, directory_files, write_zip
+from layers.build_layers import build, layer_key, read_key
+
+
+def write_tree(directory, mtime: int, mode: int = 0o600):
+    for path, content in {"b/module.py": "B = 1\n", "a.py": "A = 1\n"}.items():
+        (directory / path).parent.mkdir(parents=True, exist_ok=True)
+        (directory / path).write_text(content)
+        os.chmod(directory / path, mode)
+        os.utime(directory / path, (mtime, mtime))
+
+
+def test_the_same_contents_zip_to_the_same_bytes(tmp_path):
+    write_tree(tmp_path / "first", mtime=1_000_000_000)
+    write_tree(tmp_path / "second", mtime=1_700_000_000, mode=0o664)
+
+    write_zip(str(tmp_path / "first.zip"), directory_files(str(tmp_path), "first"))
+    write_zip(
+        str(tmp_path / "second.zip"),
+        # in another order
+        reversed(list(directory_files(str(tmp_path / "second"), "."))),
+    )
+    write_zip(str(tmp_path / "again.zip"), directory_files(str(tmp_path), "first"))
+
+    assert (tmp_path / "first.zip").read_bytes() == (
+        tmp_path / "again.zip"
+    ).read_bytes()
+    with zipfile.ZipFile(tmp_path / "second.zip") as archive:
+        assert [info.filename for info in archive.infolist()] == ["a.py", "b/module.py"]
+        assert {info.date_time for info in archive.infolist()} == {FIXED_DATE_TIME}
+        assert {info.external_attr >> 16 for info in archive.infolist()} == {0o100644}
+
+
+def test_executables_keep_their_mode(tmp_path):
+    write_tree(tmp_path / "tree", mtime=1_000_000_000, mode=0o700)
+
+    write_zip(str(tmp_path / "tree.zip"), directory_files(str(tmp_path), "tree"))
+
+    with zipfile.ZipFile(tmp_path / "tree.zip") as archive:
+        assert {info.external_attr >> 16 for info in archive.infolist()} == {0o100755}
+
+
+def test_the_comment_is_written(tmp_path):
+    write_tree(tmp_path / "tree", mtime=1_000_000_000)
+
+    write_zip(
+        str(tmp_path / "tree.zip"),
+        directory_files(str(tmp_path), "tree"),
+        comment="key",
+    )
+
+    assert read_key(str(tmp_path / "tree.zip")) == "key"
+
+
+def test_two_builds_of_a_layer_are_the_same_bytes_and_key(
+    fake_pip, layer_repository, tmp_path
+):
+    layer = layer_build()
+    output = layer_repository / layer.output
+
+    build(layer, str(layer_repository), str(tmp_path / "first_cache"))
+    first = output.read_bytes()
+    # a touched source is the same input
+    os.utime(layer_repository / "common" / "helpers.py", (1_900_000_000,) * 2)
+    result = build(layer, str(layer_repository), str(tmp_path / "second_cache"), True)
+
+    assert result.status == "built"
+    assert output.read_bytes() == first
+    assert read_key(str(output)) == layer_key(layer, str(layer_repository))
@@ -0,0 +1,107 @@
+import os
+
+from all_tests.pytest_utilities.layer_utilities import layer_build
+from layers.build_layers import build, layer_key, read_key
+
+
+def test_a_build_records_its_key_in_the_zip_comment(
+    fake_pip, layer_repository, tmp_path
+):
+    layer = layer_build()
+
+    result = build(layer, str(layer_repository), str(tmp_path / "cache"))
+
+    assert result.succeeded, result.error
+    assert result.status == "built"
+    key = layer_key(layer, str(layer_repository))
+    assert read_key(str(layer_repository / layer.output)) == key
+    assert read_key(str(tmp_path / "cache" / f"test_layer-{key}.zip")) == key
+
+
+def test_unchanged_inputs_are_not_built_again(fake_pip, layer_repository, tmp_path):
+    layer = layer_build()
+    build(layer, str(layer_repository), str(tmp_path / "cache"))
+    installs = len(fake_pip.runs("install"))
+
+    result = build(layer, str(layer_repository), str(tmp_path / "cache"))
+
+    assert result.status == "up to date"
+    assert len(fake_pip.runs("install")) == installs
+
+
+def test_a_zip_of_the_same_key_is_restored_from_the_cache(
+    fake_pip, layer_repository, tmp_path
+):
+    layer = layer_build()
+    build(layer, str(layer_repository), str(tmp_path / "cache"))
+    output = layer_repository / layer.output
+    built = output.read_bytes()
+    os.remove(output)
+    installs = len(fake_pip.runs("install"))
+
+    result = build(layer, str(layer_repository), str(tmp_path / "cache"))
+
+    assert result.status == "restored from cache"
+    assert output.read_bytes() == built
+    assert len(fake_pip.runs("install")) == installs
+
+
+def test_force_builds_anyway(fake_pip, layer_repository, tmp_path):
+    layer = layer_build()
+    build(layer, str(layer_repository), str(tmp_path / "cache"))
+
+    result = build(layer, str(layer_repository), str(tmp_path / "cache"), force=True)
+
+    assert result.status == "built"
+
+
+def test_the_key_changes_with_every_input(layer_repository):
+    root = str(layer_repository)
+    layer = layer_build()
+    keys = {layer_key(layer, root)}
+
+    (layer_repository / "requirements.txt").write_text("tinyjson==1.0\n")
+    keys.add(layer_key(layer, root))
+    (layer_repository / "common" / "helpers.py").write_text("import tinyhttp\n")
+    keys.add(layer_key(layer, root))
+    (layer_repository / "common" / "new.py").write_text("")
+    keys.add(layer_key(layer, root))
+    keys.add(layer_key(layer_build(architectures=("x86_64", "arm64")), root))
+    keys.add(layer_key(layer_build(strip_sources=True), root))
+
+    assert len(keys) == 6
+
+
+def test_the_key_ignores_bytecode_of_the_sources(layer_repository):
+    root = str(layer_repository)
+    key = layer_key(layer_build(), root)
+
+    (layer_repository / "common" / "__pycache__").mkdir()
+    (layer_repository / "common" / "__pycache__" / "helpers.cpython-39.pyc").write_text(
+        "bytecode"
+    )
+
+    assert layer_key(layer_build(), root) == key
+
+
+def test_a_changed_input_builds_again(fake_pip, layer_repository, tmp_path):
+    layer = layer_build()
+    build(layer, str(layer_repository), str(tmp_path / "cache"))
+
+    (layer_repository / "common" / "helpers.py").write_text("import tinyhttp\n")
+    result = build(layer, str(layer_repository), str(tmp_path / "cache"))
+
+    assert result.status == "built"
+    assert read_key(str(layer_repository / layer.output)) == layer_key(
+        layer, str(layer_repository)
+    )
+
+
+def test_a_failed_pip_is_returned_not_raised(fake_pip, layer_repository):
+    (layer_repository / "requirements.txt").write_text("tinyjson\nnowhere\n")
+
+    result = build(layer_build(), str(layer_repository), None)
+
+    assert not result.succeeded
+    assert "No matching distribution found for nowhere" in result.error
+    assert not (layer_repository / "layers" / "test_layer.zip").exists()
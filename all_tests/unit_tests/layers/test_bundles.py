@@ -0,0 +1,123 @@
+import zipfile
+
+import pytest
+
+from all_tests.pytest_utilities.layer_utilities import layer_build
+from cdk_configs.resource_configurations.common_configs import (
+    ProductLambdaFunctionConfigs,
+)
+from cdk_configs.resource_configurations.constructs import LambdaFunctionConfigs
+from layers import bundles
+from layers.build_layers import read_key
+
+
+def function(name: str, directory: str, **kwargs) -> LambdaFunctionConfigs:
+    return LambdaFunctionConfigs(
+        common=ProductLambdaFunctionConfigs,
+        function_name=name,
+        location=f"{directory}.handler.lambda_handler",
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def group(monkeypatch, layer_repository) -> bundles.FunctionGroup:
+    """
+    The lambdas of layer_repository's functions/, on the layer of its requirements:
+    Tiny imports tinyhttp and common.helpers, Plain only the standard library.
+    """
+    monkeypatch.setattr(bundles, "LAYER_BUILDS", {"test_layer": layer_build()})
+    functions = layer_repository / "functions"
+    (functions / "tiny").mkdir(parents=True)
+    (functions / "tiny" / "handler.py").write_text(
+        "import tinyhttp\nfrom common import helpers\n"
+    )
+    (functions / "plain").mkdir()
+    (functions / "plain" / "handler.py").write_text("import json\n")
+
+    return bundles.FunctionGroup(
+        layer="test_layer",
+        directory="functions",
+        functions={
+            "Tiny": function("Tiny", "tiny", x_dependency_bundle=True),
+            "Plain": function("Plain", "plain"),
+        },
+    )
+
+
+def bundle_names(group, name, root) -> set:
+    with zipfile.ZipFile(bundles.bundle_output(group, name, str(root))) as archive:
+        return {name for name in archive.namelist() if "__pycache__" not in name}
+
+
+def test_a_bundle_holds_only_what_its_handler_imports(
+    fake_pip, layer_repository, group
+):
+    (result,) = bundles.build_group(group, ["Tiny"], str(layer_repository), None)
+
+    assert result.succeeded, result.error
+    assert result.status == "built"
+    assert bundle_names(group, "Tiny", layer_repository) == {
+        "python/tinyhttp.py",
+        "python/tinyhttp-1.0.dist-info/METADATA",
+        "python/tinyjson/__init__.py",
+        "python/tinyjson/core.py",
+        "python/tinyjson-1.0.dist-info/METADATA",
+        "python/common/__init__.py",
+        "python/common/helpers.py",
+    }
+
+
+def test_an_unchanged_bundle_is_not_built_again(fake_pip, layer_repository, group):
+    bundles.build_group(group, ["Tiny"], str(layer_repository), None)
+    installs = len(fake_pip.runs("install"))
+
+    (result,) = bundles.build_group(group, ["Tiny"], str(layer_repository), None)
+
+    assert result.status == "up to date"
+    assert len(fake_pip.runs("install")) == installs
+
+
+def test_the_key_changes_with_the_function_and_common(layer_repository, group):
+    root = str(layer_repository)
+    keys = {bundles.bundle_key(group, "Tiny", root)}
+
+    (layer_repository / "functions" / "tiny" / "handler.py").write_text("import os\n")
+    keys.add(bundles.bundle_key(group, "Tiny", root))
+    (layer_repository / "common" / "other.py").write_text("")
+    keys.add(bundles.bundle_key(group, "Tiny", root))
+    (layer_repository / "requirements.txt").write_text("tinyjson\n")
+    keys.add(bundles.bundle_key(group, "Tiny", root))
+    # another function's sources are not in it
+    (layer_repository / "functions" / "plain" / "handler.py").write_text("import os\n")
+    keys.add(bundles.bundle_key(group, "Tiny", root))
+
+    assert len(keys) == 4
+
+
+def test_a_bundle_is_keyed_like_its_zip(fake_pip, layer_repository, group):
+    bundles.build_group(group, ["Tiny"], str(layer_repository), None)
+
+    assert read_key(
+        bundles.bundle_output(group, "Tiny", str(layer_repository))
+    ) == bundles.bundle_key(group, "Tiny", str(layer_repository))
+
+
+def test_a_lambda_that_imports_nothing_to_bundle_gets_no_bundle(
+    fake_pip, layer_repository, group
+):
+    (result,) = bundles.build_group(group, ["Plain"], str(layer_repository), None)
+
+    assert result.succeeded
+    assert result.status == "nothing"
+
+
+def test_x_dependency_bundle_on_a_lambda_with_nothing_to_bundle_fails(
+    fake_pip, layer_repository, group
+):
+    (layer_repository / "functions" / "tiny" / "handler.py").write_text("import os\n")
+
+    (result,) = bundles.build_group(group, ["Tiny"], str(layer_repository), None)
+
+    assert not result.succeeded
+    assert "unset its x_dependency_bundle" in result.error
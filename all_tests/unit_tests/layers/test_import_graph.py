@@ -0,0 +1,98 @@
+import zipfile
+
+import pytest
+
+from layers.import_graph import ImportGraph, module_imports
+
+
+@pytest.fixture
+def graph(layer_repository, tmp_path) -> ImportGraph:
+    """
+    An ImportGraph of layer_repository's common/ and every wheel of its index installed.
+    """
+    site = tmp_path / "site"
+    for wheel in (layer_repository.parent / "index").iterdir():
+        with zipfile.ZipFile(wheel) as archive:
+            archive.extractall(site)
+    return ImportGraph(str(layer_repository), ["common"], str(site))
+
+
+def write_function(directory, handler: str, **modules):
+    directory.mkdir(parents=True)
+    (directory / "handler.py").write_text(handler)
+    for name, source in modules.items():
+        (directory / f"{name}.py").write_text(source)
+
+
+def test_module_imports(tmp_path):
+    (tmp_path / "module.py").write_text(
+        "import os\n"
+        "from . import sibling\n"
+        "from ..parent import name\n"
+        "try:\n"
+        "    import ujson\n"
+        "except ImportError:\n"
+        "    ujson = None\n"
+        "def late():\n"
+        "    import json\n"
+    )
+
+    imports = set(module_imports(str(tmp_path / "module.py"), "package.sub.module"))
+
+    assert imports == {
+        ("os", False),
+        ("package.sub", False),
+        ("package.sub.sibling", True),
+        ("package.parent", False),
+        ("package.parent.name", True),
+        ("ujson", True),
+        ("json", False),
+    }
+
+
+def test_reach_prunes_what_the_handler_does_not_import(graph, tmp_path):
+    write_function(
+        tmp_path / "function",
+        "import os\n"
+        "import boto3\n"
+        "import tinyhttp\n"
+        "from common import helpers\n"
+        "from local import VALUE\n"
+        "try:\n"
+        "    import ujson\n"
+        "except ImportError:\n"
+        "    ujson = None\n"
+        "import nowhere\n",
+        local="VALUE = 1\n",
+    )
+
+    reach = graph.reach(str(tmp_path / "function"), "handler")
+
+    # tinyhttp imports tinyjson, nothing imports unused
+    assert reach.top_levels == {"tinyhttp.py", "tinyjson"}
+    assert reach.distributions == {"tinyhttp-1.0.dist-info", "tinyjson-1.0.dist-info"}
+    assert {path.split("repository")[-1] for path in reach.shared_modules} == {
+        "/common/__init__.py",
+        "/common/helpers.py",
+    }
+    assert {"os", "boto3"} <= reach.runtime
+    assert reach.missing == {"nowhere"}
+    assert {path.split("function")[-1] for path in reach.function_modules} == {
+        "/handler.py",
+        "/local.py",
+    }
+
+
+def test_a_handler_that_imports_nothing_installed_reaches_nothing(graph, tmp_path):
+    write_function(tmp_path / "function", "import json\n")
+
+    reach = graph.reach(str(tmp_path / "function"), "handler")
+
+    assert not (reach.top_levels or reach.distributions or reach.shared_modules)
+
+
+def test_a_missing_handler_raises(graph, tmp_path):
+    (tmp_path / "function").mkdir()
+
+    with pytest.raises(FileNotFoundError):
+        graph.reach(str(tmp_path / "function"), "handler")
@@ -0,0 +1,137 @@
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from all_tests.pytest_utilities.layer_utilities import layer_build
+from layers import slim
+from layers.build_layers import build
+
+
+def installed_files(target) -> set:
+    return {
+        os.path.relpath(os.path.join(directory, name), target).replace(os.sep, "/")
+        for directory, _, names in os.walk(target)
+        for name in names
+    }
+
+
+@pytest.fixture
+def installed(tmp_path):
+    target = tmp_path / "python"
+    for path, content in {
+        "package/__init__.py": "from package import core\n",
+        "package/core.py": "VALUE = 1\n",
+        "package/core.pyi": "VALUE: int\n",
+        "package/py.typed": "",
+        "package/tests/test_core.py": "",
+        "package/docs/index.md": "",
+        "package/__pycache__/core.cpython-39.pyc": "",
+        "package-1.0.dist-info/METADATA": "Name: package\n",
+        "package-1.0.dist-info/RECORD": "",
+        "package-1.0.dist-info/WHEEL": "",
+        "package-1.0.dist-info/LICENSE.txt": "",
+        "package-1.0.dist-info/licenses/NOTICE": "",
+        "bin/package-cli": "",
+        "docs/__init__.py": "",
+        "module.py": "",
+    }.items():
+        (target / path).parent.mkdir(parents=True, exist_ok=True)
+        (target / path).write_text(content)
+    return target
+
+
+def test_prune_keeps_what_is_imported(installed):
+    slim.prune(str(installed))
+
+    assert installed_files(installed) == {
+        "package/__init__.py",
+        "package/core.py",
+        "package-1.0.dist-info/METADATA",
+        "package-1.0.dist-info/LICENSE.txt",
+        "package-1.0.dist-info/licenses/NOTICE",
+        # a top level package named like a pruned directory is a package
+        "docs/__init__.py",
+        "module.py",
+    }
+
+
+def test_compile_bytecode_beside_the_sources(installed):
+    slim.prune(str(installed))
+
+    slim.compile_bytecode(str(installed), sys.executable)
+
+    files = installed_files(installed)
+    assert "package/core.py" in files
+    assert any(
+        path.startswith("package/__pycache__/core.") and path.endswith(".pyc")
+        for path in files
+    )
+
+
+def test_compile_bytecode_in_place_of_the_sources(installed):
+    slim.prune(str(installed))
+
+    slim.compile_bytecode(str(installed), sys.executable, strip_sources=True)
+
+    files = installed_files(installed)
+    assert {"package/__init__.pyc", "package/core.pyc", "module.pyc"} <= files
+    assert not any(path.endswith(".py") for path in files)
+
+
+def test_package_sizes_by_top_level(installed):
+    sizes = slim.package_sizes(str(installed))
+
+    assert set(sizes) == {"package", "*.dist-info", "bin", "docs", "module"}
+    assert sizes["package"] == sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(installed / "package")
+        for name in names
+    )
+
+
+@pytest.mark.parametrize("strip_sources", [False, True])
+def test_a_slimmed_layer_still_imports(
+    fake_pip, layer_repository, tmp_path, strip_sources
+):
+    layer = layer_build(strip_sources=strip_sources)
+    result = build(layer, str(layer_repository), None)
+    assert result.succeeded, result.error
+
+    with zipfile.ZipFile(layer_repository / layer.output) as archive:
+        names = set(archive.namelist())
+        archive.extractall(tmp_path / "opt")
+
+    assert not any("/tests/" in name or name.endswith(".pyi") for name in names)
+    assert any(name.endswith(".py") for name in names) is not strip_sources
+    imported = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import tinyhttp, unused, common.helpers, tinyjson; "
+            + "print(tinyjson.dumps([1]))",
+        ],
+        env={**os.environ, "PYTHONPATH": str(tmp_path / "opt" / "python")},
+        # not the repository, whose common/ would be imported instead
+        cwd=str(tmp_path),
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    assert imported.stdout.strip() == "[1]"
+
+
+def test_a_layer_over_its_budget_fails_without_replacing_the_zip(
+    fake_pip, layer_repository
+):
+    output = layer_repository / "layers" / "test_layer.zip"
+    output.parent.mkdir()
+    output.write_bytes(b"the last good build")
+
+    result = build(layer_build(size_budget_mb=0.001), str(layer_repository), None)
+
+    assert not result.succeeded
+    assert "over its budget of 0.001 MB" in result.error
+    assert output.read_bytes() == b"the last good build"
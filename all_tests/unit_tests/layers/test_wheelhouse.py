@@ -0,0 +1,74 @@
+import zipfile
+
+from all_tests.pytest_utilities.layer_utilities import layer_build
+from layers.build_layers import WHEELHOUSE_DIRECTORY, build, build_all
+
+
+def test_wheels_are_downloaded_once_for_every_layer(
+    fake_pip, layer_repository, tmp_path
+):
+    cache = tmp_path / "cache"
+
+    build(layer_build(), str(layer_repository), str(cache))
+    downloaded = list(fake_pip.downloaded)
+    build(
+        layer_build(name="other_layer", output="layers/other_layer.zip"),
+        str(layer_repository),
+        str(cache),
+    )
+
+    assert sorted(downloaded) == [
+        "tinyhttp-1.0-py3-none-any.whl",
+        "tinyjson-1.0-py3-none-any.whl",
+        "unused-1.0-py3-none-any.whl",
+    ]
+    # the second layer found them all in the wheelhouse
+    assert fake_pip.downloaded == downloaded
+    wheelhouse = cache / WHEELHOUSE_DIRECTORY
+    assert sorted(path.name for path in wheelhouse.iterdir()) == sorted(downloaded)
+
+
+def test_the_install_reads_only_the_gathered_wheels(fake_pip, layer_repository):
+    build(layer_build(), str(layer_repository), None)
+
+    (install,) = fake_pip.runs("install")
+    assert "--no-index" in install
+    assert all("--find-links" not in run for run in fake_pip.runs("download"))
+
+
+def test_an_sdist_only_requirement_is_built_into_a_wheel(
+    fake_pip, layer_repository, tmp_path
+):
+    fake_pip.sdist_only["docopt"] = {"docopt.py": "def docopt(doc):\n    return {}\n"}
+    (layer_repository / "requirements.txt").write_text("tinyjson\ndocopt\n")
+
+    result = build(layer_build(), str(layer_repository), str(tmp_path / "cache"))
+
+    assert result.succeeded, result.error
+    assert len(fake_pip.runs("wheel")) == 1
+    with zipfile.ZipFile(layer_repository / "layers" / "test_layer.zip") as archive:
+        assert "python/docopt.py" in archive.namelist()
+    assert (
+        tmp_path / "cache" / WHEELHOUSE_DIRECTORY / "docopt-1.0-py3-none-any.whl"
+    ).exists()
+
+
+def test_layers_build_concurrently_and_a_failure_stops_no_other(
+    fake_pip, layer_repository, tmp_path
+):
+    (layer_repository / "broken.txt").write_text("nowhere\n")
+    layers = [
+        layer_build(name="first", output="layers/first.zip"),
+        layer_build(
+            name="broken", output="layers/broken.zip", requirements="broken.txt"
+        ),
+        layer_build(name="last", output="layers/last.zip"),
+    ]
+
+    results = build_all(layers, str(layer_repository), str(tmp_path / "cache"))
+
+    assert [result.layer for result in results] == ["first", "broken", "last"]
+    assert [result.succeeded for result in results] == [True, False, True]
+    assert (layer_repository / "layers" / "first.zip").exists()
+    assert (layer_repository / "layers" / "last.zip").exists()
+    assert not (layer_repository / "layers" / "broken.zip").exists()
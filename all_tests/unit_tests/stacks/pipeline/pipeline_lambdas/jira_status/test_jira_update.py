@@ -0,0 +1,212 @@
+import importlib
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from all_tests.pytest_utilities.codepipeline_utilities import codepipeline_event
+from common.aws.codepipeline import PipelineTokens
+from common.git_integration.git_client import GitClient
+from stacks.pipeline.pipeline_lambdas.jira_status import utilities
+from stacks.pipeline.pipeline_lambdas.jira_status.utilities import (
+    GitCommitHistory,
+    JiraUpdateProgress,
+    MassJiraUpdate,
+)
+
+# The cards of the git history, oldest commit first
+CARDS = [f"ABCD-{1000 + number}" for number in range(10)]
+NOT_FOUND = "ABCD-1002"
+BROKEN = "ABCD-1005"
+
+
+class FakeContext:
+    """
+    A lambda context whose remaining time drops by step_ms every time it is asked.
+    """
+
+    def __init__(self, remaining_ms: int, step_ms: int = 0):
+        self.remaining_ms = remaining_ms
+        self.step_ms = step_ms
+
+    def get_remaining_time_in_millis(self) -> int:
+        remaining = self.remaining_ms
+        self.remaining_ms -= self.step_ms
+        return remaining
+
+
+@pytest.fixture
+def jira(monkeypatch):
+    """
+    The cards of the git history (jira.cards) and the cards updated (jira.updated),
+    with no github or jira behind them. NOT_FOUND is not in jira, and updating BROKEN
+    fails.
+    """
+    state = SimpleNamespace(cards=list(CARDS), updated=[])
+
+    class FakeJira(MassJiraUpdate):
+        def __init__(self):
+            self.project = "ABCD"
+            self.cards_not_found = []
+            self.cards_error_out = []
+            self.cards_updated = []
+
+        def update_card_status(self, card, status, message=None):
+            if card == NOT_FOUND:
+                raise ValueError(f"JiraIssueNotFound-{card}")
+            if card == BROKEN:
+                raise RuntimeError("transition failed")
+            state.updated.append(card)
+            return True
+
+    monkeypatch.setattr(utilities, "MassJiraUpdate", FakeJira)
+    monkeypatch.setattr(GitClient, "__init__", lambda self, *args, **kwargs: None)
+    monkeypatch.setattr(
+        GitCommitHistory,
+        "_get_card_numbers",
+        lambda self, project_id, commit_sha=None: list(state.cards),
+    )
+    return state
+
+
+def time_for(cards: int):
+    """
+    Returns:
+        a should_continue that lets cards cards update, then stops the update.
+    """
+    checks = iter([True] * cards)
+    return lambda: next(checks, False)
+
+
+def invoke(token: dict, cards: int):
+    """
+    One invocation of the update, resumed from token (carried as CodePipeline carries
+    it, as json) with time for cards cards.
+
+    Returns:
+        (GitCommitHistory, JiraUpdateProgress)
+    """
+    history = GitCommitHistory()
+    token = json.loads(json.dumps(token)) if token is not None else None
+    progress = history.update_jira(
+        progress=JiraUpdateProgress.from_token(token), should_continue=time_for(cards)
+    )
+    return history, progress
+
+
+def test_progress_round_trips_through_its_token():
+    progress = JiraUpdateProgress(
+        offset=4, cards_not_found=[NOT_FOUND], cards_error_out=[BROKEN]
+    )
+
+    resumed = JiraUpdateProgress.from_token(json.loads(json.dumps(progress.as_token())))
+
+    assert resumed == progress
+
+
+def test_no_token_starts_at_the_first_card():
+    assert JiraUpdateProgress.from_token(None) == JiraUpdateProgress()
+
+
+def test_running_out_of_time_stops_mid_list(jira):
+    _, progress = invoke(None, cards=4)
+
+    assert not progress.complete
+    assert progress.offset == 4
+    assert jira.updated == ["ABCD-1000", "ABCD-1001", "ABCD-1003"]
+    assert progress.as_token() == {"offset": 4, "notFound": [NOT_FOUND], "errors": []}
+
+
+def test_resuming_from_the_token_updates_every_card_once(jira):
+    token, invocations = None, 0
+    while True:
+        history, progress = invoke(token, cards=3)
+        invocations += 1
+        if progress.complete:
+            break
+        token = progress.as_token()
+
+    assert invocations == 4
+    assert jira.updated == [card for card in CARDS if card not in (NOT_FOUND, BROKEN)]
+    assert progress.cards_not_found == [NOT_FOUND]
+    assert progress.cards_error_out == [BROKEN]
+    assert history.output_variables(progress) == {
+        "allCards": ",".join(CARDS),
+        "notFoundCards": NOT_FOUND,
+        "errorCards": BROKEN,
+        "successfulCards": ",".join(jira.updated),
+    }
+
+
+def test_cards_of_commits_made_since_the_token_are_updated_after_it(jira):
+    _, progress = invoke(None, cards=8)
+    jira.cards.append("ABCD-2000")
+
+    _, progress = invoke(progress.as_token(), cards=10)
+
+    assert progress.complete
+    assert progress.offset == 11
+    assert jira.updated[-3:] == ["ABCD-1008", "ABCD-1009", "ABCD-2000"]
+    assert len(jira.updated) == len(set(jira.updated))
+
+
+def test_an_update_with_time_for_every_card_is_complete(jira):
+    _, progress = invoke(None, cards=len(CARDS))
+
+    assert progress.complete
+    assert progress.offset == len(CARDS)
+
+
+def test_the_stop_logs_the_cards_remaining(jira, caplog):
+    invoke({"offset": 2, "notFound": [], "errors": []}, cards=3)
+
+    (stop,) = [
+        record
+        for record in caplog.records
+        if record.getMessage() == "Stopping before all cards were updated"
+    ]
+    assert (stop.processed, stop.remaining) == (3, 5)
+
+
+@pytest.fixture
+def jira_status_lambda(monkeypatch):
+    # the lambda imports utilities as the top level module of its own directory
+    monkeypatch.setitem(sys.modules, "utilities", utilities)
+    return importlib.import_module(
+        "stacks.pipeline.pipeline_lambdas.jira_status.jira_status_lambda"
+    )
+
+
+def test_the_job_continues_and_then_succeeds(jira, jira_status_lambda, stubbed_client):
+    token = '{"offset":4,"notFound":["ABCD-1002"],"errors":[]}'
+    stubbed_client.add_response(
+        "put_job_success_result", {}, {"jobId": "job-1", "continuationToken": token}
+    )
+    stubbed_client.add_response(
+        "put_job_success_result",
+        {},
+        {
+            "jobId": "job-1",
+            "outputVariables": {
+                "allCards": ",".join(CARDS),
+                "notFoundCards": NOT_FOUND,
+                "errorCards": BROKEN,
+                "successfulCards": ",".join(
+                    card for card in CARDS if card not in (NOT_FOUND, BROKEN)
+                ),
+            },
+        },
+    )
+
+    # time for 4 cards before the reserve is reached
+    reserve = jira_status_lambda.CONTINUATION_RESERVE_MS
+    jira_status_lambda.process_job(
+        PipelineTokens(codepipeline_event()), FakeContext(reserve + 4000, 1000)
+    )
+    jira_status_lambda.process_job(
+        PipelineTokens(codepipeline_event(continuation_token=token)),
+        FakeContext(reserve * 10),
+    )
+
+    assert jira.updated == [card for card in CARDS if card not in (NOT_FOUND, BROKEN)]
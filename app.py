@@ -1,59 +1,101 @@
 import aws_cdk as cdk
 from cdk_configs.default_tags import DefaultTags
-from cdk_configs.product_properties.common_props import DeploymentProperties
+from cdk_configs.product_properties.common_props import (
+    DeploymentProperties,
+    try_get_context,
+)
+from cdk_configs.product_properties.pipeline_and_deployment_props import (
+    ContextTag,
+    StackSelection,
+)
 from cdk_configs.resource_names import DeploymentResourceName
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
 from stacks.pipeline.pipeline_stack import Pipeline
 from stacks.product.product_stack import Product
 
 
-# Initializes the cdk app process
-app = cdk.App()
+def build_app(app: cdk.App) -> DeploymentProperties:
+    """
+    Adds the stacks to app, configured by its context (deploy_tag, use_prod, stacks,
+    ...). Kept apart from synthesizing so the same code builds apps for several
+    deployments in one process - see synth_matrix.py.
 
-props = DeploymentProperties(app)
+    Returns:
+        [DeploymentProperties] the properties the stacks were built with.
+    """
 
-default_tags = DefaultTags(deployment_properties=props)
+    # `-c profile_synth=True` or CDK_PROFILE_SYNTH=1 times each phase of the synth
+    if try_get_context(ContextTag.profile_synth, app):
+        SYNTH_PROFILER.enable()
 
+    with SYNTH_PROFILER.phase("DeploymentProperties"):
+        props = DeploymentProperties(app)
 
-####################################
-# Product Stack                    #
-####################################
+    with SYNTH_PROFILER.phase("DefaultTags"):
+        default_tags = DefaultTags(deployment_properties=props)
 
-product = Product(
-    app,
-    f"{props.prefix_tag()}-{DeploymentResourceName.MAIN_STACK}",
-    env=props.aws_environment,
-    deployment_properties=props,
-)
+    # `-c stacks=product` (or pipeline) builds only those stacks, and skips the lookups
+    # and construction work of the others. See StackSelection.
 
-default_tags.apply(product)
+    ####################################
+    # Product Stack                    #
+    ####################################
 
+    if StackSelection.PRODUCT in props.STACKS:
+        with SYNTH_PROFILER.phase("stack: Product"):
+            product = Product(
+                app,
+                f"{props.prefix_tag()}-{DeploymentResourceName.MAIN_STACK}",
+                env=props.aws_environment,
+                deployment_properties=props,
+            )
 
-####################################
-# Pipeline Stacks                  #
-####################################
+        default_tags.apply(product)
+
+    ####################################
+    # Pipeline Stacks                  #
+    ####################################
+
+    if StackSelection.PIPELINE in props.STACKS:
+        with SYNTH_PROFILER.phase("stack: Pipeline"):
+            pipeline = Pipeline(
+                app,
+                f"Pipeline-{props.prefix_tag()}",
+                env=props.aws_environment,
+                deployment_properties=props,
+            )
+
+        default_tags.apply(pipeline)
+
+    ####################################
+    # Tool Stacks                      #
+    ####################################
+
+    return props
+
+
+def print_deployment_properties(app: cdk.App, props: DeploymentProperties):
+    print("***Deployment Properties:")
+    print(f"   **deploy_tag:       {props.DEPLOYMENT_TAG}")
+    print(f"   **stacks:           {', '.join(sorted(props.STACKS))}")
+    print(f"   **naming prefix:    {props.prefix_tag()}")
+    print(f"   **user:             {props._user}")
+    print(f"   **commit_sha:       {props._commit_sha}")
+    print(f"   **prod_status:      {props.PROD_DEPLOYMENT}")
+    print(f"   **account:          {app.account}")
+    print(f"   **region:           {app.region}")
+    print(f"   **deployed at:      {props.DEPLOYMENT_DATE}")
 
-pipeline = Pipeline(
-    app,
-    f"Pipeline-{props.prefix_tag()}",
-    env=props.aws_environment,
-    deployment_properties=props,
-)
 
-default_tags.apply(pipeline)
+if __name__ == "__main__":
+    # Initializes the cdk app process
+    app = cdk.App()
+    props = build_app(app)
 
-####################################
-# Tool Stacks                      #
-####################################
+    # this is the actual magic here, it synths the stacks
+    with SYNTH_PROFILER.phase("app.synth()"):
+        assembly = app.synth()
 
-# this is the actual magic here, it synths the stacks
-app.synth()
+    print_deployment_properties(app, props)
 
-print("***Deployment Properties:")
-print(f"   **deploy_tag:       {props.DEPLOYMENT_TAG}")
-print(f"   **naming prefix:    {props.prefix_tag()}")
-print(f"   **user:             {props._user}")
-print(f"   **commit_sha:       {props._commit_sha}")
-print(f"   **prod_status:      {props.PROD_DEPLOYMENT}")
-print(f"   **account:          {app.account}")
-print(f"   **region:           {app.region}")
-print(f"   **deployed at:      {props.DEPLOYMENT_DATE}")
+    SYNTH_PROFILER.finish(assembly.directory)
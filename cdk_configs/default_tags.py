@@ -1,11 +1,13 @@
 from datetime import datetime
 
-import aws_cdk as cdk
-import git
 from cdk_configs.product_properties.common_props import (
     DeploymentProperties,
     ProductSetting,
 )
+from cdk_configs.utilities.git_metadata import git_metadata
+from cdk_configs.utilities.lazy import LazyModule
+
+cdk = LazyModule("aws_cdk")
 
 
 class DefaultTags(dict):
@@ -41,17 +43,14 @@ class DefaultTags(dict):
         self.environment = deployment_properties.DEPLOYMENT_TAG
         self.name_tag = deployment_properties.prefix_tag()
         self.product_name = ProductSetting.PRODUCT_TAG
-        self.repo = git.Repo(search_parent_directories=True)
-        try:
-            self.branch_name = self.repo.active_branch.name
-        except Exception:
-            self.branch_name = (
-                ProductSetting.GITHUB_MAIN_BRANCH
-                if deployment_properties.PROD_DEPLOYMENT
-                else ProductSetting.GITHUB_DEV_BRANCH
-            )
+        self.git = git_metadata()
+        self.branch_name = self.git.branch or (
+            ProductSetting.GITHUB_MAIN_BRANCH
+            if deployment_properties.PROD_DEPLOYMENT
+            else ProductSetting.GITHUB_DEV_BRANCH
+        )
 
-        self.commit_hash = self.repo.head.commit.hexsha
+        self.commit_hash = self.git.commit_sha
         deployment_properties._commit_hash = self.commit_hash
         self.deployed_by = deployment_properties._user
 
@@ -68,7 +67,8 @@ class DefaultTags(dict):
             "sa:project-url": f"{ProductSetting.GITHUB_ENTERPRISE_URL}/{ProductSetting.GITHUB_ORG}/{ProductSetting.GITHUB_REPO}",
             "sa:project-branch": self.branch_name,
             "sa:commit-sha": self.commit_hash,
-            "sa:commit-author": self.repo.head.commit.author.name.replace(",", "")
+            "sa:commit-author": (self.git.author or "")
+            .replace(",", "")
             .replace("\\", "")
             .replace("SAI", ""),
             "sa:deploy-datetime": self.props.DEPLOYMENT_DATE,
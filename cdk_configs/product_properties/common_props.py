@@ -2,17 +2,12 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 import os
 import getpass
-from typing import Any
-import git  # this is GitPython
-import aws_cdk.aws_ssm as ssm
-import aws_cdk.aws_ec2 as ec2
-import aws_cdk as cdk
-from constructs import Construct
-import aws_cdk.aws_secretsmanager as secretsmanager
+from typing import TYPE_CHECKING, Any
 from cdk_configs.product_properties.pipeline_and_deployment_props import (
     ContextTag,
     DeploymentTag,
     DeploymentSecretKey,
+    StackSelection,
 )
 from cdk_configs.product_properties.product_properties import (
     CommonProductProperties,
@@ -20,11 +15,27 @@ from cdk_configs.product_properties.product_properties import (
     ProductionProductProperties,
 )
 from cdk_configs.utilities.color import as_warning
-from datetime import datetime
-from dateutil.tz import UTC
-import boto3
+from cdk_configs.utilities.git_metadata import git_metadata
+from cdk_configs.utilities.lazy import LazyModule
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
+from datetime import datetime, timezone
 import json
-from uuid import uuid4
+
+if TYPE_CHECKING:
+    from constructs import Construct
+
+# ProductSetting and the other constants here are imported all over - aws_cdk and boto3
+# are only imported once DeploymentProperties needs them.
+ssm = LazyModule("aws_cdk.aws_ssm")
+ec2 = LazyModule("aws_cdk.aws_ec2")
+cdk = LazyModule("aws_cdk")
+secretsmanager = LazyModule("aws_cdk.aws_secretsmanager")
+boto3 = LazyModule("boto3")
+
+
+# Construct id of the VPC lookup in each stack. Keep it fixed - a changing id churns
+# the synthesized templates.
+VPC_LOOKUP_ID = "VPC-import"
 
 
 @dataclass(frozen=True)
@@ -94,6 +105,13 @@ class DeploymentProperties:
         USING_PRODUCTION_VALUES: [bool] - Are we pretending this env is production (or
             it is production)
         IS_TEST_ENV: [bool] - Is this an ephemeral Test Environment?
+        USE_JOB_WORKER: [bool] - Run the pipeline lambdas as scheduled job workers for
+            Custom actions instead of invoking them per action (-c use_job_worker=True)
+        UPDATE_PLACEMENTS: [bool] - Place new lambdas, API resources and codebuilds in
+            cdk_configs/partition_placement.json (-c update_placements=True), see
+            cdk_configs/utilities/partitions.py.
+        STACKS: [frozenset] - The StackSelection names of the stacks to build
+            (-c stacks=product), all of them by default.
         DEPLOYMENT_DATE - Date of the time this stacks resources were last deployed
         COMPLETE_DOMAIN_NAME - The combined domain name
 
@@ -103,8 +121,8 @@ class DeploymentProperties:
             for multi deployment separation.
             custom_prefix can be provided to add an additional prefix to the beginning
 
-        vpc():
-            sets up if not called yet and returns or just returns the vpc construct.
+        vpc(scope):
+            looks up the vpc for the stack scope is in, once per stack, and returns it.
 
         secret(key: str):
             If no secrets are retrieved yet will retrieve them, otherwise will it will
@@ -120,20 +138,29 @@ class DeploymentProperties:
     DEPLOYMENT_TAG: str = field(init=False)
     USING_PRODUCTION_VALUES: bool = field(init=False, default=False)
     IS_TEST_ENV: bool = field(init=False, default=False)
+    USE_JOB_WORKER: bool = field(init=False, default=False)
+    UPDATE_PLACEMENTS: bool = field(init=False, default=False)
+    STACKS: frozenset = field(init=False)
     DEPLOYMENT_DATE: str = field(init=False)
     COMPLETE_DOMAIN_NAME: str = field(init=False)
 
-    _vpc: ec2.Vpc = field(init=False, default=None)
+    _vpcs: dict = field(init=False, default_factory=dict)
     _user: str = field(init=False, default="CDK")
     _commit_sha: str = field(init=False, default=None)
-    _scope: Any = field(init=False, default=None)
     _secrets: dict = field(init=False, default=None)
     branch_name: str = field(init=False)
 
     def __post_init__(self):
         self.DEPLOYMENT_TAG = try_get_context(ContextTag.deploy_tag, self.app)
         self.PROD_DEPLOYMENT = try_get_context(ContextTag.is_prod, self.app)
-        self.DEPLOYMENT_DATE = datetime.now(tz=UTC).isoformat()
+        self.USE_JOB_WORKER = try_get_context(ContextTag.job_worker, self.app)
+        self.UPDATE_PLACEMENTS = try_get_context(
+            ContextTag.update_placements, self.app
+        )
+        self.STACKS = StackSelection.from_context(
+            try_get_context(ContextTag.stacks, self.app)
+        )
+        self.DEPLOYMENT_DATE = datetime.now(tz=timezone.utc).isoformat()
         self._get_commit_sha()
 
         if not self.PROD_DEPLOYMENT and self.DEPLOYMENT_TAG is not DeploymentTag.DEV:
@@ -158,18 +185,13 @@ class DeploymentProperties:
         if its a test env, sets the git commit sha (the first 7 digits) for use in
         telling test environments apart.
 
-        Note: This uses GitPython which works through the base .git folder. This means
-        that it *does* work in codebuilds IF the source made a proper git clone (even
-        a shallow one) as well as working in a local env.
-
-        However, using other methods than CodeBuild of synth-ing/deploying the product
-        this will not work and it would have to be passed into that stage by the
-        Pipeline Variables themselves
+        Note: This reads the base .git folder (see cdk_configs/utilities/git_metadata.py)
+        so it works in a local env and in codebuilds that made a proper git clone (even
+        a shallow one). Codebuilds without one fall back to the
+        CODEBUILD_RESOLVED_SOURCE_VERSION env variable.
         """
         if self.IS_TEST_ENV:
-            self._commit_sha = git.Repo(
-                search_parent_directories=True
-            ).head.commit.hexsha[:7]
+            self._commit_sha = git_metadata().short_sha
 
     def _compose_domain_name(self):
         """
@@ -216,29 +238,24 @@ class DeploymentProperties:
         else:
             self._user = "Pipeline"
 
-    def vpc(self, scope: Construct):
+    @SYNTH_PROFILER.timed("vpc lookup")
+    def vpc(self, scope: Construct) -> ec2.IVpc:
         """
-        Gets or if not yet been gotten, instantiates the VPC object. Expects there to be
-        a secret in the same account as this stack is deploying in named `deployment`
-        that contains a key named `vpc`
-
+        Gets the VPC (ProductSetting.VPC_ID) for the stack scope is in, looking it up
+        the first time that stack asks for it. Every later call from that stack, from
+        any of its constructs, gets the same object.
+
+        The lookup is made with a fixed id on the stack itself, so it is the same
+        between synths and its result is read from cdk.context.json once it is there
+        (`make context` fills it in ahead of time, see
+        cdk_configs/utilities/prefetch_context.py).
         """
-        try:
+        stack = cdk.Stack.of(scope)
+        stack_path = stack.node.path
 
-            already_defined = (
-                self._scope in scope.scopes if hasattr(scope, "scopes") else False
-            )
-        except Exception:
-            already_defined = False
-
-        # If vpc is none, then this has never been run so grab the vpc
-        # however, if scope is different than the last time, then we're going to want
-        # to re-look up the vpc information.
-        if self._vpc is None and not already_defined:
-            self._vpc = ec2.Vpc.from_lookup(
-                scope,
-                f"VPC-import-{uuid4()}",  # required to make sure logical ids dont overlap
-                vpc_id=ProductSetting.VPC_ID,
+        if stack_path not in self._vpcs:
+            self._vpcs[stack_path] = ec2.Vpc.from_lookup(
+                stack, VPC_LOOKUP_ID, vpc_id=ProductSetting.VPC_ID
             )
             # Note: If your Pipeline for prod uses Cross Account status, then you'll
             # want to add a conditional to the get_secrets call above in order to
@@ -247,10 +264,7 @@ class DeploymentProperties:
             # This part is a bit tricky as secrets and dealing with cross account actions
             # can become pretty funky.
 
-        # log the scope so we dont instantiate a from_lookup resource multiple times
-        # in the same stack
-        self._scope = scope
-        return self._vpc
+        return self._vpcs[stack_path]
 
     def prefix_tag(
         self,
@@ -282,6 +296,7 @@ class DeploymentProperties:
 
         return "-".join(prefixes)
 
+    @SYNTH_PROFILER.timed("secrets manager: deployment secret")
     def secret(
         self, secret_key: DeploymentSecretKey, default_value: str = "NoSecretDefault"
     ) -> str:
@@ -358,12 +373,25 @@ def try_get_context(key, app):
     defaults = {
         ContextTag.deploy_tag: DeploymentTag.LOCAL,
         ContextTag.is_prod: False,
+        ContextTag.job_worker: False,
+        ContextTag.profile_synth: False,
+        ContextTag.update_placements: False,
+        ContextTag.stacks: None,
         "user": None,
     }
 
     cdk_json_value = app.node.try_get_context(key)
 
-    if key is ContextTag.is_prod and cdk_json_value is not None:
+    if (
+        key
+        in (
+            ContextTag.is_prod,
+            ContextTag.job_worker,
+            ContextTag.profile_synth,
+            ContextTag.update_placements,
+        )
+        and cdk_json_value is not None
+    ):
         return True
 
     return cdk_json_value if cdk_json_value is not None else defaults.get(key)
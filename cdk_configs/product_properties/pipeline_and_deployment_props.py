@@ -14,6 +14,10 @@ class DeploymentFileLocation:
 class ContextTag:
     deploy_tag = "deploy_tag"
     is_prod = "use_prod"
+    job_worker = "use_job_worker"
+    profile_synth = "profile_synth"
+    stacks = "stacks"
+    update_placements = "update_placements"
 
 
 @dataclass(frozen=True)
@@ -31,6 +35,57 @@ class DeploymentTag:
     LOCAL = "LOCAL"
 
 
+@dataclass(frozen=True)
+class StackSelection:
+    """
+    Names of the top level stacks in app.py, for building only some of them with
+    `-c stacks=product` or `-c stacks=product,pipeline`. Without the context tag all of
+    them are built.
+
+    If a stack comes to need constructs or DeploymentProperties values from another,
+    list it in DEPENDENCIES so selecting it builds both.
+    """
+
+    PRODUCT = "product"
+    PIPELINE = "pipeline"
+
+    ALL = (PRODUCT, PIPELINE)
+    DEPENDENCIES = {PRODUCT: (), PIPELINE: ()}
+
+    @classmethod
+    def from_context(cls, value: str = None) -> frozenset:
+        """
+        Parameters:
+            value: [str] - the stacks context value, comma separated stack names.
+                None selects every stack.
+
+        Returns:
+            [frozenset] the selected stack names and everything they depend on.
+
+        Raises:
+            ValueError if a name is not one of StackSelection.ALL.
+        """
+        if value is None:
+            return frozenset(cls.ALL)
+
+        requested = [name.strip().lower() for name in str(value).split(",")]
+        unknown = [name for name in requested if name not in cls.ALL]
+        if unknown:
+            raise ValueError(
+                f"Unknown stacks in -c {ContextTag.stacks}={value}, "
+                + f"expected a comma separated list of: {', '.join(cls.ALL)}"
+            )
+
+        selected = set()
+        while requested:
+            name = requested.pop()
+            if name not in selected:
+                selected.add(name)
+                requested.extend(cls.DEPENDENCIES[name])
+
+        return frozenset(selected)
+
+
 @dataclass(frozen=True)
 class DeploymentSecretKey:
     """
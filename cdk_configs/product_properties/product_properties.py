@@ -1,6 +1,10 @@
+from __future__ import annotations
 from dataclasses import dataclass
-import aws_cdk as cdk
-from aws_cdk import aws_logs as logs
+from cdk_configs.utilities.lazy import LazyModule, deferred
+
+# aws_cdk is only imported once a config class props() resolves these values
+cdk = LazyModule("aws_cdk")
+logs = LazyModule("aws_cdk.aws_logs")
 
 ########################################################################################
 #
@@ -45,9 +49,13 @@ class ProductionProductProperties:
     S3_LIFECYCLE_DURATION: int = 90
 
     # PROD_DEPLOYMENT must be true in order to set these:
-    S3_REMOVAL_POLICY: cdk.RemovalPolicy = cdk.RemovalPolicy.RETAIN
-    DYNAMO_REMOVAL_POLICY: cdk.RemovalPolicy = cdk.RemovalPolicy.SNAPSHOT
-    LOG_GROUP_RETENTION: logs.RetentionDays = logs.RetentionDays.ONE_MONTH
+    S3_REMOVAL_POLICY: cdk.RemovalPolicy = deferred(lambda: cdk.RemovalPolicy.RETAIN)
+    DYNAMO_REMOVAL_POLICY: cdk.RemovalPolicy = deferred(
+        lambda: cdk.RemovalPolicy.SNAPSHOT
+    )
+    LOG_GROUP_RETENTION: logs.RetentionDays = deferred(
+        lambda: logs.RetentionDays.ONE_MONTH
+    )
     DOMAIN_NAME = "msp0099.stateauto.com"
 
 
@@ -58,7 +66,11 @@ class DevProductProperties:
     """
 
     S3_LIFECYCLE_DURATION: int = 7
-    S3_REMOVAL_POLICY: cdk.RemovalPolicy = cdk.RemovalPolicy.DESTROY
-    DYNAMO_REMOVAL_POLICY: cdk.RemovalPolicy = cdk.RemovalPolicy.DESTROY
-    LOG_GROUP_RETENTION: logs.RetentionDays = logs.RetentionDays.ONE_WEEK
+    S3_REMOVAL_POLICY: cdk.RemovalPolicy = deferred(lambda: cdk.RemovalPolicy.DESTROY)
+    DYNAMO_REMOVAL_POLICY: cdk.RemovalPolicy = deferred(
+        lambda: cdk.RemovalPolicy.DESTROY
+    )
+    LOG_GROUP_RETENTION: logs.RetentionDays = deferred(
+        lambda: logs.RetentionDays.ONE_WEEK
+    )
     DOMAIN_NAME = "msd0099.stateauto.com"
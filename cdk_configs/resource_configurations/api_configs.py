@@ -5,11 +5,15 @@ from cdk_configs.resource_configurations.constructs import (
 )
 from cdk_configs.resource_names import ProductApiName, ProductLambdaName
 from cdk_configs.resource_configurations.common_configs import NoCommonConfigs
+from cdk_configs.utilities.lazy import LazyModule, deferred
+
+cdk = LazyModule("aws_cdk")
 
 PRODUCT_REST_API = RestApiConfigs(
     common=NoCommonConfigs,
     rest_api_name=ProductApiName.API_NAME,
     retain_deployments=True,
+    min_compression_size=deferred(lambda: cdk.Size.kibibytes(1)),
 )
 
 PRODUCT_API_VERSIONS = {
@@ -18,6 +22,11 @@ PRODUCT_API_VERSIONS = {
     )
 }
 
+# Versions deployed before each version's routes had a scope of their own, which keep
+# their logical ids - see ApiVersionRoutes in stacks/product/nested_stacks/api_stack.py.
+# Do not add new versions here.
+UNSCOPED_API_VERSIONS = {ProductApiName.VERSION_ONE}
+
 # These methods will be deployed on each version
 PRODUCT_API_RESOURCES = {
     ProductApiName.HELLO_RESOURCE: {
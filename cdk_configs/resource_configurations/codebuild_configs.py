@@ -1,9 +1,8 @@
-import aws_cdk as cdk
-from aws_cdk import aws_logs as logs
 from cdk_configs.product_properties.pipeline_and_deployment_props import (
     DeploymentFileLocation,
     ContextTag,
     DeploymentTag,
+    StackSelection,
 )
 from cdk_configs.resource_names import DeploymentResourceName
 from cdk_configs.resource_configurations.constructs import (
@@ -16,6 +15,9 @@ from cdk_configs.resource_configurations.common_configs import (
     PipelineCodebuildConfigs,
     NoCommonConfigs,
 )
+from cdk_configs.utilities.lazy import LazyModule, deferred
+
+cdk = LazyModule("aws_cdk")
 
 
 PIPELINE_CODEBUILDS = {
@@ -63,6 +65,7 @@ PIPELINE_CODEBUILDS = {
             STACK_TO_DEPLOY=DeploymentResourceName.MAIN_STACK,
             DEPLOYMENT_TAG=f"-c {ContextTag.deploy_tag}={DeploymentTag.DEV}",
             USE_PROD_VALUES="",  # Set in CDK
+            STACK_SELECTION=f"-c {ContextTag.stacks}={StackSelection.PRODUCT}",
         ),
     ),
     DeploymentResourceName.DEPLOY_ADHOC: CodebuildConfigs(
@@ -76,6 +79,7 @@ PIPELINE_CODEBUILDS = {
             STACK_TO_DEPLOY=DeploymentResourceName.MAIN_STACK,
             DEPLOYMENT_TAG=f"-c {ContextTag.deploy_tag}={DeploymentTag.TEST}",
             USE_PROD_VALUES=None,
+            STACK_SELECTION=f"-c {ContextTag.stacks}={StackSelection.PRODUCT}",
         ),
     ),
     DeploymentResourceName.DESTROY_ADHOC: CodebuildConfigs(
@@ -89,11 +93,13 @@ PIPELINE_CODEBUILDS = {
             STACK_TO_DEPLOY=DeploymentResourceName.MAIN_STACK,
             DEPLOYMENT_TAG=f"-c {ContextTag.deploy_tag}={DeploymentTag.TEST}",
             USE_PROD_VALUES=None,
+            STACK_SELECTION=f"-c {ContextTag.stacks}={StackSelection.PRODUCT}",
         ),
     ),
 }
 
 
 PIPELINE_CODEBUILD_LOG_GROUP = LogGroupConfigs(
-    common=NoCommonConfigs, removal_policy=cdk.RemovalPolicy.DESTROY
+    common=NoCommonConfigs,
+    removal_policy=deferred(lambda: cdk.RemovalPolicy.DESTROY),
 )
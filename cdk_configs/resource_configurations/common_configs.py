@@ -1,12 +1,14 @@
 from dataclasses import dataclass
-from aws_cdk import aws_lambda
-from aws_cdk import aws_dynamodb as dynamodb
-from aws_cdk import aws_s3 as s3
-import aws_cdk as cdk
-from aws_cdk import aws_codebuild as codebuild
-from aws_cdk import aws_apigateway as apigateway
+from cdk_configs.utilities.lazy import LazyModule, deferred, resolve
 from common.aws.dynamodb.constants import KeyName
 
+# aws_cdk is only imported once a value is used, see cdk_configs/utilities/lazy.py
+aws_lambda = LazyModule("aws_cdk.aws_lambda")
+dynamodb = LazyModule("aws_cdk.aws_dynamodb")
+cdk = LazyModule("aws_cdk")
+codebuild = LazyModule("aws_cdk.aws_codebuild")
+apigateway = LazyModule("aws_cdk.aws_apigateway")
+
 
 #######################################################################################
 #                                                                                     #
@@ -28,12 +30,20 @@ class CommonCDKConfigs:
     """
     Child classes of this must implement the same property names as the Construct they
     are representing.
+
+    cdk values should be wrapped in deferred() so that they are not built (and aws_cdk
+    is not imported) until props() is called.
     """
 
     @classmethod
-    def props(cls) -> dict:
+    def props(cls, resolve_values: bool = True) -> dict:
+        """
+        Parameters:
+            resolve_values: [bool][OPTIONAL] - Default True. False leaves deferred values
+                unbuilt, for DynamicCDKConfigs to build when its own props() is called.
+        """
         return {
-            key: value
+            key: resolve(value) if resolve_values else value
             for key, value in cls.__dict__.items()
             if value is not None and (not key.startswith("_" or key.startswith("x_")))
         }
@@ -55,42 +65,65 @@ class NoCommonConfigs(CommonCDKConfigs):
 #   lambdas. Shouldn't be needed directly in the cdk stacks, but rather utilized      #
 #   through one of the DynamicCDKConfigs child classes                                  #
 #                                                                                     #
-#   all children must implement runtime, timeout, and memory                          #
+#   all children must implement runtime, timeout, memory, and architecture            #
 #                                                                                     #
 #######################################################################################
 
 
+class LambdaArchitecture:
+    """
+    The names of the aws_lambda.Architecture values. Lambdas and layers are configured
+    with these rather than with the cdk values (see LambdaFunctionConfigs), so that a
+    lambda's layers can be checked against it - and layers/build_layers.py can build a
+    layer for its architectures - without importing aws_cdk.
+    """
+
+    X86_64 = "x86_64"
+    ARM_64 = "arm64"
+
+
 @dataclass(frozen=True)
 class PipelineLambdaFunctionConfigs(CommonCDKConfigs):
-    runtime = aws_lambda.Runtime.PYTHON_3_9
-    timeout = cdk.Duration.minutes(2)
+    runtime = deferred(lambda: aws_lambda.Runtime.PYTHON_3_9)
+    timeout = deferred(lambda: cdk.Duration.minutes(2))
     memory_size = 1024
+    architecture = LambdaArchitecture.X86_64
 
 
 @dataclass(frozen=True)
 class ProductLambdaFunctionConfigs(CommonCDKConfigs):
-    runtime = aws_lambda.Runtime.PYTHON_3_9
-    timeout = cdk.Duration.seconds(30)
+    runtime = deferred(lambda: aws_lambda.Runtime.PYTHON_3_9)
+    timeout = deferred(lambda: cdk.Duration.seconds(30))
     memory_size = 2048
+    # A lambda can opt in to Graviton (LambdaArchitecture.ARM_64, the same memory and so
+    # cpu for about 20% less per GB-second) with its own architecture, once its layers
+    # list ARM_64 too.
+    architecture = LambdaArchitecture.X86_64
 
 
 #######################################################################################
 #                                                                                     #
 #   Specific types of Lambda Layer Properties                                         #
 #                                                                                     #
-#   all children must implement compatible_runtimes                                   #
+#   all children must implement compatible_runtimes and compatible_architectures      #
 #                                                                                     #
 #######################################################################################
 
 
 @dataclass(frozen=True)
 class PipelineLayerConfigs(CommonCDKConfigs):
-    compatible_runtimes = [aws_lambda.Runtime.PYTHON_3_9]
+    compatible_runtimes = [deferred(lambda: aws_lambda.Runtime.PYTHON_3_9)]
+    # its packages include compiled ones (cryptography, pynacl)
+    compatible_architectures = [LambdaArchitecture.X86_64]
 
 
 @dataclass(frozen=True)
 class ProductLayerConfigs(CommonCDKConfigs):
-    compatible_runtimes = [aws_lambda.Runtime.PYTHON_3_9]
+    compatible_runtimes = [deferred(lambda: aws_lambda.Runtime.PYTHON_3_9)]
+    # the one it is built for. Add ARM_64 for lambdas that opt in to it - only a pure
+    # python layer runs on both, and layers/build_layers.py fails the build of a layer
+    # with more than one that has compiled packages
+    compatible_architectures = [LambdaArchitecture.X86_64]
 
 
 #######################################################################################
@@ -104,8 +137,10 @@ class ProductLayerConfigs(CommonCDKConfigs):
 
 @dataclass(frozen=True)
 class PipelineCodebuildConfigs(CommonCDKConfigs):
-    environment = codebuild.BuildEnvironment(
-        build_image=codebuild.LinuxBuildImage.STANDARD_5_0
+    environment = deferred(
+        lambda: codebuild.BuildEnvironment(
+            build_image=codebuild.LinuxBuildImage.STANDARD_5_0
+        )
     )
 
 
@@ -120,11 +155,17 @@ class PipelineCodebuildConfigs(CommonCDKConfigs):
 
 @dataclass(frozen=True)
 class ProductDynamoDbConfigs(CommonCDKConfigs):
-    billing_mode = dynamodb.BillingMode.PAY_PER_REQUEST
-    partition_key = dynamodb.Attribute(
-        name=KeyName.PARTITION, type=dynamodb.AttributeType.STRING
+    billing_mode = deferred(lambda: dynamodb.BillingMode.PAY_PER_REQUEST)
+    partition_key = deferred(
+        lambda: dynamodb.Attribute(
+            name=KeyName.PARTITION, type=dynamodb.AttributeType.STRING
+        )
+    )
+    sort_key = deferred(
+        lambda: dynamodb.Attribute(
+            name=KeyName.SORT, type=dynamodb.AttributeType.STRING
+        )
     )
-    sort_key = dynamodb.Attribute(name=KeyName.SORT, type=dynamodb.AttributeType.STRING)
 
 
 # No common S3 configs object because most configs are deployment env based and best set
@@ -139,13 +180,17 @@ ProductS3BucketConfigs = NoCommonConfigs
 #######################################################################################
 
 
-json_200_method_response = apigateway.MethodResponse(
-    status_code="200",
-    response_models={"application/json": apigateway.Model.EMPTY_MODEL},
+json_200_method_response = deferred(
+    lambda: apigateway.MethodResponse(
+        status_code="200",
+        response_models={"application/json": apigateway.Model.EMPTY_MODEL},
+    )
 )
 
-json_200_integration_response = apigateway.IntegrationResponse(
-    status_code="200",
-    content_handling=apigateway.ContentHandling.CONVERT_TO_TEXT,
-    response_templates={"application/json": """$input.path('$.body')\n"""},
+json_200_integration_response = deferred(
+    lambda: apigateway.IntegrationResponse(
+        status_code="200",
+        content_handling=apigateway.ContentHandling.CONVERT_TO_TEXT,
+        response_templates={"application/json": """$input.path('$.body')\n"""},
+    )
 )
@@ -1,15 +1,10 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
-from aws_cdk import aws_lambda
-import aws_cdk as cdk
-from aws_cdk import aws_logs as logs
-from aws_cdk import aws_iam as iam
-from aws_cdk import aws_codebuild as codebuild
-from aws_cdk import aws_dynamodb as dynamodb
-from aws_cdk import aws_s3 as s3
-from aws_cdk import aws_apigateway as apigateway
+import copy
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
 from cdk_configs.resource_configurations.common_configs import (
     CommonCDKConfigs,
+    LambdaArchitecture,
     json_200_integration_response,
     json_200_method_response,
 )
@@ -27,10 +22,51 @@ from cdk_configs.product_properties.environment_variables import (
     EnvTagSelector,
     EnvironmentVariables,
 )
+from cdk_configs.utilities.lazy import LazyModule, deferred, resolve
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
 from common.constants.environment import Environment
 from pathlib import Path
 import os
 
+# aws_cdk is only imported once props() builds a construct's properties, see
+# cdk_configs/utilities/lazy.py
+aws_lambda = LazyModule("aws_cdk.aws_lambda")
+cdk = LazyModule("aws_cdk")
+logs = LazyModule("aws_cdk.aws_logs")
+iam = LazyModule("aws_cdk.aws_iam")
+ec2 = LazyModule("aws_cdk.aws_ec2")
+codebuild = LazyModule("aws_cdk.aws_codebuild")
+dynamodb = LazyModule("aws_cdk.aws_dynamodb")
+s3 = LazyModule("aws_cdk.aws_s3")
+apigateway = LazyModule("aws_cdk.aws_apigateway")
+
+# Where layers/bundles.py puts the dependency bundle of each lambda, under the directory
+# its code is in
+DEPENDENCY_BUNDLE_DIRECTORY = "bundles"
+
+LAMBDA_ARCHITECTURES = (LambdaArchitecture.X86_64, LambdaArchitecture.ARM_64)
+
+
+def lambda_architecture(name: str) -> aws_lambda.Architecture:
+    """
+    Returns:
+        [aws_cdk.aws_lambda.Architecture] the architecture of a LambdaArchitecture name.
+    """
+    return {
+        LambdaArchitecture.X86_64: aws_lambda.Architecture.X86_64,
+        LambdaArchitecture.ARM_64: aws_lambda.Architecture.ARM_64,
+    }[name]
+
+
+def _check_architectures(resource_name: str, architectures: List[str]):
+    unknown = [name for name in architectures if name not in LAMBDA_ARCHITECTURES]
+    if unknown or not architectures:
+        raise ValueError(
+            f"Unknown architecture {unknown} for {resource_name}. "
+            + f"Use one of {LAMBDA_ARCHITECTURES} (see LambdaArchitecture)"
+        )
+
+
 #######################################################################################
 #                                                                                     #
 #   Parent classes for common (non changing between resource) cdk properties and      #
@@ -51,6 +87,12 @@ class DynamicCDKConfigs:
     If it does not apply to a given child, then in the __post_init__ of said child, set
     self._base_directory_set=True to bypass this requirement.
 
+    props() never changes the config itself: children apply their deployment specific
+    values to a copy (see _props_for) and return a new read only mapping, memoized on
+    the arguments. So the same config can build resources for any number of stacks and
+    deployments in one process. Children whose props hold something that binds to the
+    first stack using it (an AssetCode) set _memoize_props = False.
+
     It exists in this parent class to prevent repeated boiler plate code that is needed
     for many different resource types that do have to have an asset location'
 
@@ -60,15 +102,30 @@ class DynamicCDKConfigs:
 
     Internal class variables prefixed with `_` in the tradition of python as "Private"
     will also be ignored.
+
+    Values may be deferred() (see cdk_configs/utilities/lazy.py) so that aws_cdk is not
+    imported with the config modules - props() builds them.
     """
 
     common: Union[CommonCDKConfigs, dict]
-    _necessary_values_set: Path = field(init=False)
+    _necessary_values_set: bool = field(init=False, default=False)
+    _props_cache: dict = field(
+        init=False, default_factory=dict, repr=False, compare=False
+    )
+    _memoize_props = True  # not annotated - a class setting, not a dataclass field
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Times every props() call of each child class when profiling a synth.
+        """
+        super().__init_subclass__(**kwargs)
+        if "props" in cls.__dict__:
+            cls.props = SYNTH_PROFILER.timed(f"props: {cls.__name__}")(cls.props)
 
     def __post_init__(self):
         try:
             if not isinstance(self.common, dict):
-                self.common = self.common.props()
+                self.common = self.common.props(resolve_values=False)
 
             if not isinstance(self.common, dict):
                 raise Exception()
@@ -86,10 +143,10 @@ class DynamicCDKConfigs:
             + "method or has no need to implement it."
         )
 
-    def props(self) -> dict:
+    def props(self) -> MappingProxyType:
         """
-        Returns a dictionary of properties for a given Resource type. Can then be used
-        in CDK resource instantiation like:
+        Returns a read only mapping of properties for a given Resource type. Can then be
+        used in CDK resource instantiation like:
             resource = aws_cdk.SomeResource(
                 scope,
                 logical_id,
@@ -103,16 +160,47 @@ class DynamicCDKConfigs:
                 + "before or during calling props()"
             )
 
-        return {
-            **{
-                key: value
-                for key, value in self.__dict__.items()
-                if value is not None
-                and (not key.startswith("_") and not key.startswith("x_"))
-                and key != "common"
-            },
-            **self.common,
-        }
+        return MappingProxyType(
+            {
+                **{
+                    key: resolve(value)
+                    for key, value in self.__dict__.items()
+                    if value is not None
+                    and (not key.startswith("_") and not key.startswith("x_"))
+                    and key != "common"
+                },
+                **resolve(self.common),
+            }
+        )
+
+    def _props_for(self, *args, **kwargs) -> MappingProxyType:
+        """
+        Returns the props() of a copy of this config updated with
+        update_with_deployment_specific_values(*args, **kwargs), leaving this config as
+        it is. Memoized on the arguments when they can be hashed (lists are treated as
+        tuples), so the same arguments give back the same mapping.
+        """
+        key = _props_cache_key(args, kwargs) if self._memoize_props else None
+        if key is not None and key in self._props_cache:
+            return self._props_cache[key]
+
+        config = copy.copy(self)
+        config.update_with_deployment_specific_values(*args, **kwargs)
+        result = DynamicCDKConfigs.props(config)
+
+        if key is not None:
+            self._props_cache[key] = result
+        return result
+
+    def resource_count(self) -> int:
+        """
+        Returns:
+            [int] how many CloudFormation resources the construct built from this
+            config adds to its stack. Used to spread configs over nested stacks, see
+            cdk_configs/utilities/partitions.py. Children that build more than one
+            resource override it.
+        """
+        return 1
 
     def _prefix_name(self, prefix: str):
         """
@@ -125,6 +213,21 @@ class DynamicCDKConfigs:
                 break
 
 
+def _props_cache_key(args: tuple, kwargs: dict):
+    """
+    A hashable key for props() arguments, or None if one of them cannot be hashed.
+    """
+    key = tuple(tuple(arg) if isinstance(arg, list) else arg for arg in args) + tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(kwargs.items())
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 #######################################################################################
 #                                                                                     #
 #   Specific Resource types dynamic properties, such as name, code locations, ect.    #
@@ -156,11 +259,20 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
         location: [str] In the nature of an import path of the directory, handler file, and
             handler:
                 i.e. "this_and_that_lambda.this_lambda.lambda_handler
+        architecture: [str][OPTIONAL] - a LambdaArchitecture name to run this lambda on,
+            in place of the one of its common properties (x86_64 if neither has one).
+            Its layers must be compatible with it, see check_layers().
 
         x_link_to_dynamo: [bool] - Flag to tell the CDK stack to link to the dynamos provided
             n update_with_deployment_specific_values and for use in loops in CDK
         x_link_to_bucket: [bool] - Flag to tell the CDK stack to link to the buckets provided
             n update_with_deployment_specific_values and for use in loops in CDK
+        x_dependency_bundle: [bool] - Flag to tell the CDK stack to give this lambda a
+            layer of only the dependencies its handler imports (built by
+            layers/bundles.py, see LambdaLayerConfigs.for_bundle) instead of the shared
+            layers.
+        vpc: [aws_cdk.aws_ec2.IVpc] - set through props(vpc=...) for lambdas that run in
+            a vpc.
 
 
     NOTE: these are convenience flags if there are many lambdas to attach to the same
@@ -182,24 +294,70 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
             base_directory:Path,
             name_prefix: str,
             dynamodbs: List[aws_cdk.aws_dynamodb.Table],
-            buckets: List[aws_cdk.aws_s3.Bucket] )
+            buckets: List[aws_cdk.aws_s3.Bucket],
+            vpc: aws_cdk.aws_ec2.IVpc )
 
             configures this lambda for the particular environment it will be deployed too.
     """
 
     function_name: str
     location: str
+    architecture: Union[str, aws_lambda.Architecture] = field(default=None)
     x_link_to_dynamo: bool = field(default=False)
     x_link_to_bucket: bool = field(default=False)
+    x_dependency_bundle: bool = field(default=False)
     handler: str = field(init=False)
     code: str = field(init=False)
     environment: Dict[str, str] = field(init=False, default_factory=dict)
+    vpc: ec2.IVpc = field(init=False, default=None)
     _common_name: str = field(init=False, default="")
+    # a new AssetCode per props() call, one can only be used in the stack it is bound to
+    _memoize_props = False
 
     def __post_init__(self):
         super().__post_init__()
         self._common_name = self.function_name
 
+        # common's architecture is the default of this one, rather than overriding it
+        self.common = dict(self.common)
+        common_architecture = self.common.pop("architecture", None)
+        self.architecture = (
+            self.architecture or common_architecture or LambdaArchitecture.X86_64
+        )
+        _check_architectures(self.function_name, [self.architecture])
+
+    def resource_count(self, in_vpc: bool = False) -> int:
+        """
+        The function, its service role and the role's default policy (made for the
+        grants and the vpc access), a security group when it runs in a vpc, and the
+        layer of its dependency bundle when it has one.
+
+        Parameters:
+            in_vpc: [bool] - the function is given a vpc.
+        """
+        return 3 + int(in_vpc) + int(self.x_dependency_bundle)
+
+    def check_layers(self, layer_configs: List[LambdaLayerConfigs]):
+        """
+        Parameters:
+            layer_configs: [List[LambdaLayerConfigs]] - the layers this lambda is given.
+
+        Raises:
+            ValueError if a layer is not compatible with this lambda's architecture - a
+            layer with compiled packages built for another one fails on import, not on
+            deploy.
+        """
+        mismatched = [
+            f"{layer.layer_version_name} {layer.compatible_architectures}"
+            for layer in layer_configs
+            if self.architecture not in layer.compatible_architectures
+        ]
+        if mismatched:
+            raise ValueError(
+                f"Lambda {self.function_name} runs on {self.architecture} but its "
+                + f"layers are not compatible with it: {', '.join(mismatched)}"
+            )
+
     def props(
         self,
         base_directory: Path,
@@ -207,7 +365,8 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
         prod_deployment: bool = False,
         dynamodbs: List[dynamodb.Table] = list(),
         buckets: List[s3.Bucket] = list(),
-    ) -> dict:
+        vpc: ec2.IVpc = None,
+    ) -> MappingProxyType:
         """
         Parameters:
             base_directory: [Path] - A Path or Path Like object for the location of the
@@ -219,6 +378,8 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
                 to this Lambda's environment variables.
             buckets: List[aws_cdk.aws_s3.Bucket] - a list of all Buckets to attach to
                 this Lambda's environment variables
+            vpc: [aws_cdk.aws_ec2.IVpc][OPTIONAL] - the vpc to run this Lambda in.
+                DeploymentProperties.vpc(scope) gets the one for a stack.
 
 
         Raises:
@@ -226,10 +387,9 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
             ValueError if x_link_to_dynamo is True but no tables passed
             ValueError if x_link_to_bucket is True but no buckets passed
         """
-        self.update_with_deployment_specific_values(
-            base_directory, name_prefix, prod_deployment, dynamodbs, buckets
+        return self._props_for(
+            base_directory, name_prefix, prod_deployment, dynamodbs, buckets, vpc
         )
-        return super().props()
 
     def update_with_deployment_specific_values(
         self,
@@ -238,6 +398,7 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
         prod_deployment: bool = False,
         dynamodbs: List[dynamodb.Table] = list(),
         buckets: List[s3.Bucket] = list(),
+        vpc: ec2.IVpc = None,
     ):
         """
         Parameters:
@@ -250,6 +411,7 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
                 to this Lambda's environment variables.
             buckets: List[aws_cdk.aws_s3.Bucket] - a list of all Buckets to attach to
                 this Lambda's environment variables
+            vpc: [aws_cdk.aws_ec2.IVpc][OPTIONAL] - the vpc to run this Lambda in.
 
 
         Raises:
@@ -262,6 +424,7 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
         )
 
         self._prefix_name(name_prefix)
+        self.vpc = vpc
 
         location_parts = self.location.split(".")
         if len(location_parts) == 0:
@@ -275,6 +438,7 @@ class LambdaFunctionConfigs(DynamicCDKConfigs):
         self.code = aws_lambda.AssetCode(
             os.path.join(base_directory, location_parts[0])
         )
+        self.architecture = lambda_architecture(self.architecture)
 
         # clean up these to None so the .props() parent method does not output them
         self.location = None
@@ -389,6 +553,10 @@ class LambdaLayerConfigs(DynamicCDKConfigs):
         layer_version_name [str]: Name of this layer.
         description [str]: a short description of this layer.
         code [Path]: the directory path to the layer zip.
+        compatible_architectures [List[str]][OPTIONAL]: the LambdaArchitecture names of
+            the lambdas that can use this layer, in place of the ones of its common
+            properties (x86_64 if neither has them). layers/build_layers.py builds the
+            layer for the first.
 
     Methods
         props() (from parent):
@@ -399,10 +567,25 @@ class LambdaLayerConfigs(DynamicCDKConfigs):
     layer_version_name: str
     description: str
     code: Union[Path, aws_lambda.AssetCode]
+    compatible_architectures: List[Union[str, aws_lambda.Architecture]] = field(
+        default=None
+    )
+    # a new AssetCode per props() call, one can only be used in the stack it is bound to
+    _memoize_props = False
 
     def __post_init__(self):
         super().__post_init__()
 
+        # common's architectures are the default of these, rather than overriding them
+        self.common = dict(self.common)
+        common_architectures = self.common.pop("compatible_architectures", None)
+        self.compatible_architectures = list(
+            self.compatible_architectures
+            or common_architectures
+            or [LambdaArchitecture.X86_64]
+        )
+        _check_architectures(self.layer_version_name, self.compatible_architectures)
+
     def update_with_deployment_specific_values(
         self, base_directory: Path, name_prefix: str
     ):
@@ -420,17 +603,37 @@ class LambdaLayerConfigs(DynamicCDKConfigs):
         if not isinstance(self.code, aws_lambda.AssetCode):
             self.code = aws_lambda.AssetCode(os.path.join(base_directory, self.code))
 
+        self.compatible_architectures = [
+            lambda_architecture(name) for name in self.compatible_architectures
+        ]
+
         self._necessary_values_set = True
 
-    def props(self, base_directory: Path, name_prefix: str) -> dict:
+    def props(self, base_directory: Path, name_prefix: str) -> MappingProxyType:
         """
         Parameters:
             base_directory: A Path or Path Like object for the location of the
             layer zip.
             name_prefix: [str] - The resource name prefixed with the deployment values.
         """
-        self.update_with_deployment_specific_values(base_directory, name_prefix)
-        return super().props()
+        return self._props_for(base_directory, name_prefix)
+
+    def for_bundle(self, function_name: str) -> LambdaLayerConfigs:
+        """
+        Parameters:
+            function_name: [str] - the name of a lambda with x_dependency_bundle, its key
+                in PRODUCT_LAMBDAS or PIPELINE_LAMBDAS.
+
+        Returns:
+            [LambdaLayerConfigs] a layer like this one made from the lambda's dependency
+            bundle, bundles/<function_name>.zip in the same base_directory.
+        """
+        return replace(
+            self,
+            layer_version_name=f"{function_name}-Dependencies",
+            description=f"The dependencies {function_name} imports",
+            code=os.path.join(DEPENDENCY_BUNDLE_DIRECTORY, f"{function_name}.zip"),
+        )
 
 
 ##########################################
@@ -487,7 +690,7 @@ class CodebuildConfigs(DynamicCDKConfigs):
         name_prefix: str,
         use_prod_values: bool = False,
         cross_account: bool = False,
-    ) -> dict:
+    ) -> MappingProxyType:
         """
         Parameters:
             log_group: [aws_logs.LogGroup] the log group to assign to this codebuild.
@@ -497,10 +700,9 @@ class CodebuildConfigs(DynamicCDKConfigs):
                 in the DeploymentProperties.USING_PROD_VALUES value.
             cross_account: [bool] - If this deployment is a cross account deployment or not.
         """
-        self.update_with_deployment_specific_values(
+        return self._props_for(
             log_group, role, name_prefix, use_prod_values, cross_account
         )
-        return super().props()
 
     def _build_codebuild_env_variables(
         self, use_prod_values: bool, cross_account: bool
@@ -536,11 +738,21 @@ class TestingCodebuildEnvVariables:
 
 @dataclass
 class DeploymentCodebuildEnvVariables:
+    """
+    STACK_SELECTION: [str][OPTIONAL] - context selecting the stacks to synth, such as
+        "-c stacks=product" for builds that never touch the pipeline stack.
+    SYNTH_CACHE_LOCATION: [str][OPTIONAL] - a directory or s3://bucket/prefix to store
+        and reuse synths in, see cdk_configs/utilities/synth_cache.py. Without one a
+        synth is still reused when cdk.out comes along in the input artifact.
+    """
+
     PROD_ASSUME_ROLE: str
     CDK_ACTION: str
     STACK_TO_DEPLOY: str
     DEPLOYMENT_TAG: str
     USE_PROD_VALUES: str
+    STACK_SELECTION: str = None
+    SYNTH_CACHE_LOCATION: str = None
 
 
 ##########################################
@@ -579,7 +791,7 @@ class LogGroupConfigs(DynamicCDKConfigs):
 
         self._necessary_values_set = True
 
-    def props(self, use_prod_values: bool, log_group_name: str) -> dict:
+    def props(self, use_prod_values: bool, log_group_name: str) -> MappingProxyType:
         """
         Parameters:
             use_prod_values [bool] to us the prod values or not. Safest method is to pass
@@ -590,8 +802,7 @@ class LogGroupConfigs(DynamicCDKConfigs):
                 resource the log group is being attached too, so needs to be set at the
                 time of the log group creation.
         """
-        self.update_with_deployment_specific_values(use_prod_values, log_group_name)
-        return super().props()
+        return self._props_for(use_prod_values, log_group_name)
 
     @classmethod
     def build_log_group_path(
@@ -693,15 +904,14 @@ class DynamoDbConfigs(DynamicCDKConfigs):
         self.removal_policy = deployment_properties.DYNAMO_REMOVAL_POLICY
         self._necessary_values_set = True
 
-    def props(self, prod_deployment: bool, name_prefix: str) -> dict:
+    def props(self, prod_deployment: bool, name_prefix: str) -> MappingProxyType:
         """
         Parameters:
             prod_deployment [bool] if this is a prod deployment or not - Safest way to set
                 is to use DeploymentProperties.PROD_DEPLOYMENT.
             name_prefix: [str] - The resource name prefixed with the deployment values.
         """
-        self.update_with_deployment_specific_values(prod_deployment, name_prefix)
-        return super().props()
+        return self._props_for(prod_deployment, name_prefix)
 
 
 @dataclass
@@ -721,20 +931,36 @@ class DynamoDBGlobalSecondaryIndexConfigs(DynamicCDKConfigs):
     index_name: str
     partition_key: str
     sort_key: str
-    projection_type: dynamodb.ProjectionTyp = field(default=dynamodb.ProjectionType.ALL)
-    partition_type: dynamodb.Attribute = field(default=dynamodb.AttributeType.STRING)
-    sort_type: dynamodb.Attribute = field(default=dynamodb.AttributeType.STRING)
+    projection_type: dynamodb.ProjectionTyp = field(
+        default=deferred(lambda: dynamodb.ProjectionType.ALL)
+    )
+    partition_type: dynamodb.Attribute = field(
+        default=deferred(lambda: dynamodb.AttributeType.STRING)
+    )
+    sort_type: dynamodb.Attribute = field(
+        default=deferred(lambda: dynamodb.AttributeType.STRING)
+    )
 
     def __post_init__(self):
+        super().__post_init__()
+
+    def update_with_deployment_specific_values(self):
+        """
+        Builds the partition and sort key Attributes from their names and types.
+        """
         self.partition_key = dynamodb.Attribute(
-            name=self.partition_key, type=self.partition_type
+            name=self.partition_key, type=resolve(self.partition_type)
+        )
+        self.sort_key = dynamodb.Attribute(
+            name=self.sort_key, type=resolve(self.sort_type)
         )
-        self.sort_key = dynamodb.Attribute(name=self.sort_key, type=self.sort_type)
 
         self.partition_type = None
         self.sort_type = None
         self._necessary_values_set = True
-        super().__post_init__()
+
+    def props(self) -> MappingProxyType:
+        return self._props_for()
 
 
 @dataclass
@@ -782,7 +1008,7 @@ class S3BucketConfigs(DynamicCDKConfigs):
 
     def props(
         self, prod_deployment: bool, use_prod_values: bool, name_prefix: str
-    ) -> dict:
+    ) -> MappingProxyType:
         """
         Parameters:
             prod_deployment: [bool] - If this is a prod deployment (and so retaining
@@ -791,10 +1017,7 @@ class S3BucketConfigs(DynamicCDKConfigs):
                 Safest way to set is to use DeploymentProperties.USING_PROD_VALUES.
             name_prefix: [str] - The resource name prefixed with the deployment values.
         """
-        self.update_with_deployment_specific_values(
-            prod_deployment, use_prod_values, name_prefix
-        )
-        return super().props()
+        return self._props_for(prod_deployment, use_prod_values, name_prefix)
 
 
 ##########################################
@@ -804,8 +1027,18 @@ class S3BucketConfigs(DynamicCDKConfigs):
 
 @dataclass
 class RestApiConfigs(DynamicCDKConfigs):
+    """
+    Parameters:
+        rest_api_name: [str] - name of the api.
+        retain_deployments: [bool] - keep old deployments when the api changes.
+        min_compression_size: [cdk.Size][OPTIONAL] - responses at least this size are
+            gzipped by API Gateway for clients that send Accept-Encoding. Leave None to
+            turn compression off.
+    """
+
     rest_api_name: str
     retain_deployments: bool
+    min_compression_size: Optional[cdk.Size] = field(default=None)
 
     def __post_init__(self):
         self._necessary_values_set = True
@@ -820,14 +1053,15 @@ class RestApiResourceConfigs(DynamicCDKConfigs):
     def __post_init__(self):
         super().__post_init__()
 
-    def props(self, parent: apigateway.Resource) -> dict:
+    def update_with_deployment_specific_values(self, parent: apigateway.Resource):
+        self.parent = parent
+        self._necessary_values_set = True
+
+    def props(self, parent: apigateway.Resource) -> MappingProxyType:
         """
         Set the parent as well as part of the props.
         """
-
-        self.parent = parent
-        self._necessary_values_set = True
-        return super().props()
+        return self._props_for(parent)
 
 
 @dataclass
@@ -857,25 +1091,86 @@ class RestApiMethodConfigs(DynamicCDKConfigs):
     resource: apigateway.Resource = field(init=False)
 
     def __post_init__(self):
-        self.options = apigateway.MethodOptions(
-            api_key_required=False, method_responses=[json_200_method_response]
-        )
         super().__post_init__()
 
-    def props(self, resource: apigateway.Resource, lambda_mapping: dict) -> dict:
+    def resource_count(self) -> int:
+        """
+        Only the method - the permission to invoke the lambda is one per lambda, see
+        LambdaIntegrations.
+        """
+        return 1
+
+    def props(
+        self, resource: apigateway.Resource, integrations: LambdaIntegrations
+    ) -> MappingProxyType:
         """
         Parameters:
             resource: [aws_cdk.aws_apigateway.Resource] The RestAPI Gateway Resource
                 that this method attaches too.
-            lambda_mapping: [Dict]: The mapping of all the lambdas. Used in conjunction
-                with x_lambda_integration to attach the lambda as a proxy.
+            integrations: [LambdaIntegrations]: The integration of each lambda, by lambda
+                name. Used in conjunction with x_lambda_integration to attach the lambda
+                as a proxy.
         """
+        return self._props_for(resource, integrations)
+
+    def update_with_deployment_specific_values(
+        self, resource: apigateway.Resource, integrations: LambdaIntegrations
+    ):
         self.resource = resource
 
-        self.integration = apigateway.LambdaIntegration(
-            handler=lambda_mapping[self.x_lambda_integration],
-            proxy=True,
-            integration_responses=[json_200_integration_response],
+        self.options = apigateway.MethodOptions(
+            api_key_required=False,
+            method_responses=[resolve(json_200_method_response)],
         )
+        self.integration = integrations[self.x_lambda_integration]
         self._necessary_values_set = True
-        return super().props()
+
+
+class LambdaIntegrations(dict):
+    """
+    {lambda name: its apigateway.LambdaIntegration} for RestApiMethodConfigs.props(),
+    built from a {lambda name: aws_lambda.IFunction} mapping the first time a method asks
+    for a given lambda. Every method and version on the same lambda shares the one
+    integration.
+
+    The integrations give API Gateway one permission per lambda (a child of the RestApi,
+    so in its stack) instead of the cdk default of one per method. That default would be
+    two more resources for every method and version, and, with its source arn naming the
+    deployed stage, would make methods in another nested stack a circular dependency with
+    the api's deployment. The trade-off is that a lambda's permission lets any method of
+    the api invoke it, not only the ones integrated with it - and cdk gives it a source
+    arn of every stage of the api, so scope_permissions() narrows it to the deployed
+    stage. Test invocations from the console are not allowed by it.
+
+    Parameters:
+        lambda_mapping: [Dict[str, aws_cdk.aws_lambda.IFunction]] - the lambdas by name.
+        rest_api: [aws_cdk.aws_apigateway.RestApi] - the api the integrations are for.
+    """
+
+    def __init__(self, lambda_mapping: dict, rest_api: apigateway.RestApi):
+        super().__init__()
+        self._lambda_mapping = lambda_mapping
+        self._rest_api = rest_api
+
+    def __missing__(self, name: str) -> apigateway.LambdaIntegration:
+        integration = apigateway.LambdaIntegration(
+            handler=self._lambda_mapping[name],
+            proxy=True,
+            scope_permission_to_method=False,
+            integration_responses=[resolve(json_200_integration_response)],
+        )
+        self[name] = integration
+        return integration
+
+    def scope_permissions(self):
+        """
+        Narrows the source arn of each lambda's permission from every stage of the api
+        to its deployed stage. Call it once every method is built - the permissions
+        are made as the methods are.
+        """
+        source_arn = self._rest_api.arn_for_execute_api(
+            stage=self._rest_api.deployment_stage.stage_name
+        )
+        for child in self._rest_api.node.children:
+            if isinstance(child, aws_lambda.CfnPermission):
+                child.source_arn = source_arn
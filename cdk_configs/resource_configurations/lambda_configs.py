@@ -21,6 +21,7 @@ PIPELINE_LAMBDAS = {
         common=PipelineLambdaFunctionConfigs,
         function_name=DeploymentResourceName.GITHUB_TAG,
         location="github_tag.github_tag_lambda.lambda_handler",
+        x_dependency_bundle=True,
     ),
     DeploymentResourceName.SEEK_APPROVAL: LambdaFunctionConfigs(
         common=PipelineLambdaFunctionConfigs,
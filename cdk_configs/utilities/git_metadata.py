@@ -0,0 +1,223 @@
+"""
+The commit, branch and author of the checkout being synthesized, read once per synth.
+
+Reads the .git directory directly (HEAD, the ref it points at - loose or packed - and
+the commit object for the author), which takes well under a millisecond. GitPython is
+only imported when that is not enough, such as when the head commit is in a pack file.
+Without a repository at all - a CodeBuild whose source is a zip from CodePipeline - the
+CodeBuild env variables are used instead.
+
+    from cdk_configs.utilities.git_metadata import git_metadata
+
+    git_metadata().commit_sha
+"""
+
+import os
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
+
+# Where GitMetadata values came from.
+SOURCE_GIT = "git"
+SOURCE_GITPYTHON = "gitpython"
+SOURCE_CODEBUILD = "codebuild"
+SOURCE_NONE = "none"
+
+
+@dataclass(frozen=True)
+class GitMetadata:
+    """
+    Properties:
+        commit_sha: [str] - the full sha of the head commit.
+        branch: [str] - the checked out branch, None if HEAD is detached or unknown.
+        author: [str] - the name of the head commit's author, if it could be read.
+        source: [str] - one of the SOURCE_ constants, where the values came from.
+    """
+
+    commit_sha: Optional[str] = None
+    branch: Optional[str] = None
+    author: Optional[str] = None
+    source: str = SOURCE_NONE
+
+    @property
+    def short_sha(self) -> Optional[str]:
+        return self.commit_sha[:7] if self.commit_sha else None
+
+
+def git_metadata(path: str = ".") -> GitMetadata:
+    """
+    Returns the GitMetadata of the repository containing path. Memoized - the repository
+    is only read the first time for a given path.
+    """
+    return _git_metadata(os.path.abspath(path))
+
+
+@lru_cache(maxsize=None)
+@SYNTH_PROFILER.timed("git: metadata")
+def _git_metadata(path: str) -> GitMetadata:
+    git_directory, common_directory = _find_git_directory(path)
+
+    if git_directory is not None:
+        try:
+            metadata = _read_git_directory(git_directory, common_directory)
+        except (OSError, ValueError, zlib.error):
+            metadata = None
+
+        if metadata is not None and metadata.author is not None:
+            return metadata
+
+        from_gitpython = _read_with_gitpython(path)
+        if from_gitpython is not None:
+            return from_gitpython
+
+        if metadata is not None:
+            return metadata
+
+    return _read_codebuild_environment()
+
+
+def _find_git_directory(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns:
+        (the .git directory of the repository containing path, the directory its refs
+        and objects are in - different only for worktrees), or (None, None).
+    """
+    directory = path
+    while True:
+        candidate = os.path.join(directory, ".git")
+
+        if os.path.isfile(candidate):
+            # worktrees and submodules: a file pointing at the real git directory
+            with open(candidate) as git_file:
+                content = git_file.read().strip()
+            if content.startswith("gitdir:"):
+                candidate = os.path.normpath(
+                    os.path.join(directory, content[len("gitdir:") :].strip())
+                )
+
+        if os.path.isdir(candidate):
+            common = candidate
+            common_file = os.path.join(candidate, "commondir")
+            if os.path.isfile(common_file):
+                with open(common_file) as common_dir:
+                    common = os.path.normpath(
+                        os.path.join(candidate, common_dir.read().strip())
+                    )
+            return candidate, common
+
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None, None
+        directory = parent
+
+
+def _read_git_directory(git_directory: str, common_directory: str) -> GitMetadata:
+    with open(os.path.join(git_directory, "HEAD")) as head_file:
+        head = head_file.read().strip()
+
+    branch = None
+    if head.startswith("ref:"):
+        reference = head[len("ref:") :].strip()
+        if reference.startswith("refs/heads/"):
+            branch = reference[len("refs/heads/") :]
+        commit_sha = _resolve_reference(reference, git_directory, common_directory)
+    else:
+        commit_sha = head
+
+    if not commit_sha:
+        raise ValueError("HEAD does not point at a commit")
+
+    return GitMetadata(
+        commit_sha=commit_sha,
+        branch=branch,
+        author=_read_author(commit_sha, common_directory),
+        source=SOURCE_GIT,
+    )
+
+
+def _resolve_reference(
+    reference: str, git_directory: str, common_directory: str
+) -> Optional[str]:
+    for directory in (git_directory, common_directory):
+        loose = os.path.join(directory, *reference.split("/"))
+        if os.path.isfile(loose):
+            with open(loose) as reference_file:
+                return reference_file.read().strip()
+
+    packed = os.path.join(common_directory, "packed-refs")
+    if os.path.isfile(packed):
+        with open(packed) as packed_refs:
+            for line in packed_refs:
+                if line.startswith(("#", "^")):
+                    continue
+                sha, _, name = line.strip().partition(" ")
+                if name == reference:
+                    return sha
+
+    return None
+
+
+def _read_author(commit_sha: str, common_directory: str) -> Optional[str]:
+    """
+    The author name from the loose commit object, None if the commit is packed.
+    """
+    loose = os.path.join(common_directory, "objects", commit_sha[:2], commit_sha[2:])
+    if not os.path.isfile(loose):
+        return None
+
+    with open(loose, "rb") as commit_object:
+        content = zlib.decompress(commit_object.read())
+
+    _, _, body = content.partition(b"\0")
+    for line in body.split(b"\n"):
+        if not line:
+            break  # end of the commit headers
+        if line.startswith(b"author "):
+            return line[len(b"author ") :].split(b" <", 1)[0].decode("utf-8", "replace")
+
+    return None
+
+
+def _read_with_gitpython(path: str) -> Optional[GitMetadata]:
+    try:
+        import git  # this is GitPython
+
+        repo = git.Repo(path, search_parent_directories=True)
+        commit = repo.head.commit
+    except Exception:
+        return None
+
+    try:
+        branch = repo.active_branch.name
+    except Exception:
+        branch = None  # detached HEAD
+
+    return GitMetadata(
+        commit_sha=commit.hexsha,
+        branch=branch,
+        author=commit.author.name,
+        source=SOURCE_GITPYTHON,
+    )
+
+
+def _read_codebuild_environment() -> GitMetadata:
+    commit_sha = os.getenv("CODEBUILD_RESOLVED_SOURCE_VERSION")
+    if not commit_sha:
+        return GitMetadata()
+
+    branch = None
+    for variable in ("CODEBUILD_WEBHOOK_HEAD_REF", "CODEBUILD_SOURCE_VERSION"):
+        value = os.getenv(variable) or ""
+        if value.startswith("refs/heads/"):
+            branch = value[len("refs/heads/") :]
+            break
+
+    return GitMetadata(
+        commit_sha=commit_sha,
+        branch=branch,
+        author=os.getenv("CODEBUILD_INITIATOR"),
+        source=SOURCE_CODEBUILD,
+    )
@@ -0,0 +1,80 @@
+import importlib
+from types import ModuleType
+from typing import Any, Callable
+
+
+class LazyModule(ModuleType):
+    """
+    Stands in for a module until an attribute of it is first used, then imports it.
+    Importing aws_cdk (and so starting jsii) or GitPython and boto3 takes seconds, which
+    constants and config classes should not pay just to be imported.
+
+        cdk = LazyModule("aws_cdk")  # nothing imported yet
+        cdk.Duration.minutes(2)      # aws_cdk imported here
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self.__name__)
+        return getattr(module, attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+class Deferred:
+    """
+    A value built on first use instead of at import, for cdk values in config classes
+    and constants (aws_lambda.Runtime.PYTHON_3_9, cdk.Duration.minutes(2), ...) which
+    would otherwise import aws_cdk when the module defining them is imported.
+
+    Config props() methods resolve() their values, so a Deferred can be used anywhere a
+    config class takes a cdk value. The value is built once and then reused.
+    """
+
+    __slots__ = ("_factory", "_value", "_resolved")
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._value = None
+        self._resolved = False
+
+    def resolve(self) -> Any:
+        if not self._resolved:
+            self._value = self._factory()
+            self._resolved = True
+        return self._value
+
+    def __repr__(self) -> str:
+        return f"Deferred({self._value!r})" if self._resolved else "Deferred(...)"
+
+
+def deferred(factory: Callable[[], Any]) -> Deferred:
+    """
+    Wraps factory as a Deferred value:
+        runtime = deferred(lambda: aws_lambda.Runtime.PYTHON_3_9)
+    """
+    return Deferred(factory)
+
+
+def resolve(value: Any) -> Any:
+    """
+    Returns value with any Deferred in it (including inside lists, tuples and dicts)
+    built.
+    """
+    if isinstance(value, Deferred):
+        return value.resolve()
+
+    if isinstance(value, (list, tuple)):
+        return type(value)(resolve(item) for item in value)
+
+    if isinstance(value, dict):
+        return {key: resolve(item) for key, item in value.items()}
+
+    return value
@@ -0,0 +1,207 @@
+"""
+Spreads the resources a nested stack builds from its config dicts (lambdas, API routes,
+codebuilds) over as many nested stacks as they need, to stay under CloudFormation's
+limit of 500 resources a stack:
+
+    placement = stable_partition(
+        "ProductLambdas",
+        {name: config.resource_count() for name, config in PRODUCT_LAMBDAS.items()},
+    )
+    for name, config in PRODUCT_LAMBDAS.items():
+        aws_lambda.Function(partition_scope(self, placement[name]), name, ...)
+
+Partition 0 is the stack itself, so while everything fits in it the templates are the
+same as before any partitioning. Partitions 1 and up are nested stacks inside it, which
+CloudFormation deploys in parallel.
+
+Placement has to stay stable - a resource moved to another stack is deleted and created
+again, and one with a fixed name (a function_name) fails to deploy. So every placement
+is kept in PLACEMENT_FILE, which is committed: an entry already in it stays in its
+partition however much it or its neighbours grow, and only new entries are placed, first
+fit into the room the budget leaves. If the entries of one partition grow past
+CloudFormation's limit the synth fails, rather than moving any of them.
+
+A synth only reads the file, and fails on an entry that is not in it. Place new entries
+with `make placements` (a synth with -c update_placements=True, which writes the file)
+and commit it with the config that added them.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from cdk_configs.utilities.color import as_warning
+from cdk_configs.utilities.lazy import LazyModule
+
+cdk = LazyModule("aws_cdk")
+
+CLOUDFORMATION_RESOURCE_LIMIT = 500
+
+# Resources placed in a partition - the rest of the limit is room for the configs in it
+# to grow (grants adding policies, a vpc adding security groups) without moving anything.
+PARTITION_RESOURCE_BUDGET = 400
+
+# Kept free in partition 0 for what the stack builds itself: layers, roles, the RestApi
+# and its domain, and one AWS::CloudFormation::Stack per other partition.
+PARTITION_RESERVED_RESOURCES = 50
+
+PARTITION_ID = "Partition"
+
+# {group: {name: partition}} of everything deployed, see stable_partition()
+PLACEMENT_FILE = Path(__file__).parent.parent / "partition_placement.json"
+
+
+def partition(
+    resource_counts: Dict[str, int],
+    placed: Dict[str, int] = None,
+    budget: int = PARTITION_RESOURCE_BUDGET,
+    reserved: int = PARTITION_RESERVED_RESOURCES,
+) -> Dict[str, int]:
+    """
+    Parameters:
+        resource_counts: [Dict[str, int]] - {name: the resources it creates}, in the
+            order they are declared.
+        placed: [Dict[str, int]][OPTIONAL] - {name: partition} of the entries already
+            deployed, which keep their partition. Names no longer in resource_counts are
+            dropped.
+        budget: [int] - the most resources to place in one partition.
+        reserved: [int] - resources of the budget kept free in partition 0.
+
+    Returns:
+        [Dict[str, int]] {name: the index of its partition}.
+
+    Raises:
+        ValueError if one new entry alone creates more resources than the budget, or
+        the entries kept in a partition have grown past CloudFormation's limit.
+    """
+
+    def capacity(index: int) -> int:
+        return budget - reserved if index == 0 else budget
+
+    placement = {
+        name: index for name, index in (placed or {}).items() if name in resource_counts
+    }
+    used = [0] * (max(placement.values(), default=-1) + 1)
+    for name, index in placement.items():
+        used[index] += resource_counts[name]
+
+    for index, in_use in enumerate(used):
+        limit = CLOUDFORMATION_RESOURCE_LIMIT - (reserved if index == 0 else 0)
+        if in_use > limit:
+            raise ValueError(
+                f"Partition {index} has grown to {in_use} resources, more than the "
+                + f"{limit} it can hold - move entries out of it by hand: "
+                + ", ".join(name for name in placement if placement[name] == index)
+            )
+
+    for name, count in resource_counts.items():
+        if name in placement:
+            continue
+
+        if count > budget:
+            raise ValueError(
+                f"{name} creates {count} resources, more than the {budget} that fit "
+                + "in one partition"
+            )
+
+        fits = [i for i, in_use in enumerate(used) if in_use + count <= capacity(i)]
+        while not fits:
+            used.append(0)
+            if count <= capacity(len(used) - 1):
+                fits = [len(used) - 1]
+
+        used[fits[0]] += count
+        placement[name] = fits[0]
+
+    return {name: placement[name] for name in resource_counts}
+
+
+def stable_partition(
+    group: str,
+    resource_counts: Dict[str, int],
+    update: bool = False,
+    placement_file: Path = None,
+) -> Dict[str, int]:
+    """
+    partition() with the placement of group read from placement_file, so entries that
+    are already deployed do not move.
+
+    Parameters:
+        group: [str] - the name the placement is kept under, such as "ProductLambdas".
+        resource_counts: [Dict[str, int]] - see partition().
+        update: [bool][OPTIONAL] - place entries missing from placement_file and write
+            it back, without the entries no longer in resource_counts. Set by the
+            update_placements context (DeploymentProperties.UPDATE_PLACEMENTS).
+        placement_file: [Path][OPTIONAL] - Default PLACEMENT_FILE.
+
+    Returns:
+        [Dict[str, int]] {name: the index of its partition}.
+
+    Raises:
+        ValueError if an entry has no placement and update is not set.
+    """
+    placement_file = Path(placement_file or PLACEMENT_FILE)
+    placed = _read_placements(placement_file).get(group, {})
+
+    if not update:
+        missing = [name for name in resource_counts if name not in placed]
+        if missing:
+            raise ValueError(
+                f"{', '.join(missing)} of {group} have no placement in "
+                + f"{placement_file.name} - run `make placements` and commit it"
+            )
+        return partition(resource_counts, placed)
+
+    placement = partition(resource_counts, placed)
+    if placement != placed:
+        placements = _read_placements(placement_file)
+        placements[group] = placement
+        _write_placements(placement_file, placements)
+        print(as_warning(f"***Updated the {group} placement in {placement_file.name}"))
+    return placement
+
+
+def _read_placements(placement_file: Path) -> Dict[str, Dict[str, int]]:
+    try:
+        with open(placement_file) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_placements(placement_file: Path, placements: Dict[str, Dict[str, int]]):
+    """
+    Writes a temporary file beside placement_file and moves it over it, so a synth
+    running at the same time never reads it half written.
+    """
+    descriptor, temporary = tempfile.mkstemp(
+        dir=placement_file.parent, prefix=f".{placement_file.name}."
+    )
+    try:
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(placements, file, indent=2)
+            file.write("\n")
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, placement_file)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def partition_scope(stack: "cdk.Stack", index: int) -> "cdk.Stack":
+    """
+    Returns:
+        [aws_cdk.Stack] stack itself for partition 0, otherwise the nested stack of that
+        partition inside it (made the first time it is asked for).
+    """
+    if index == 0:
+        return stack
+
+    construct_id = f"{PARTITION_ID}{index + 1}"
+    existing = stack.node.try_find_child(construct_id)
+    if existing is not None:
+        return existing
+
+    return cdk.NestedStack(stack, construct_id)
@@ -0,0 +1,36 @@
+"""
+A cdk app that only makes the context lookups the real app makes (the VPC), so they
+can be filled into cdk.context.json without building every stack:
+
+    make context
+    make context CONTEXT="-c use_prod=True"
+
+which runs
+    cdk synth --app "python3 -m cdk_configs.utilities.prefetch_context" --quiet
+
+The cdk cli makes any lookups missing from cdk.context.json and writes their results
+there. Commit the updated cdk.context.json - later synths then make no VPC api calls.
+"""
+
+import aws_cdk as cdk
+
+from cdk_configs.product_properties.common_props import DeploymentProperties
+
+PREFETCH_STACK_NAME = "ContextPrefetch"
+
+
+def prefetch(app: cdk.App) -> cdk.Stack:
+    """
+    Adds a stack to app, in the same account and region as the real stacks, that makes
+    every lookup DeploymentProperties makes for them.
+    """
+    props = DeploymentProperties(app)
+    stack = cdk.Stack(app, PREFETCH_STACK_NAME, env=props.aws_environment)
+    props.vpc(stack)
+    return stack
+
+
+if __name__ == "__main__":
+    app = cdk.App()
+    prefetch(app)
+    app.synth()
@@ -0,0 +1,378 @@
+"""
+Content hash cache for `cdk synth`, so a CodeBuild that synthesizes a commit another
+stage already synthesized (deploy then destroy an adhoc environment, for example) can
+reuse that cloud assembly instead of running the app again.
+
+The key is a hash of everything a synth depends on: the sources it runs (SOURCE_PATHS,
+including cdk.json and cdk.context.json), the context passed on the command line (the
+deployment tag and prod flags), the commit, the deploying user, the aws-cdk-lib version
+and the version of the deployment secret the stacks read values from. Only SOURCE_PATHS
+are hashed, so what a build or deploy writes beside them (cdk-outputs.json, test
+reports, the layer zips) does not change the key. Synths are cached whole as a tarball
+of cdk.out, in a directory or under an s3 prefix, and a restored cdk.out is deployed
+with `cdk deploy --app cdk.out`.
+
+A cdk.out carried forward as a pipeline artifact is reused too - every stored assembly
+has its key written into it (KEY_FILE_NAME), so it is a hit if that key still matches.
+
+Usage, from the repository root:
+    python -m cdk_configs.utilities.synth_cache key --context "$DEPLOYMENT_TAG $USE_PROD_VALUES"
+    python -m cdk_configs.utilities.synth_cache restore --context "..." [--location s3://bucket/prefix]
+    python -m cdk_configs.utilities.synth_cache store --context "..." [--location /a/directory]
+
+restore exits 0 on a hit (cdk.out is ready) and 1 on a miss. --location defaults to the
+SYNTH_CACHE_LOCATION env variable; without one only a cdk.out already in place is reused.
+A synth whose deployment secret version cannot be read (no aws credentials, no access to
+it) has no key: restore misses and store stores nothing.
+"""
+
+import argparse
+import getpass
+import hashlib
+import os
+import shlex
+import shutil
+import sys
+import tarfile
+import tempfile
+from typing import List, Optional
+
+from cdk_configs.product_properties.common_props import ProductSetting
+from cdk_configs.utilities.color import as_warning
+from cdk_configs.utilities.git_metadata import git_metadata
+
+LOCATION_ENV_VARIABLE = "SYNTH_CACHE_LOCATION"
+KEY_FILE_NAME = "synth-cache.key"
+DEFAULT_OUTDIR = "cdk.out"
+
+# Everything under the repository root a synth reads. Anything else, such as the
+# cdk-outputs.json a deploy writes, is left out of the key.
+SOURCE_PATHS = (
+    "app.py",
+    "cdk.json",
+    "cdk.context.json",
+    "makefile",
+    "aws_lambda_functions",
+    "cdk_configs",
+    "common",
+    "layers",
+    "stacks",
+)
+
+# Directories under SOURCE_PATHS that never change what a synth produces.
+IGNORED_DIRECTORIES = {
+    "__pycache__",
+    ".pytest_cache",
+    ".mypy_cache",
+    "node_modules",
+    # dependency bundles, built by layers/bundles.py from the layers' inputs and the
+    # lambdas' own sources, which are hashed in their place like the layer zips
+    "bundles",
+}
+IGNORED_SUFFIXES = (".pyc", ".pyo")
+
+
+class SynthKeyError(ValueError):
+    """
+    Something a synth depends on cannot be read, so it cannot be keyed.
+    """
+
+
+# Built by `make` in every CodeBuild, and pip does not build them byte for byte the same,
+# so their inputs (layers/requirements-*.txt and common/) are hashed instead.
+LAYER_BUILD_OUTPUTS = {
+    "stacks/pipeline/pipeline_lambdas/pipeline_layer.zip",
+    "aws_lambda_functions/common_layer.zip",
+}
+
+
+def synth_key(context: str = "", root: str = ".", outdir: str = DEFAULT_OUTDIR) -> str:
+    """
+    Parameters:
+        context: [str] - the context arguments given to cdk, such as
+            "-c deploy_tag=DEV -c use_prod=True". Order does not matter.
+        root: [str] - the repository root.
+        outdir: [str] - the cloud assembly directory, left out of the hash.
+
+    Returns:
+        [str] the hex sha256 cache key.
+
+    Raises:
+        SynthKeyError if the version of the deployment secret cannot be read - the
+        values the synth reads from it would not be in the key.
+    """
+    secret_version = _deployment_secret_version()
+    if secret_version is None:
+        raise SynthKeyError(
+            f"the version of {ProductSetting.DEPLOYMENT_SECRETS} cannot be read"
+        )
+
+    digest = hashlib.sha256()
+
+    for name, value in (
+        ("context", " ".join(sorted(_context_pairs(context)))),
+        ("commit", git_metadata(root).commit_sha),
+        ("user", "Pipeline" if os.getenv("IS_PIPELINE") else getpass.getuser()),
+        ("aws-cdk-lib", _package_version("aws-cdk-lib")),
+        ("python", "%d.%d" % sys.version_info[:2]),
+        ("secret", secret_version),
+    ):
+        digest.update(f"{name}={value}\0".encode())
+
+    for path in _source_files(root, outdir):
+        digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode() + b"\0")
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(1 << 20), b""):
+                digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def restore(key: str, outdir: str = DEFAULT_OUTDIR, location: str = None) -> bool:
+    """
+    Makes outdir the cloud assembly stored under key, if there is one.
+
+    Returns:
+        [bool] True on a hit - either outdir already holds this key's assembly (it came
+        along as an artifact) or it was restored from location.
+    """
+    if _read_key(outdir) == key:
+        print(f"***Synth cache hit: {outdir} is already synthesized for {key[:12]}")
+        return True
+
+    if not location:
+        return False
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        archive = os.path.join(working_directory, f"{key}.tar.gz")
+        if not _fetch(location, key, archive):
+            return False
+
+        extracted = os.path.join(working_directory, "assembly")
+        try:
+            _extract(archive, extracted)
+        except tarfile.TarError as error:
+            print(as_warning(f"***Synth cache entry {key[:12]} is unsafe - {error}"))
+            return False
+
+        if _read_key(extracted) != key:
+            print(as_warning(f"***Synth cache entry {key[:12]} is corrupt - ignoring"))
+            return False
+
+        shutil.rmtree(outdir, ignore_errors=True)
+        shutil.move(extracted, outdir)
+
+    print(f"***Synth cache hit: restored {key[:12]} from {location}")
+    return True
+
+
+def store(key: str, outdir: str = DEFAULT_OUTDIR, location: str = None):
+    """
+    Writes the key into outdir (so it can be reused as an artifact) and, if there is a
+    location, stores outdir there under the key.
+    """
+    if not os.path.isfile(os.path.join(outdir, "manifest.json")):
+        raise FileNotFoundError(
+            f"{outdir} is not a cloud assembly - run cdk synth first"
+        )
+
+    with open(os.path.join(outdir, KEY_FILE_NAME), "w") as key_file:
+        key_file.write(key)
+
+    if not location:
+        return
+
+    with tempfile.TemporaryDirectory() as working_directory:
+        archive = os.path.join(working_directory, f"{key}.tar.gz")
+        with tarfile.open(archive, "w:gz") as tar:
+            tar.add(outdir, arcname=".")
+        _put(location, key, archive)
+
+    print(f"***Synth cache stored {key[:12]} in {location}")
+
+
+def _extract(archive: str, destination: str):
+    """
+    Extracts a stored assembly, which is read from a shared location - a member that is
+    not a plain file or directory, or would be written outside destination, fails it.
+
+    Raises:
+        tarfile.TarError for such a member.
+    """
+    with tarfile.open(archive) as tar:
+        # the extraction filters are in python 3.12 and the security releases before it
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(destination, filter="data")
+            return
+
+        root = os.path.realpath(destination)
+        for member in tar.getmembers():
+            path = os.path.realpath(os.path.join(root, member.name))
+            if not (member.isfile() or member.isdir()) or (
+                os.path.commonpath([root, path]) != root
+            ):
+                raise tarfile.TarError(f"{member.name} is not a file of the assembly")
+        tar.extractall(destination)
+
+
+def _context_pairs(context: str) -> List[str]:
+    """
+    The key=value pairs of the -c / --context arguments in context.
+    """
+    pairs = []
+    arguments = shlex.split(context or "")
+    for index, argument in enumerate(arguments):
+        if argument in ("-c", "--context") and index + 1 < len(arguments):
+            pairs.append(arguments[index + 1])
+        elif argument.startswith("--context="):
+            pairs.append(argument[len("--context=") :])
+    return pairs
+
+
+def _package_version(name: str) -> Optional[str]:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        return None
+
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def _deployment_secret_version() -> Optional[str]:
+    """
+    The current version id of the deployment secret (see DeploymentProperties.secret),
+    as the values read from it during a synth go into the templates. None when it cannot
+    be read, such as without aws credentials.
+    """
+    try:
+        import boto3
+        from botocore.exceptions import BotoCoreError, ClientError
+    except ImportError:
+        return None
+
+    try:
+        return boto3.client(
+            "secretsmanager", region_name=ProductSetting.PRIMARY_REGION
+        ).get_secret_value(SecretId=ProductSetting.DEPLOYMENT_SECRETS)["VersionId"]
+    except (BotoCoreError, ClientError):
+        return None
+
+
+def _source_files(root: str, outdir: str):
+    excluded = {os.path.abspath(outdir)} | {
+        os.path.abspath(os.path.join(root, path)) for path in LAYER_BUILD_OUTPUTS
+    }
+    for source_path in SOURCE_PATHS:
+        path = os.path.join(root, source_path)
+        if os.path.isfile(path):
+            yield path
+            continue
+
+        for directory, directories, files in os.walk(path):
+            directories[:] = sorted(
+                name
+                for name in directories
+                if name not in IGNORED_DIRECTORIES
+                and os.path.abspath(os.path.join(directory, name)) not in excluded
+            )
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                if (
+                    not name.endswith(IGNORED_SUFFIXES)
+                    and os.path.abspath(path) not in excluded
+                ):
+                    yield path
+
+
+def _read_key(outdir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(outdir, KEY_FILE_NAME)) as key_file:
+            return key_file.read().strip()
+    except OSError:
+        return None
+
+
+def _split_s3(location: str, key: str):
+    bucket, _, prefix = location[len("s3://") :].partition("/")
+    return bucket, "/".join(filter(None, [prefix.strip("/"), f"{key}.tar.gz"]))
+
+
+def _fetch(location: str, key: str, archive: str) -> bool:
+    if location.startswith("s3://"):
+        import boto3
+        from botocore.exceptions import ClientError
+
+        bucket, object_key = _split_s3(location, key)
+        try:
+            boto3.client("s3").download_file(bucket, object_key, archive)
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return False
+            raise
+        return True
+
+    cached = os.path.join(location, f"{key}.tar.gz")
+    if not os.path.isfile(cached):
+        return False
+    shutil.copyfile(cached, archive)
+    return True
+
+
+def _put(location: str, key: str, archive: str):
+    if location.startswith("s3://"):
+        import boto3
+
+        bucket, object_key = _split_s3(location, key)
+        boto3.client("s3").upload_file(archive, bucket, object_key)
+        return
+
+    os.makedirs(location, exist_ok=True)
+    shutil.copyfile(archive, os.path.join(location, f"{key}.tar.gz"))
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m cdk_configs.utilities.synth_cache",
+        description="Content hash cache for cdk synth.",
+    )
+    parser.add_argument("command", choices=["key", "restore", "store"])
+    parser.add_argument(
+        "--context",
+        default="",
+        help='the cdk context arguments, such as "-c deploy_tag=DEV -c use_prod=True"',
+    )
+    parser.add_argument(
+        "--location",
+        default=os.getenv(LOCATION_ENV_VARIABLE),
+        help=f"a directory or s3://bucket/prefix (default ${LOCATION_ENV_VARIABLE})",
+    )
+    parser.add_argument("--outdir", default=DEFAULT_OUTDIR)
+    parser.add_argument("--root", default=".")
+    args = parser.parse_args(arguments)
+
+    try:
+        key = synth_key(args.context, args.root, args.outdir)
+    except SynthKeyError as error:
+        print(as_warning(f"***Synth is not cached: {error}"))
+        # a miss for restore, nothing to store for store
+        return 1 if args.command != "store" else 0
+
+    if args.command == "key":
+        print(key)
+        return 0
+
+    if args.command == "restore":
+        if restore(key, args.outdir, args.location):
+            return 0
+        print(f"***Synth cache miss for {key[:12]}")
+        return 1
+
+    store(key, args.outdir, args.location)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from cdk_configs.utilities.color import as_warning
+
+# Set (to anything) to profile a synth, the same as `-c profile_synth=True`
+PROFILE_ENV_VARIABLE = "CDK_PROFILE_SYNTH"
+PROFILE_FILE_NAME = "synth-profile.json"
+
+
+class SynthProfiler:
+    """
+    Opt in timing of the phases of a cdk synth. Off unless the CDK_PROFILE_SYNTH env
+    variable is set or enable() is called, and nearly free while off.
+
+    Phases are recorded by name, so a phase hit many times (such as one config class's
+    props()) is reported as its count and total. Phases nest - a stack's time includes
+    its nested stacks and their props() calls.
+
+    Methods:
+        enable() - start recording.
+        phase(name) - context manager timing the block it wraps.
+        timed(name) - decorator timing every call of a function.
+        finish(outdir) - print the report, sorted slowest first, and write it as json
+            next to the cloud assembly directory.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv(PROFILE_ENV_VARIABLE) is not None
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            self.started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, time.perf_counter() - start)
+
+    def timed(self, name: str = None):
+        def decorator(function):
+            phase_name = name or function.__qualname__
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+
+                with self.phase(phase_name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def report(self) -> dict:
+        total = time.perf_counter() - self.started
+        phases = sorted(
+            (
+                {
+                    "phase": name,
+                    "count": count,
+                    "seconds": round(seconds, 4),
+                    "percent": round(seconds / total * 100, 1) if total else 0.0,
+                }
+                for name, (count, seconds) in self.phases.items()
+            ),
+            key=lambda phase: phase["seconds"],
+            reverse=True,
+        )
+        return {"total_seconds": round(total, 4), "phases": phases}
+
+    def finish(self, outdir: str):
+        """
+        Prints the report and writes it to synth-profile.json in the directory
+        containing outdir (so next to cdk.out rather than in it, where the cdk cli
+        would treat it as part of the cloud assembly).
+        """
+        if not self.enabled:
+            return
+
+        report = self.report()
+        print(as_warning(f"***Synth profile ({report['total_seconds']:.2f}s total):"))
+        for phase in report["phases"]:
+            print(
+                f"   {phase['seconds']:8.3f}s {phase['percent']:5.1f}% "
+                f"x{phase['count']:<4} {phase['phase']}"
+            )
+
+        path = os.path.join(os.path.dirname(os.path.abspath(outdir)), PROFILE_FILE_NAME)
+        with open(path, "w") as profile_file:
+            json.dump(report, profile_file, indent=2)
+        print(f"   **written to:     {path}")
+
+    def _record(self, name: str, seconds: float):
+        count, total = self.phases.get(name, (0, 0.0))
+        self.phases[name] = (count + 1, total + seconds)
+
+
+# One profiler for the whole synth, so phases recorded anywhere end up in one report.
+SYNTH_PROFILER = SynthProfiler()
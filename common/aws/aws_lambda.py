@@ -1,5 +1,153 @@
+import base64
+import gzip
+import hashlib
 import json
-from dataclasses import dataclass
+from dataclasses import MISSING, Field, dataclass, fields
+from functools import lru_cache
+from itertools import chain, repeat
+from typing import Any, Optional
+
+from common.aws.event_schema import extract_event_fields
+
+try:
+    # Optional faster JSON backend, used by as_json when it is installed.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the layer contents
+    orjson = None
+
+
+@lru_cache(maxsize=4096)
+def best_name(key: str) -> str:
+    """
+    The as_json best_naming form of a key: underscores removed and lower cased after
+    the first letter, so job_id becomes jobid. Cached, as the same keys are converted on
+    every call.
+    """
+    cleaned_key = key.lower().replace("_", " ").capitalize().replace(" ", "")
+    return key[0].lower() + cleaned_key[1:]
+
+
+def best_name_nested(value):
+    """
+    Applies best_name to the keys of value and of any dicts nested inside it (through
+    lists and tuples as well).
+    """
+    if isinstance(value, dict):
+        return {
+            (
+                _nested_names.get(key) or _nested_name(key)
+                if isinstance(key, str)
+                else key
+            ): best_name_nested(item)
+            for key, item in value.items()
+        }
+
+    if isinstance(value, (list, tuple)):
+        return [best_name_nested(item) for item in value]
+
+    return value
+
+
+# Plain dict in front of best_name for the nested walk, which converts the same keys
+# many times per call and is dominated by the lookup cost.
+_nested_names = {}
+
+
+def _nested_name(key: str) -> str:
+    name = best_name(key) if key else key
+    if len(_nested_names) < 4096:
+        _nested_names[key] = name
+    return name
+
+
+def dumps(value) -> str:
+    """
+    json.dumps, using orjson when it is installed. Anything orjson cannot serialize
+    (such as non string keys) falls back to the standard library.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            pass
+
+    return json.dumps(value)
+
+
+class _Serializer:
+    """
+    The per class field to output key map used by LambdaVariables.as_dict and as_json.
+    Built from the dataclass fields the first time a class is serialized; attributes
+    set outside of the declared fields are added the first time they are seen.
+
+    A key maps to None if it is never output (event and `_` prefixed attributes).
+    """
+
+    __slots__ = ("names", "best_names", "field_names")
+
+    def __init__(self, cls):
+        self.names = {}
+        self.best_names = {}
+        for class_field in fields(cls):
+            self._add(class_field.name)
+
+        self.field_names = tuple(key for key, name in self.names.items() if name)
+
+    def _add(self, key: str):
+        included = key[0] != "_" and key != "event"
+        self.names[key] = key if included else None
+        self.best_names[key] = best_name(key) if included else None
+
+    def as_dict(self, instance, include_none: bool, best_naming: bool) -> dict:
+        values = instance.__dict__
+        if not values.keys() <= self.names.keys():
+            for key in values.keys() - self.names.keys():
+                self._add(key)
+
+        key_map = self.best_names if best_naming else self.names
+
+        if include_none:
+            return {
+                output_key: value
+                for key, value in values.items()
+                if (output_key := key_map[key]) is not None
+            }
+
+        return {
+            output_key: value
+            for key, value in values.items()
+            if value is not None and (output_key := key_map[key]) is not None
+        }
+
+    def as_dict_from_fields(
+        self, instance, include_none: bool, best_naming: bool
+    ) -> dict:
+        """
+        as_dict for classes without a __dict__: reads the declared fields instead,
+        skipping any that have not been set.
+        """
+        key_map = self.best_names if best_naming else self.names
+        output = {}
+
+        for key in self.field_names:
+            value = getattr(instance, key, _UNSET)
+            if value is _UNSET or (value is None and not include_none):
+                continue
+            output[key_map[key]] = value
+
+        return output
+
+
+_UNSET = object()
+
+_serializers = {}
+
+
+def _serializer_for(cls) -> _Serializer:
+    serializer = _serializers.get(cls)
+    if serializer is None:
+        serializer = _serializers[cls] = _Serializer(cls)
+    return serializer
 
 
 @dataclass
@@ -13,6 +161,12 @@ class LambdaVariables:
 
     and have the `def __post_init__(self):` method in the child class set all the variables from the event
 
+    Alternatively, declare where in the event each attribute comes from with event_field (see
+    common.aws.event_schema) and they are validated and set in one pass, with an EventValidationError
+    listing everything wrong with the event:
+        quote_id: str = event_field("pathParameters.quoteId", str, required=True)
+
+    A child class with event_fields and its own __post_init__ should call super().__post_init__() first.
 
     Methods:
         as_dict() - Returns any variables of this dataclass as a dict, excluding those prefixed with `_`
@@ -25,11 +179,18 @@ class LambdaVariables:
                 include_none: bool - If true, same as as_dict()
                 best_naming: bool - defaults to True, and attempts to convert snake_case to camelCase.
                     setting this to false disables this and leaves the keys of the json field as snake_case
+                nested: bool - defaults to False. If true, best_naming also applies to keys of nested dicts
+
+        The field names and their output keys are worked out once per class and reused, and
+        as_json uses orjson if it is installed.
 
     """
 
     event: dict
 
+    def __post_init__(self):
+        extract_event_fields(self)
+
     def as_dict(self, include_none: bool = False) -> dict:
         """
         Returns the data class as a dict, skipping any field that is currently none and ignoring any attribute
@@ -44,14 +205,13 @@ class LambdaVariables:
             [dict] of all attributes
         """
 
-        return {
-            key: value
-            for key, value in self.__dict__.items()
-            if (value is not None or include_none)
-            and (key[0] != "_" and key != "event")
-        }
+        return _serializer_for(type(self)).as_dict(
+            self, include_none=include_none, best_naming=False
+        )
 
-    def as_json(self, include_none: bool = False, best_naming: bool = True) -> str:
+    def as_json(
+        self, include_none: bool = False, best_naming: bool = True, nested: bool = False
+    ) -> str:
         """
         similar to as_dict, but returns it already json.dumps and if best_naming is True (default)
         reformats attribute names to best practices (only top level attributes however).
@@ -59,23 +219,289 @@ class LambdaVariables:
         Parameters:
             include_none[bool][OPTIONAL]: Default to False, pass True if none values should be returned.
             best_naming[bool][OPTIONAL]: Default to True. cleans up names (remove underscores, capitalizes) - top level keys only (does not go into dicts)
+            nested[bool][OPTIONAL]: Default to False. With best_naming, also cleans up the keys of any dicts in the values
 
         Returns:
             [str] json string.
         """
 
-        output = self.as_dict(include_none=include_none)
+        output = _serializer_for(type(self)).as_dict(
+            self, include_none=include_none, best_naming=best_naming
+        )
+
+        if best_naming and nested:
+            output = best_name_nested(output)
+
+        return dumps(output)
+
+
+@dataclass
+class SlottedLambdaVariables:
+    """
+    LambdaVariables for lambdas that build a lot of them: instances have __slots__
+    instead of a __dict__, which makes them smaller and quicker to create. The same
+    as_dict() and as_json() are available, and skip event and `_` prefixed attributes in
+    the same way, but read the declared fields rather than __dict__ - so attributes not
+    declared as fields cannot be set at all. event_fields work as they do on LambdaVariables.
+
+    Child classes must be decorated with @slotted instead of @dataclass:
+
+        @slotted
+        class QuoteVariables(SlottedLambdaVariables):
+            quote_id: str = field(default=None, init=False)
 
-        if best_naming:
-            cleaned_output = {}
-            for key, value in output.items():
-                first_letter = key[0].lower()
-                cleaned_key = (
-                    key.lower().replace("_", " ").capitalize().replace(" ", "")
-                )
-                cleaned_key = first_letter + cleaned_key[1:]
-                cleaned_output[cleaned_key] = value
+            def __post_init__(self):
+                super().__post_init__()
+                self.quote_id = self.event.get("quoteId")
+    """
+
+    __slots__ = ("event",)
+
+    event: dict
+
+    def __post_init__(self):
+        extract_event_fields(self)
+
+    def as_dict(self, include_none: bool = False) -> dict:
+        """
+        See LambdaVariables.as_dict
+        """
+        return _serializer_for(type(self)).as_dict_from_fields(
+            self, include_none=include_none, best_naming=False
+        )
+
+    def as_json(
+        self, include_none: bool = False, best_naming: bool = True, nested: bool = False
+    ) -> str:
+        """
+        See LambdaVariables.as_json
+        """
+        output = _serializer_for(type(self)).as_dict_from_fields(
+            self, include_none=include_none, best_naming=best_naming
+        )
+
+        if best_naming and nested:
+            output = best_name_nested(output)
+
+        return dumps(output)
+
+
+def slotted(cls=None, **dataclass_kwargs):
+    """
+    Makes cls a dataclass (passing on any dataclass_kwargs, such as frozen=True) and
+    rebuilds it with __slots__ for its fields, the same as dataclass(slots=True) does on
+    Python 3.10 and up. Intended for SlottedLambdaVariables children; every parent class
+    must also be slotted for instances to go without a __dict__.
+
+    Methods of the rebuilt class can use zero argument super(), and init=False fields
+    are set to their defaults by __init__, since there is no class attribute to fall
+    back on.
+    """
+
+    def wrap(cls):
+        # An init=False field is left out of the generated __init__ and read from the
+        # class attribute holding its default, which the slot replaces - so it is
+        # given a default_factory, which __init__ does call.
+        for value in cls.__dict__.values():
+            if (
+                isinstance(value, Field)
+                and not value.init
+                and value.default is not MISSING
+                and value.default_factory is MISSING
+            ):
+                value.default_factory = repeat(value.default).__next__
+
+        cls = dataclass(cls, **dataclass_kwargs)
+        cls_dict = dict(cls.__dict__)
+        field_names = tuple(class_field.name for class_field in fields(cls))
+        inherited_slots = set(
+            chain.from_iterable(
+                getattr(base, "__slots__", ()) for base in cls.__mro__[1:-1]
+            )
+        )
+
+        cls_dict["__slots__"] = tuple(
+            name for name in field_names if name not in inherited_slots
+        )
+        # Defaults live on the generated __init__, the class attributes would clash
+        # with the slots.
+        for name in field_names:
+            cls_dict.pop(name, None)
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+
+        slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        slotted_cls.__qualname__ = cls.__qualname__
+        for member in slotted_cls.__dict__.values():
+            _rebind_class_cell(member, cls, slotted_cls)
+        return slotted_cls
+
+    return wrap if cls is None else wrap(cls)
+
+
+def _rebind_class_cell(member, old_cls: type, new_cls: type):
+    """
+    Points the __class__ closure cell of member at new_cls, where it pointed at old_cls.
+    The cell is what zero argument super() and __class__ read inside a method, and it
+    is made for the class statement's class - not for the one slotted() rebuilds.
+    """
+    if isinstance(member, (classmethod, staticmethod)):
+        member = member.__func__
+    elif isinstance(member, property):
+        for accessor in (member.fget, member.fset, member.fdel):
+            _rebind_class_cell(accessor, old_cls, new_cls)
+        return
+
+    code = getattr(member, "__code__", None)
+    if code is None or "__class__" not in code.co_freevars:
+        return
+
+    cell = member.__closure__[code.co_freevars.index("__class__")]
+    if cell.cell_contents is old_cls:
+        cell.cell_contents = new_cls
+
+
+# Bodies smaller than this gain little from gzip, and can come out larger.
+DEFAULT_COMPRESS_ABOVE = 1024
+
+
+def api_response(
+    event: dict,
+    body: Any = None,
+    status_code: int = 200,
+    headers: dict = None,
+    compress_above: Optional[int] = DEFAULT_COMPRESS_ABOVE,
+) -> dict:
+    """
+    Builds an API Gateway proxy response.
+
+    Successful responses get a weak ETag of the payload, and GET or HEAD requests whose
+    If-None-Match header matches it get an empty 304 instead.
+
+    Bodies larger than compress_above bytes are gzipped (and base64 encoded) when the
+    request accepts gzip and comes from an HTTP API or a lambda function URL (payload
+    version 2.0), which neither compress responses nor need binary media types set to
+    pass a base64 body on. REST API responses are left to API Gateway, which compresses
+    them itself with RestApiConfigs.min_compression_size.
+
+    Parameters:
+        event: [dict] - the API Gateway event, for the request headers.
+        body: [dict, list, str, LambdaVariables][OPTIONAL] - the payload. Anything but a
+            str is sent as json.
+        status_code: [int][OPTIONAL] - Default 200.
+        headers: [dict][OPTIONAL] - additional response headers.
+        compress_above: [int][OPTIONAL] - gzip bodies over this many bytes. Default
+            DEFAULT_COMPRESS_ABOVE, None to never compress.
+
+    Returns:
+        [dict] with statusCode, headers, body and isBase64Encoded.
+    """
+    response_headers = {"Content-Type": "application/json", **(headers or {})}
+
+    if isinstance(body, (LambdaVariables, SlottedLambdaVariables)):
+        payload = body.as_json()
+    elif body is None or isinstance(body, str):
+        payload = body or ""
+    else:
+        payload = dumps(body)
+    payload = payload.encode()
+
+    request_headers = _lower_case_headers(event)
+
+    if 200 <= status_code < 300 and payload:
+        etag = f'W/"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+        response_headers["ETag"] = etag
+
+        is_read = _request_method(event) in ("GET", "HEAD")
+        if is_read and _etag_matches(etag, request_headers.get("if-none-match")):
+            return {
+                "statusCode": 304,
+                "headers": {"ETag": etag},
+                "body": "",
+                "isBase64Encoded": False,
+            }
+
+    if (
+        compress_above is not None
+        and len(payload) > compress_above
+        and (event or {}).get("version") == "2.0"
+        and "gzip" in request_headers.get("accept-encoding", "")
+    ):
+        response_headers["Content-Encoding"] = "gzip"
+        response_headers["Vary"] = "Accept-Encoding"
+        return {
+            "statusCode": status_code,
+            "headers": response_headers,
+            "body": base64.b64encode(gzip.compress(payload, compresslevel=6)).decode(),
+            "isBase64Encoded": True,
+        }
+
+    return {
+        "statusCode": status_code,
+        "headers": response_headers,
+        "body": payload.decode(),
+        "isBase64Encoded": False,
+    }
+
+
+def _request_method(event: dict) -> str:
+    """
+    The http method of a REST API (payload 1.0) or HTTP API / function URL (payload
+    2.0) event.
+    """
+    event = event or {}
+    if "httpMethod" in event:
+        return event["httpMethod"]
+    return event.get("requestContext", {}).get("http", {}).get("method", "GET")
+
+
+def _lower_case_headers(event: dict) -> dict:
+    """
+    Request headers keyed by lower case name, as clients and API Gateway do not agree
+    on a case.
+    """
+    return {
+        key.lower(): value
+        for key, value in ((event or {}).get("headers") or {}).items()
+        if isinstance(value, str)
+    }
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Weak comparison of an ETag against an If-None-Match header, which can be * or a
+    comma separated list of tags.
+    """
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (tag[2:] if tag.startswith("W/") else tag) == opaque_tag
+        for tag in (tag.strip() for tag in if_none_match.split(","))
+    )
+
+
+def has_time_remaining(context, reserve_ms: int = 10000) -> bool:
+    """
+    Checks the lambda context to see if there is still time to do more work before the
+    function times out, leaving reserve_ms for wrapping up (such as checkpointing and
+    reporting back to a CodePipeline).
+
+    Parameters:
+        context: [LambdaContext] - the context passed to the handler. If None, or it
+            does not report remaining time (such as in a local run), this is always True.
+        reserve_ms: [int] - milliseconds to keep in hand.
+
+    Returns:
+        [bool] True if more work can be started.
+    """
+    get_remaining_time = getattr(context, "get_remaining_time_in_millis", None)
 
-            return json.dumps(cleaned_output)
+    if get_remaining_time is None:
+        return True
 
-        return json.dumps(output)
+    return get_remaining_time() > reserve_ms
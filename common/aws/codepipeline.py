@@ -1,20 +1,41 @@
 import json
 import os
 from dataclasses import dataclass, field
+from functools import lru_cache
 
 import boto3
 from aws_lambda_powertools import Logger
 from botocore.exceptions import ClientError
 
 from common.aws.aws_lambda import LambdaVariables
+from common.aws.pipeline_artifacts import ArtifactReader, ArtifactWriter
 
 logger = Logger(child=True)
 
+# CodePipeline rejects continuation tokens longer than this.
+MAX_CONTINUATION_TOKEN_LENGTH = 2048
+
+# The key CodePipeline puts the job under when it invokes a lambda.
+PIPELINE_JOB_KEY = "CodePipeline.job"
+
+
+@lru_cache(maxsize=None)
+def get_codepipeline_client():
+    """
+    A single CodePipeline client for the life of the process, so warm lambdas and job
+    workers do not pay for building a new client on every job.
+    """
+    return boto3.client("codepipeline")
+
 
 @dataclass
 class PipelineTokens(LambdaVariables):
     """
     Class for handling the incoming event to a AWS Lambda that is part of a CodePipeline.
+
+    If a previous invocation of this same action called put_job_success with a
+    continuation_token, CodePipeline re-invokes the action and the decoded token is
+    available as continuation_token, so the lambda can resume where it stopped.
     """
 
     job_id: str = field(init=False)
@@ -22,10 +43,12 @@ class PipelineTokens(LambdaVariables):
     input_artifacts: list = field(default=None, init=False)
     input_credentials: dict = field(default=None, init=False)
     output_artifacts: list = field(default=None, init=False)
+    encryption_key: dict = field(default=None, init=False)
+    continuation_token: dict = field(default=None, init=False)
     client: boto3.Session.client = field(default=None, init=False)
 
     def __post_init__(self):
-        codepipeline_job_info = self.event["CodePipeline.job"]
+        codepipeline_job_info = self.event[PIPELINE_JOB_KEY]
         self.job_id = codepipeline_job_info["id"]
         self.input_parameters = json.loads(
             codepipeline_job_info["data"]["actionConfiguration"]["configuration"].get(
@@ -37,21 +60,107 @@ class PipelineTokens(LambdaVariables):
             "artifactCredentials"
         )
         self.output_artifacts = codepipeline_job_info["data"].get("outputArtifacts")
-        self.client = boto3.client("codepipeline")
+        self.encryption_key = codepipeline_job_info["data"].get("encryptionKey")
+        self._decode_continuation_token(
+            codepipeline_job_info["data"].get("continuationToken")
+        )
+        self.client = get_codepipeline_client()
 
         values_to_log = {**self.input_parameters, **{"job_id": self.job_id}}
         logger.append_keys(**values_to_log)
 
-    def put_job_success(self, output_variables: dict) -> dict:
+    def artifact_reader(self, artifact_name: str = None, **kwargs) -> ArtifactReader:
         """
-        sends the Job Success token back to the pipeline that spawned this process
+        Returns an ArtifactReader for one of the input artifacts, using the temporary
+        artifact credentials from the job. Only the parts of the artifact zip that are
+        read are downloaded.
+
+        Parameters:
+            artifact_name: [str][OPTIONAL] - the name of the input artifact. If None
+                the first input artifact is used.
+            **kwargs: passed through to ArtifactReader (such as client or block_size)
+
+        Raises:
+            KeyError if there are no input artifacts or none match artifact_name
         """
+        for artifact in self.input_artifacts or []:
+            if artifact_name is None or artifact.get("name") == artifact_name:
+                return ArtifactReader(artifact, self.input_credentials, **kwargs)
 
-        logger.info("Success", extra=output_variables)
-        return self.client.put_job_success_result(
-            jobId=self.job_id, outputVariables=output_variables
+        raise KeyError(f"No input artifact named {artifact_name} for job {self.job_id}")
+
+    def artifact_writer(self, artifact_name: str = None, **kwargs) -> ArtifactWriter:
+        """
+        Returns an ArtifactWriter that streams a zip into one of the output artifacts,
+        using the temporary artifact credentials and encryption key from the job. Use it
+        as a context manager so the upload is completed (or aborted on an error) before
+        put_job_success is called.
+
+        Parameters:
+            artifact_name: [str][OPTIONAL] - the name of the output artifact. If None
+                the first output artifact is used.
+            **kwargs: passed through to ArtifactWriter (such as client or part_size)
+
+        Raises:
+            KeyError if there are no output artifacts or none match artifact_name
+        """
+        for artifact in self.output_artifacts or []:
+            if artifact_name is None or artifact.get("name") == artifact_name:
+                return ArtifactWriter(
+                    artifact, self.input_credentials, self.encryption_key, **kwargs
+                )
+
+        raise KeyError(
+            f"No output artifact named {artifact_name} for job {self.job_id}"
         )
 
+    def put_job_success(
+        self, output_variables: dict = None, continuation_token: dict = None
+    ) -> dict:
+        """
+        sends the Job Success token back to the pipeline that spawned this process
+
+        Parameters:
+            output_variables: [dict][OPTIONAL] - the action's output variables. All
+                values must be strings.
+            continuation_token: [dict][OPTIONAL] - if provided, the job is reported as
+                still in progress and CodePipeline re-invokes the action with this
+                token (decoded into continuation_token). CodePipeline does not accept
+                output variables along with a continuation token, so output_variables
+                is ignored in that case.
+
+        Raises:
+            ValueError if the encoded continuation token is too long for CodePipeline.
+        """
+
+        if continuation_token is not None:
+            encoded_token = json.dumps(continuation_token, separators=(",", ":"))
+
+            if len(encoded_token) > MAX_CONTINUATION_TOKEN_LENGTH:
+                raise ValueError(
+                    f"Continuation token is {len(encoded_token)} characters, "
+                    + f"CodePipeline allows {MAX_CONTINUATION_TOKEN_LENGTH}"
+                )
+
+            logger.info("Continuing", extra={"continuationToken": continuation_token})
+            return self.client.put_job_success_result(
+                jobId=self.job_id, continuationToken=encoded_token
+            )
+
+        result = {"jobId": self.job_id}
+        if output_variables is not None:
+            result["outputVariables"] = output_variables
+
+        logger.info("Success", extra=output_variables or {})
+        return self.client.put_job_success_result(**result)
+
+    def put_job_continuation(self, progress: dict) -> dict:
+        """
+        Checkpoints a job that could not finish in this invocation. CodePipeline will
+        invoke the action again with `progress` available as continuation_token.
+        """
+        return self.put_job_success(continuation_token=progress)
+
     def put_job_failure(self, message: str, e: Exception = None) -> dict:
         """
         sends the Job Failure token back to the pipeline that spawned this process
@@ -64,6 +173,21 @@ class PipelineTokens(LambdaVariables):
             jobId=self.job_id, failureDetails={"type": "JobFailed", "message": message}
         )
 
+    def _decode_continuation_token(self, token: str):
+        """
+        Continuation tokens written by put_job_success are json. Anything else is kept
+        as the raw string under "token".
+        """
+        if token is None:
+            return
+
+        try:
+            self.continuation_token = json.loads(token)
+        except ValueError:
+            self.continuation_token = {"token": token}
+
+        logger.append_keys(continuationToken=self.continuation_token)
+
 
 def get_cross_account_client(service: str = "s3", type: str = "client", role_arn=None):
     """
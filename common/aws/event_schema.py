@@ -0,0 +1,181 @@
+import base64
+import json
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Any, Callable, List, Tuple
+
+# dataclass field metadata key holding the EventField for a field.
+EVENT_FIELD = "event_field"
+
+
+class EventValidationError(ValueError):
+    """
+    Raised when an event does not match the event_fields of a LambdaVariables class.
+    Every problem with the event is collected before raising, in errors.
+    """
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("Invalid event: " + "; ".join(errors))
+
+
+@dataclass(frozen=True)
+class EventField:
+    """
+    Where in the event a field is found and what is expected of it. Created by
+    event_field(), see there.
+    """
+
+    path: Tuple[Any, ...]
+    type: Any = None
+    required: bool = False
+
+    @property
+    def name(self) -> str:
+        return ".".join(str(key) for key in self.path)
+
+
+def event_field(
+    path: str,
+    type: Any = None,
+    required: bool = False,
+    default: Any = None,
+    default_factory: Callable = MISSING,
+):
+    """
+    Declares a LambdaVariables field that is filled in from the event, in place of
+    parsing the event by hand in __post_init__:
+
+        @dataclass
+        class QuoteVariables(LambdaVariables):
+            quote_id: str = event_field("pathParameters.quoteId", str, required=True)
+            state: str = event_field("body.address.state", str, default="OH")
+
+    Parameters:
+        path: [str] - dotted path to the value in the event. Numeric parts index into
+            lists. Paths starting with body read from the API Gateway body, which is
+            json decoded (and base64 decoded if need be) once for all fields.
+        type: [type or tuple of types][OPTIONAL] - the value must be an instance of this.
+            float also accepts int.
+        required: [bool][OPTIONAL] - it is an error for the value to be missing or None.
+        default / default_factory: [OPTIONAL] - the value used when it is not in the
+            event.
+
+    Returns:
+        a dataclass field (init=False) carrying the EventField in its metadata.
+    """
+    if type is float:
+        type = (int, float)
+
+    metadata = {
+        EVENT_FIELD: EventField(
+            path=tuple(int(key) if key.isdigit() else key for key in path.split(".")),
+            type=type,
+            required=required,
+        )
+    }
+
+    if default_factory is not MISSING:
+        return field(init=False, default_factory=default_factory, metadata=metadata)
+
+    return field(init=False, default=default, metadata=metadata)
+
+
+def extract_event_fields(instance):
+    """
+    Validates instance.event against the event_fields of its class and sets each field
+    found in it, in a single pass. Fields not found keep their defaults.
+
+    Raises:
+        EventValidationError listing every invalid or missing value.
+    """
+    extractor = _extractors.get(type(instance))
+    if extractor is None:
+        extractor = _extractors[type(instance)] = _compile_extractor(type(instance))
+
+    if extractor is not _NO_EVENT_FIELDS:
+        extractor(instance, instance.event)
+
+
+_extractors = {}
+
+
+def _NO_EVENT_FIELDS(instance, event):
+    return None
+
+
+def _compile_extractor(cls):
+    """
+    Generates the source of an extractor function for the event_fields of cls and
+    compiles it, so that each field is a straight run of subscripts and isinstance
+    checks rather than a walk over the schema.
+    """
+    event_fields = [
+        (class_field.name, class_field.metadata[EVENT_FIELD])
+        for class_field in fields(cls)
+        if EVENT_FIELD in class_field.metadata
+    ]
+
+    if not event_fields:
+        return _NO_EVENT_FIELDS
+
+    namespace = {
+        "json": json,
+        "b64decode": base64.b64decode,
+        "EventValidationError": EventValidationError,
+    }
+    lines = ["def extract(self, event):", "    errors = []"]
+
+    if any(event_field.path[0] == "body" for _, event_field in event_fields):
+        lines += [
+            "    try:",
+            "        body = event['body']",
+            "    except (KeyError, TypeError):",
+            "        body = None",
+            "    if isinstance(body, (str, bytes)):",
+            "        try:",
+            "            if event.get('isBase64Encoded'):",
+            "                body = b64decode(body)",
+            "            body = json.loads(body) if body else None",
+            "        except ValueError:",
+            "            errors.append('body is not valid JSON')",
+            "            body = None",
+        ]
+
+    for index, (attribute, event_field) in enumerate(event_fields):
+        if event_field.path[0] == "body":
+            source = "body" + "".join(f"[{key!r}]" for key in event_field.path[1:])
+        else:
+            source = "event" + "".join(f"[{key!r}]" for key in event_field.path)
+
+        lines += [
+            "    try:",
+            f"        value = {source}",
+            "    except (KeyError, IndexError, TypeError):",
+            "        value = None",
+            "    if value is None:",
+            (
+                f"        errors.append({event_field.name + ' is required'!r})"
+                if event_field.required
+                else "        pass"
+            ),
+        ]
+
+        if event_field.type is not None:
+            namespace[f"type_{index}"] = event_field.type
+            expected = (
+                " or ".join(t.__name__ for t in event_field.type)
+                if isinstance(event_field.type, tuple)
+                else event_field.type.__name__
+            )
+            lines += [
+                f"    elif not isinstance(value, type_{index}):",
+                f"        errors.append({event_field.name + ' must be ' + expected!r}"
+                " + ', not ' + type(value).__name__)",
+            ]
+
+        lines += ["    else:", f"        self.{attribute} = value"]
+
+    lines += ["    if errors:", "        raise EventValidationError(errors)"]
+
+    exec("\n".join(lines), namespace)
+    return namespace["extract"]
@@ -0,0 +1,187 @@
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+from aws_lambda_powertools import Logger
+
+from common.aws.aws_lambda import has_time_remaining
+from common.aws.codepipeline import (
+    PIPELINE_JOB_KEY,
+    PipelineTokens,
+    get_codepipeline_client,
+)
+
+logger = Logger(child=True)
+
+
+@dataclass
+class JobWorkerSummary:
+    """
+    Counts of what a job worker did, for logging and for the scheduled lambda's return
+    value.
+    """
+
+    polled: int = 0
+    claimed: int = 0
+    processed: int = 0
+    failed: int = 0
+
+    def add(self, other: "JobWorkerSummary"):
+        self.polled += other.polled
+        self.claimed += other.claimed
+        self.processed += other.processed
+        self.failed += other.failed
+
+    def as_dict(self) -> dict:
+        return self.__dict__.copy()
+
+
+@dataclass
+class CustomActionJobWorker:
+    """
+    Claims and processes CodePipeline jobs for a Custom action type in batches, across
+    every pipeline that uses the action, instead of having CodePipeline invoke a lambda
+    per action execution.
+
+    Jobs are polled with PollForJobs, claimed with AcknowledgeJob and handed to
+    process_job as PipelineTokens - exactly what a LambdaInvokeAction lambda receives -
+    so the same process_job can serve both modes. process_job is expected to call
+    put_job_success / put_job_failure (or put_job_continuation) itself; if it raises,
+    the worker fails the job.
+
+    The CodePipeline client is shared between jobs and invocations.
+
+    Parameters:
+        action_type_id: [dict] - the actionTypeId of the Custom action, with the keys
+            category, owner, provider and version.
+        process_job: [Callable[[PipelineTokens], Any]] - called once per claimed job.
+        max_batch_size: [int] - the most jobs claimed per poll.
+        client: [boto3 codepipeline client][OPTIONAL] - a client to use instead of the
+            shared one, such as a local stand-in for tests.
+
+    Methods:
+        from_environment(process_job) - builds a worker from the JOB_WORKER_* env
+            variables set by stacks.pipeline.custom_actions.JobWorker.
+        run_batch() - polls once and processes whatever was claimed.
+        run(context) - keeps running batches until there are no jobs left or the
+            lambda is running out of time.
+    """
+
+    action_type_id: Dict[str, str]
+    process_job: Callable[[PipelineTokens], Any]
+    max_batch_size: int = field(default=10)
+    client: Any = field(default=None)
+
+    def __post_init__(self):
+        if self.client is None:
+            self.client = get_codepipeline_client()
+
+    @classmethod
+    def from_environment(
+        cls, process_job: Callable[[PipelineTokens], Any], **kwargs
+    ) -> "CustomActionJobWorker":
+        """
+        Necessary Environment Variables:
+            JOB_WORKER_CATEGORY: the Custom action category, such as Invoke.
+            JOB_WORKER_PROVIDER: the Custom action provider name.
+            JOB_WORKER_VERSION: the Custom action version.
+        """
+        return cls(
+            action_type_id={
+                "category": os.environ["JOB_WORKER_CATEGORY"],
+                "owner": "Custom",
+                "provider": os.environ["JOB_WORKER_PROVIDER"],
+                "version": os.environ["JOB_WORKER_VERSION"],
+            },
+            process_job=process_job,
+            **kwargs,
+        )
+
+    def run(self, context=None, reserve_ms: int = 10000) -> dict:
+        """
+        Runs batches until a poll comes back empty or there is less than reserve_ms
+        left before the lambda times out.
+
+        Returns:
+            [dict] the JobWorkerSummary of every batch run.
+        """
+        summary = JobWorkerSummary()
+
+        while has_time_remaining(context, reserve_ms):
+            batch = self.run_batch()
+            summary.add(batch)
+
+            if batch.polled == 0:
+                break
+
+        logger.info("Job worker finished", extra=summary.as_dict())
+        return summary.as_dict()
+
+    def run_batch(self) -> JobWorkerSummary:
+        """
+        Polls for up to max_batch_size jobs, claims each one and processes it.
+        """
+        jobs = self._poll()
+        summary = JobWorkerSummary(polled=len(jobs))
+
+        for job in jobs:
+            if not self._acknowledge(job):
+                continue
+
+            summary.claimed += 1
+            if self._process(job):
+                summary.processed += 1
+            else:
+                summary.failed += 1
+
+        return summary
+
+    def _poll(self) -> List[dict]:
+        return self.client.poll_for_jobs(
+            actionTypeId=self.action_type_id, maxBatchSize=self.max_batch_size
+        ).get("jobs", [])
+
+    def _acknowledge(self, job: dict) -> bool:
+        """
+        Claims the job. Returns False if another worker got to it first.
+        """
+        try:
+            response = self.client.acknowledge_job(jobId=job["id"], nonce=job["nonce"])
+        except self.client.exceptions.InvalidNonceException:
+            logger.info("Job already claimed", extra={"job_id": job["id"]})
+            return False
+
+        return response.get("status") == "InProgress"
+
+    def _process(self, job: dict) -> bool:
+        pipeline_values = None
+        try:
+            pipeline_values = PipelineTokens(
+                {
+                    PIPELINE_JOB_KEY: {
+                        "id": job["id"],
+                        "accountId": job.get("accountId"),
+                        "data": job["data"],
+                    }
+                }
+            )
+            pipeline_values.client = self.client
+            self.process_job(pipeline_values)
+            return True
+
+        except Exception as e:
+            logger.exception("Job failed", extra={"job_id": job["id"]})
+            if pipeline_values is not None:
+                pipeline_values.put_job_failure(f"Job worker failed: {e}", e)
+            else:
+                self.client.put_job_failure_result(
+                    jobId=job["id"],
+                    failureDetails={"type": "JobFailed", "message": str(e)},
+                )
+            return False
+
+        finally:
+            # PipelineTokens appends the job's parameters to the shared log keys, so
+            # they must not carry over into the logs of the next job.
+            if pipeline_values is not None:
+                logger.remove_keys([*pipeline_values.input_parameters, "job_id"])
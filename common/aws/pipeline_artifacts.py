@@ -0,0 +1,529 @@
+import errno
+import io
+import json
+import zipfile
+from typing import IO, Any, Iterator, List, Optional, Tuple, Union
+
+import boto3
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+
+logger = Logger(child=True)
+
+# Size of a single ranged GET. The first read of an artifact fetches this many bytes
+# from the end of the object, which covers the zip's central directory for all but the
+# very largest artifacts.
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+# S3 requires every part of a multipart upload except the last to be at least 5 MiB.
+# This is also the most an ArtifactWriter holds in memory at any one time.
+MINIMUM_PART_SIZE = 5 * 1024 * 1024
+
+
+def get_artifact_s3_client(credentials: Optional[dict] = None):
+    """
+    Builds an S3 client from the temporary `artifactCredentials` CodePipeline passes to
+    a job. These are the only credentials guaranteed to be able to read (and decrypt)
+    the pipeline's artifact bucket.
+
+    Parameters:
+        credentials: [dict] - the `artifactCredentials` block of the job data. If None
+            the default credential chain is used instead.
+
+    Returns:
+        boto3 s3 client
+    """
+    if credentials is None:
+        return boto3.client("s3")
+
+    return boto3.client(
+        "s3",
+        aws_access_key_id=credentials["accessKeyId"],
+        aws_secret_access_key=credentials["secretAccessKey"],
+        aws_session_token=credentials["sessionToken"],
+    )
+
+
+def get_encryption_args(encryption_key: Optional[dict] = None) -> dict:
+    """
+    Returns the S3 server side encryption arguments for the `encryptionKey` block of
+    the job data, so written artifacts are encrypted the same way CodePipeline encrypts
+    its own. Returns an empty dict if there is no key.
+    """
+    if encryption_key is None or encryption_key.get("type") != "KMS":
+        return {}
+
+    return {"ServerSideEncryption": "aws:kms", "SSEKMSKeyId": encryption_key["id"]}
+
+
+def get_artifact_location(artifact: dict) -> Tuple[str, str]:
+    """
+    Returns the (bucket, key) of an input or output artifact entry from the job data.
+
+    Raises:
+        ValueError if the artifact is not stored in S3
+    """
+    location = artifact.get("location", {})
+    if location.get("type", "S3") != "S3":
+        raise ValueError(
+            f"Artifact {artifact.get('name')} is not stored in S3 ({location.get('type')})"
+        )
+
+    return (
+        location["s3Location"]["bucketName"],
+        location["s3Location"]["objectKey"],
+    )
+
+
+class S3RangeFile(io.RawIOBase):
+    """
+    A read only, seekable file-like object over an S3 object that only ever fetches the
+    byte ranges that are actually read.
+
+    Small reads are served from a single cached block of `block_size` bytes, reads
+    larger than a block go straight to S3. Reads near the end of the object fetch a
+    block that ends at the end of the object, so the tail of a zip (end of central
+    directory record, comment and central directory) usually comes back in one GET.
+
+    Parameters:
+        client: [boto3 s3 client] - client with read access to the object.
+        bucket: [str] - bucket name.
+        key: [str] - object key.
+        block_size: [int] - size in bytes of each ranged GET.
+
+    Properties:
+        requests: [int] - number of GET requests made so far. Useful for logging and
+            for confirming the whole artifact was not downloaded.
+    """
+
+    def __init__(
+        self, client, bucket: str, key: str, block_size: int = DEFAULT_BLOCK_SIZE
+    ):
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._block_size = block_size
+        self._size = None
+        self._position = 0
+        self._block_start = 0
+        self._block = b""
+        self.requests = 0
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of the object. The first access fetches the last block of the object
+        with a suffix range, which both sizes the object and primes the block cache.
+        """
+        if self._size is None:
+            try:
+                response = self._get_object(f"bytes=-{self._block_size}")
+            except ClientError as error:
+                # A suffix range is only unsatisfiable on an empty object, which S3
+                # answers with a 416
+                if error.response["Error"]["Code"] != "InvalidRange":
+                    raise
+                self._size = 0
+                return self._size
+
+            self._block = response["Body"].read()
+            # ContentRange is of the form "bytes start-end/total", and is left out
+            # when the whole object comes back
+            content_range = response.get("ContentRange")
+            if content_range:
+                self._size = int(content_range.rsplit("/", 1)[1])
+            else:
+                self._size = len(self._block)
+            self._block_start = self._size - len(self._block)
+
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+
+        if position < 0:
+            # an OSError like a real file's, which zipfile expects of an object too
+            # short to be a zip
+            raise OSError(errno.EINVAL, "Negative seek position")
+
+        self._position = position
+        return self._position
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.size - self._position
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+
+        if size <= 0:
+            return b""
+
+        block_end = self._block_start + len(self._block)
+        if self._block_start <= self._position and self._position + size <= block_end:
+            offset = self._position - self._block_start
+            data = self._block[offset : offset + size]
+
+        elif size >= self._block_size:
+            data = self._get_range(self._position, size)
+
+        else:
+            # Anchor blocks near the end of the object to the end of the object, so
+            # a read in the tail pulls in everything after it as well.
+            start = min(self._position, max(0, self.size - self._block_size))
+            self._block = self._get_range(start, self._block_size)
+            self._block_start = start
+            offset = self._position - start
+            data = self._block[offset : offset + size]
+
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def _get_range(self, start: int, length: int) -> bytes:
+        end = min(start + length, self.size) - 1
+        return self._get_object(f"bytes={start}-{end}")["Body"].read()
+
+    def _get_object(self, byte_range: str) -> dict:
+        self.requests += 1
+        return self._client.get_object(
+            Bucket=self._bucket, Key=self._key, Range=byte_range
+        )
+
+
+class S3MultipartFile(io.RawIOBase):
+    """
+    A write only, non-seekable file-like object that streams everything written to it
+    into an S3 object with a multipart upload.
+
+    At most one part is ever held in memory. If the whole object ends up smaller than
+    one part it is sent with a single put_object instead.
+
+    Parameters:
+        client: [boto3 s3 client] - client with write access to the bucket.
+        bucket: [str] - bucket name.
+        key: [str] - object key.
+        part_size: [int] - size in bytes of each uploaded part. Must be at least
+            MINIMUM_PART_SIZE.
+        extra_args: [dict] - additional arguments for the upload, such as the
+            encryption arguments from get_encryption_args().
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        key: str,
+        part_size: int = MINIMUM_PART_SIZE,
+        extra_args: Optional[dict] = None,
+    ):
+        super().__init__()
+        if part_size < MINIMUM_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MINIMUM_PART_SIZE} bytes")
+
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = part_size
+        self._extra_args = extra_args or {}
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        if self.closed:
+            raise ValueError("write to closed file")
+
+        self._buffer += data
+        self._position += len(data)
+
+        while len(self._buffer) >= self._part_size:
+            self._upload_part(bytes(self._buffer[: self._part_size]))
+            del self._buffer[: self._part_size]
+
+        return len(data)
+
+    def close(self):
+        """
+        Uploads whatever is left in the buffer and completes the upload.
+        """
+        if self.closed:
+            return
+
+        try:
+            if self._upload_id is None:
+                self._client.put_object(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    Body=bytes(self._buffer),
+                    **self._extra_args,
+                )
+            else:
+                if self._buffer:
+                    self._upload_part(bytes(self._buffer))
+
+                self._client.complete_multipart_upload(
+                    Bucket=self._bucket,
+                    Key=self._key,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": self._parts},
+                )
+        except Exception:
+            self.abort()
+            raise
+
+        self._buffer = bytearray()
+        super().close()
+
+    def abort(self):
+        """
+        Abandons the upload. Nothing is written to the key and any uploaded parts are
+        discarded.
+        """
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+            self._upload_id = None
+
+        self._buffer = bytearray()
+        super().close()
+
+    def _upload_part(self, data: bytes):
+        if self._upload_id is None:
+            self._upload_id = self._client.create_multipart_upload(
+                Bucket=self._bucket, Key=self._key, **self._extra_args
+            )["UploadId"]
+
+        part_number = len(self._parts) + 1
+        response = self._client.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=data,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+
+class ArtifactReader:
+    """
+    Reads individual files out of a CodePipeline artifact zip without downloading or
+    unzipping the whole artifact.
+
+    Only the zip's central directory is fetched up front (with ranged GETs using the
+    artifact credentials), and members are streamed from S3 as they are read, so memory
+    and latency stay flat no matter how large the artifact is.
+
+    Parameters:
+        artifact: [dict] - an entry from the job's `inputArtifacts`.
+        credentials: [dict] - the job's `artifactCredentials`.
+        client: [boto3 s3 client][OPTIONAL] - use this client instead of building one
+            from the credentials.
+        block_size: [int][OPTIONAL] - size in bytes of each ranged GET.
+
+    Methods:
+        namelist() - names of all the members of the artifact.
+        open(member) - a streaming, read only file object for a member.
+        read(member) - the full bytes of a member.
+        read_json(member) - a member parsed as json, such as `cdk-outputs.json`.
+        iter_chunks(member, chunk_size) - yields a member in chunks.
+
+    Example:
+        with pipeline_values.artifact_reader("BuildArtifact") as artifact:
+            outputs = artifact.read_json("cdk-outputs.json")
+    """
+
+    def __init__(
+        self,
+        artifact: dict,
+        credentials: Optional[dict] = None,
+        client=None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+    ):
+        self.name = artifact.get("name")
+        self.bucket, self.key = get_artifact_location(artifact)
+        self._file = S3RangeFile(
+            client if client is not None else get_artifact_s3_client(credentials),
+            self.bucket,
+            self.key,
+            block_size,
+        )
+        self._zip = None
+
+    @property
+    def zip(self) -> zipfile.ZipFile:
+        """
+        The ZipFile over the artifact. Reading the central directory happens on first
+        access.
+        """
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self._file)
+            logger.debug(
+                "Read artifact central directory",
+                extra={
+                    "artifactName": self.name,
+                    "artifactSize": self._file.size,
+                    "members": len(self._zip.infolist()),
+                    "s3Requests": self._file.requests,
+                },
+            )
+
+        return self._zip
+
+    def namelist(self) -> List[str]:
+        return self.zip.namelist()
+
+    def open(self, member: str) -> IO[bytes]:
+        """
+        Opens a member of the artifact for streaming reads.
+
+        Raises:
+            KeyError if the member is not in the artifact.
+        """
+        return self.zip.open(member)
+
+    def read(self, member: str) -> bytes:
+        with self.open(member) as file:
+            return file.read()
+
+    def read_json(self, member: str) -> Any:
+        with self.open(member) as file:
+            return json.load(file)
+
+    def iter_chunks(
+        self, member: str, chunk_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Iterator[bytes]:
+        with self.open(member) as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+        self._file.close()
+
+    def __enter__(self) -> "ArtifactReader":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ArtifactWriter:
+    """
+    Writes a CodePipeline output artifact as a zip, streamed straight into the
+    artifact's S3 location with a multipart upload. Nothing is staged in `/tmp` and at
+    most one upload part is held in memory, so lambdas can emit large results (card
+    lists, deployment manifests) that would not fit in output variables.
+
+    The upload is only completed when the writer is closed. If the `with` block raises,
+    the upload is aborted and nothing is written.
+
+    Parameters:
+        artifact: [dict] - an entry from the job's `outputArtifacts`.
+        credentials: [dict] - the job's `artifactCredentials`.
+        encryption_key: [dict][OPTIONAL] - the job's `encryptionKey`.
+        client: [boto3 s3 client][OPTIONAL] - use this client instead of building one
+            from the credentials.
+        part_size: [int][OPTIONAL] - size in bytes of each uploaded part.
+        compression: [int][OPTIONAL] - zipfile compression constant.
+
+    Methods:
+        open(member) - a streaming, write only file object for a new member.
+        write(member, data) - writes bytes or a string as a member.
+        write_json(member, value) - writes a value as a json member.
+
+    Example:
+        with pipeline_values.artifact_writer() as artifact:
+            artifact.write_json("cards.json", card_numbers)
+    """
+
+    def __init__(
+        self,
+        artifact: dict,
+        credentials: Optional[dict] = None,
+        encryption_key: Optional[dict] = None,
+        client=None,
+        part_size: int = MINIMUM_PART_SIZE,
+        compression: int = zipfile.ZIP_DEFLATED,
+    ):
+        self.name = artifact.get("name")
+        self.bucket, self.key = get_artifact_location(artifact)
+        self._file = S3MultipartFile(
+            client if client is not None else get_artifact_s3_client(credentials),
+            self.bucket,
+            self.key,
+            part_size,
+            get_encryption_args(encryption_key),
+        )
+        self.zip = zipfile.ZipFile(self._file, mode="w", compression=compression)
+
+    def open(self, member: str, force_zip64: bool = False) -> IO[bytes]:
+        """
+        Opens a new member for streaming writes. Pass force_zip64=True if the member
+        may be larger than 2 GiB.
+        """
+        return self.zip.open(member, mode="w", force_zip64=force_zip64)
+
+    def write(self, member: str, data: Union[bytes, str]):
+        self.zip.writestr(member, data)
+
+    def write_json(self, member: str, value: Any):
+        with io.TextIOWrapper(self.open(member), encoding="utf-8") as file:
+            json.dump(value, file)
+
+    def close(self):
+        self.zip.close()
+        self._file.close()
+        logger.debug(
+            "Wrote output artifact",
+            extra={"artifactName": self.name, "artifactSize": self._file.tell()},
+        )
+
+    def abort(self):
+        self._file.abort()
+        try:
+            # Releases the zip's hold on the file. Writing the end record fails now
+            # that the upload is gone, which is expected.
+            self.zip.close()
+        except ValueError:
+            pass
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, exception_type, *args):
+        if exception_type is not None:
+            self.abort()
+        else:
+            self.close()
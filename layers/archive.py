@@ -0,0 +1,62 @@
+"""
+Zips that are byte for byte the same whenever their contents are. cdk hashes a zip asset
+(the layers) by its bytes, so a zip that changed only in its mtimes, entry order or
+permissions would be uploaded and published as a new layer version on every deploy, and
+every function using it updated with it.
+
+Directory assets (the lambda code) need none of this - cdk hashes their file contents.
+"""
+
+import os
+import zipfile
+from typing import Iterable, Tuple
+
+# The earliest time a zip can record
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+FILE_MODE = 0o644
+EXECUTABLE_MODE = 0o755
+
+# Made on unix, so the modes in external_attr are read by whatever unzips it
+UNIX_SYSTEM = 3
+
+COMPRESS_LEVEL = 9
+
+
+def write_zip(archive: str, files: Iterable[Tuple[str, str]], comment: str = ""):
+    """
+    Writes a deterministic zip: the entries in sorted order, each with the same date and
+    time, a mode of 644 (755 when it was executable), and compressed at the same level.
+
+    Parameters:
+        archive: [str] - the zip to write.
+        files: [Iterable[Tuple[str, str]]] - (path on disk, path in the zip) of each
+            file.
+        comment: [str] - the zip comment.
+    """
+    entries = sorted((arcname.replace(os.sep, "/"), path) for path, arcname in files)
+
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as output:
+        for arcname, path in entries:
+            info = zipfile.ZipInfo(arcname, date_time=FIXED_DATE_TIME)
+            info.create_system = UNIX_SYSTEM
+            mode = EXECUTABLE_MODE if os.stat(path).st_mode & 0o111 else FILE_MODE
+            info.external_attr = (0o100000 | mode) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+
+            with open(path, "rb") as source:
+                output.writestr(info, source.read(), compresslevel=COMPRESS_LEVEL)
+
+        output.comment = comment.encode()
+
+
+def directory_files(base_directory: str, directory: str) -> Iterable[Tuple[str, str]]:
+    """
+    Returns:
+        [Iterable[Tuple[str, str]]] (path on disk, path in the zip) of every file under
+        base_directory/directory, with the paths in the zip relative to base_directory.
+    """
+    for path, _, names in os.walk(os.path.join(base_directory, directory)):
+        for name in names:
+            file_path = os.path.join(path, name)
+            yield file_path, os.path.relpath(file_path, base_directory)
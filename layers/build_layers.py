@@ -0,0 +1,613 @@
+"""
+Builds the lambda layer zips (the pipeline layer and the common layer) that `make` used to
+rebuild from scratch every time, skipping any layer whose inputs have not changed.
+
+A layer's key is a hash of everything its zip is built from: its requirements file, the
+sources copied into it (common/), and the python version and architectures it is built
+for. Every zip built has its key as its zip comment, so a zip already in place with the
+same key is left alone.
+
+The requirements are installed for the lambda, not for the machine building it: pip
+takes only the wheels for the lambda's python version, architecture (the first of the
+layer config's compatible_architectures) and glibc, whatever python and cpu run the
+build. A requirement with only an sdist is built into a wheel first, which works for a
+pure python one; a compiled one with no such wheel fails the build. A layer compatible
+with more than one architecture has to be pure python, and fails the build if it is not.
+
+A build installs the requirements, copies the sources in, then slims the result (see
+slim.py): prunes tests, docs, type stubs and most of the .dist-info, byte-compiles it
+for the lambda's python version (with python<version> from the PATH - without one the
+layer ships no bytecode) and, for layers with strip_sources, removes the sources the
+bytecode replaces. It prints the size of each package, and fails without replacing the
+zip if the layer is over its size_budget_mb. The zip itself is deterministic (see
+archive.py), so a layer built again from the same inputs keeps its asset hash and is not
+published again.
+
+The layers are built concurrently, each in its own temporary directory. Built zips are
+stored in a cache directory as <layer>-<key>.zip and copied from there on a hit, and the
+wheels pip downloads for any layer are kept in its wheels/ directory, where the
+other layers (and later builds) find them instead of downloading them again. --cache-dir,
+or the LAYER_CACHE_DIR env variable, defaults to ~/.cache/layer_builds. Point it at a
+CodeBuild cache path to share it between builds.
+
+Usage, from the repository root:
+    python -m layers.build_layers
+    python -m layers.build_layers common_layer --force
+    python -m layers.build_layers --keys
+    python -m layers.build_layers --jobs 1
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from cdk_configs.resource_configurations.common_configs import LambdaArchitecture
+from cdk_configs.resource_configurations.lambda_configs import (
+    PIPELINE_LAYERS,
+    PRODUCT_LAYERS,
+)
+from cdk_configs.resource_names import DeploymentResourceName, ProductLambdaName
+from cdk_configs.utilities.color import as_fail, as_warning
+from layers import slim
+from layers.archive import directory_files, write_zip
+
+CACHE_DIR_ENV_VARIABLE = "LAYER_CACHE_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "layer_builds")
+WHEELHOUSE_DIRECTORY = "wheels"
+
+PIP = [sys.executable, "-m", "pip", "--disable-pip-version-check", "--quiet"]
+
+# Must match the compatible_runtimes of PipelineLayerConfigs and ProductLayerConfigs
+LAMBDA_PYTHON_VERSION = "3.9"
+
+# The lambda python3.9 runtime runs on Amazon Linux 2, with glibc 2.26
+LAMBDA_GLIBC_VERSION = (2, 26)
+# The oldest glibc of a manylinux_2_x wheel, manylinux2014
+OLDEST_MANYLINUX_GLIBC = (2, 17)
+
+# The machine of each lambda architecture, as it is in a wheel's platform tag
+PLATFORM_MACHINES = {
+    LambdaArchitecture.X86_64: "x86_64",
+    LambdaArchitecture.ARM_64: "aarch64",
+}
+
+# Lambda unpacks a python layer's zip into /opt, and puts /opt/python on the sys.path
+LAYER_DIRECTORY = "python"
+
+# Bump it when a change to this file changes what goes into the zips
+BUILDER_VERSION = "4"
+
+IGNORED_DIRECTORIES = {"__pycache__"}
+IGNORED_SUFFIXES = (".pyc", ".pyo")
+
+
+class LayerBudgetError(ValueError):
+    """
+    A layer is larger, unzipped, than its size_budget_mb.
+    """
+
+
+class LayerArchitectureError(ValueError):
+    """
+    A layer compatible with more than one architecture has compiled packages, which
+    only run on the one they were built for.
+    """
+
+
+@dataclass(frozen=True)
+class LayerBuild:
+    """
+    Properties:
+        name: [str] - the layer, as it is given on the command line.
+        requirements: [str] - its pip requirements file.
+        output: [str] - the zip the stacks deploy it from.
+        sources: [Tuple[str, ...]] - directories copied into the layer as packages.
+        python_version: [str] - the lambda runtime's python version.
+        architectures: [Tuple[str, ...]] - the LambdaArchitecture names of the lambdas
+            that can use it, the compatible_architectures of its layer config. It is
+            built for the first.
+        strip_sources: [bool] - ship the bytecode of its .py files instead of them.
+        size_budget_mb: [float] - the most it may take unzipped. A function and all of
+            its layers have to fit in 250 MB.
+    """
+
+    name: str
+    requirements: str
+    output: str
+    sources: Tuple[str, ...] = ()
+    python_version: str = LAMBDA_PYTHON_VERSION
+    architectures: Tuple[str, ...] = (LambdaArchitecture.X86_64,)
+    strip_sources: bool = False
+    size_budget_mb: float = 50
+
+
+@dataclass
+class LayerBuildResult:
+    """
+    Properties:
+        layer: [str] - LayerBuild.name.
+        status: [str] - what was done: "up to date", "restored from cache" or "built".
+        seconds: [float] - time it took.
+        report: [List[str]] - lines to print about the build (its package sizes).
+        error: [str] - why it failed, None if it did not.
+    """
+
+    layer: str
+    status: str = ""
+    seconds: float = 0.0
+    report: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+LAYER_BUILDS = {
+    layer.name: layer
+    for layer in (
+        LayerBuild(
+            name="pipeline_layer",
+            requirements="layers/requirements-pipeline_layer.txt",
+            output="stacks/pipeline/pipeline_lambdas/pipeline_layer.zip",
+            architectures=tuple(
+                PIPELINE_LAYERS[
+                    DeploymentResourceName.PIPELINE_LAYER
+                ].compatible_architectures
+            ),
+            strip_sources=True,
+        ),
+        LayerBuild(
+            name="common_layer",
+            requirements="layers/requirements-common_layer.txt",
+            output="aws_lambda_functions/common_layer.zip",
+            sources=("common",),
+            architectures=tuple(
+                PRODUCT_LAYERS[ProductLambdaName.COMMON_LAYER].compatible_architectures
+            ),
+            size_budget_mb=20,
+        ),
+    )
+}
+
+
+def layer_key(layer: LayerBuild, root: str = ".") -> str:
+    """
+    Parameters:
+        layer: [LayerBuild] - the layer.
+        root: [str] - the repository root.
+
+    Returns:
+        [str] the hex sha256 of everything the layer's zip is built from.
+    """
+    digest = hashlib.sha256()
+
+    for name, value in (
+        ("builder", BUILDER_VERSION),
+        ("python", layer.python_version),
+        ("architectures", ",".join(layer.architectures)),
+        ("strip_sources", layer.strip_sources),
+        # a layer built without bytecode is built again once there is a python for it
+        ("bytecode", slim.find_interpreter(layer.python_version) is not None),
+    ):
+        digest.update(f"{name}={value}\0".encode())
+
+    for path in [layer.requirements, *_source_files(layer, root)]:
+        digest.update(path.replace(os.sep, "/").encode() + b"\0")
+        with open(os.path.join(root, path), "rb") as source:
+            digest.update(source.read())
+
+    return digest.hexdigest()
+
+
+def build(
+    layer: LayerBuild,
+    root: str = ".",
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    force: bool = False,
+) -> LayerBuildResult:
+    """
+    Makes layer.output the zip of the layer's current inputs - the one in place, one
+    from cache_dir, or a new build. Safe to run for several layers at once.
+
+    Parameters:
+        layer: [LayerBuild] - the layer to build.
+        root: [str] - the repository root.
+        cache_dir: [str] - where built zips and wheels are stored and reused, None for
+            no cache.
+        force: [bool] - build it even if there is a zip for its key.
+
+    Returns:
+        [LayerBuildResult] a failed build (pip failed, the layer is over its
+        size_budget_mb or is compiled for one of several architectures) is returned
+        with its error, not raised, so the other layers still build.
+    """
+    result = LayerBuildResult(layer=layer.name)
+    start = time.perf_counter()
+    try:
+        result.status = _build(layer, root, cache_dir, force, result.report)
+    except subprocess.CalledProcessError as error:
+        result.error = "\n".join(
+            filter(
+                None,
+                [
+                    f"`{' '.join(error.cmd)}` exited {error.returncode}",
+                    (error.stderr or "").strip(),
+                ],
+            )
+        )
+    except (LayerBudgetError, LayerArchitectureError) as error:
+        result.error = str(error)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _build(
+    layer: LayerBuild,
+    root: str,
+    cache_dir: Optional[str],
+    force: bool,
+    report: List[str],
+) -> str:
+    key = layer_key(layer, root)
+    output = os.path.join(root, layer.output)
+    cached = os.path.join(cache_dir, f"{layer.name}-{key}.zip") if cache_dir else None
+
+    if not force and read_key(output) == key:
+        return "up to date"
+
+    if not force and cached and read_key(cached) == key:
+        replace_file(cached, output)
+        return "restored from cache"
+
+    with tempfile.TemporaryDirectory(prefix=f"{layer.name}-") as working_directory:
+        target = os.path.join(working_directory, LAYER_DIRECTORY)
+        install_requirements(
+            os.path.join(root, layer.requirements),
+            target,
+            os.path.join(cache_dir, WHEELHOUSE_DIRECTORY) if cache_dir else None,
+            layer.python_version,
+            layer.architectures[0],
+        )
+        check_architectures(layer, target)
+
+        for source in layer.sources:
+            shutil.copytree(
+                os.path.join(root, source),
+                os.path.join(target, os.path.basename(source)),
+                ignore=shutil.ignore_patterns(
+                    *IGNORED_DIRECTORIES, *(f"*{suffix}" for suffix in IGNORED_SUFFIXES)
+                ),
+            )
+
+        slim_layer(layer, target, report)
+
+        archive = os.path.join(working_directory, f"{layer.name}.zip")
+        write_zip(
+            archive, directory_files(working_directory, LAYER_DIRECTORY), comment=key
+        )
+        replace_file(archive, output)
+
+    if cached:
+        replace_file(output, cached)
+
+    return "built"
+
+
+def build_all(
+    layers: List[LayerBuild],
+    root: str = ".",
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    force: bool = False,
+    jobs: int = None,
+) -> List[LayerBuildResult]:
+    """
+    Builds layers concurrently - most of a build is pip and compileall in their own
+    processes, so threads are enough.
+
+    Parameters:
+        jobs: [int] - layers built at once, defaults to all of them.
+        (the rest as in build())
+
+    Returns:
+        [List[LayerBuildResult]] in the order of layers.
+    """
+    jobs = max(1, min(jobs or len(layers), len(layers)))
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(build, layer, root, cache_dir, force): index
+            for index, layer in enumerate(layers)
+        }
+        results = [None] * len(layers)
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = result.status if result.succeeded else "FAILED"
+            print(f"***{result.layer}: {status} in {result.seconds:.1f}s")
+
+    return results
+
+
+def slim_layer(layer: LayerBuild, target: str, report: List[str]):
+    """
+    Slims target, the python/ directory of layer (or of a bundle built like it), and
+    adds its size report to report.
+
+    Raises:
+        LayerBudgetError if it is still over layer.size_budget_mb.
+    """
+    installed = slim.package_sizes(target)
+
+    slim.prune(target)
+
+    interpreter = slim.find_interpreter(layer.python_version)
+    if interpreter:
+        slim.compile_bytecode(target, interpreter, layer.strip_sources)
+    else:
+        report.append(
+            as_warning(
+                f"***{layer.name}: no python{layer.python_version} to byte-compile "
+                + "with, the layer ships without bytecode"
+            )
+        )
+
+    slimmed = slim.package_sizes(target)
+    report.extend(slim.size_report(layer.name, installed, slimmed))
+
+    size_mb = sum(slimmed.values()) / (1024 * 1024)
+    if size_mb > layer.size_budget_mb:
+        raise LayerBudgetError(
+            f"{layer.name} is {size_mb:.1f} MB unzipped, over its budget of "
+            + f"{layer.size_budget_mb} MB"
+        )
+
+
+def read_key(zip_path: str) -> Optional[str]:
+    """
+    Returns:
+        [str] the key a layer zip was built for, None if there is no such zip or it was
+        not built by build().
+    """
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            return archive.comment.decode() or None
+    except (OSError, zipfile.BadZipFile, UnicodeDecodeError):
+        return None
+
+
+def _source_files(layer: LayerBuild, root: str) -> List[str]:
+    """
+    The files of layer.sources, relative to root, in a stable order.
+    """
+    files = []
+    for source in layer.sources:
+        for directory, directories, names in os.walk(os.path.join(root, source)):
+            directories[:] = sorted(
+                name for name in directories if name not in IGNORED_DIRECTORIES
+            )
+            files.extend(
+                os.path.relpath(os.path.join(directory, name), root)
+                for name in sorted(names)
+                if not name.endswith(IGNORED_SUFFIXES)
+            )
+    return files
+
+
+def check_architectures(layer: LayerBuild, target: str):
+    """
+    Raises:
+        LayerArchitectureError if layer is compatible with more than one architecture
+        but target, its installed packages, has compiled ones.
+    """
+    if len(layer.architectures) < 2:
+        return
+
+    native = set()
+    for directory, _, names in os.walk(target):
+        for name in names:
+            if name.endswith(".so") or ".so." in name:
+                # by its top level package or module
+                relative = os.path.relpath(os.path.join(directory, name), target)
+                native.add(relative.split(os.sep)[0].split(".")[0])
+
+    if native:
+        raise LayerArchitectureError(
+            f"{layer.name} is compatible with {', '.join(layer.architectures)} but "
+            + f"has packages compiled for {layer.architectures[0]}: "
+            + f"{', '.join(sorted(native))}. Give its layer config only that one"
+        )
+
+
+def platform_options(python_version: str, architecture: str) -> List[str]:
+    """
+    Returns:
+        [List[str]] the pip options that install only the wheels that run on a lambda
+        of python_version and architecture (a LambdaArchitecture name): its python, and
+        the manylinux platforms of its glibc and older.
+    """
+    machine = PLATFORM_MACHINES[architecture]
+    major, newest = LAMBDA_GLIBC_VERSION
+    platforms = [f"manylinux2014_{machine}"] + [
+        f"manylinux_{major}_{minor}_{machine}"
+        for minor in range(newest, OLDEST_MANYLINUX_GLIBC[1] - 1, -1)
+    ]
+    return [
+        "--only-binary=:all:",
+        "--implementation",
+        "cp",
+        "--python-version",
+        python_version,
+        *(option for platform in platforms for option in ("--platform", platform)),
+    ]
+
+
+def install_requirements(
+    requirements: str,
+    target: str,
+    wheelhouse: Optional[str] = None,
+    python_version: str = LAMBDA_PYTHON_VERSION,
+    architecture: str = LambdaArchitecture.X86_64,
+):
+    """
+    pip installs requirements into target, with the wheels for a lambda of
+    python_version and architecture (see platform_options). The wheels are first
+    gathered in target's own directory - from the wheelhouse where they are there, and
+    downloaded where not - and, with a wheelhouse, the new ones added to it. The install
+    then only reads those wheels.
+
+    pip only takes wheels for a platform other than its own, so a requirement with only
+    an sdist is first built into a wheel here. A pure python one is a py3-none-any
+    wheel any lambda can use; a compiled one is built for this machine, has no wheel for
+    the lambda's platform and still fails the build.
+    """
+    platform = platform_options(python_version, architecture)
+    wheels = os.path.join(os.path.dirname(target), WHEELHOUSE_DIRECTORY)
+    find_links = ["--find-links", wheelhouse] if wheelhouse else []
+
+    # the wheels of every platform share the wheelhouse, their names tell them apart
+    download = [
+        *PIP,
+        "download",
+        "-r",
+        requirements,
+        "-d",
+        wheels,
+        *find_links,
+        *platform,
+    ]
+    try:
+        _run(download)
+    except subprocess.CalledProcessError:
+        _run(
+            [
+                *PIP,
+                "wheel",
+                "--use-pep517",
+                "-r",
+                requirements,
+                "-w",
+                wheels,
+                *find_links,
+            ]
+        )
+        _run([*download, "--find-links", wheels])
+
+    if wheelhouse:
+        os.makedirs(wheelhouse, exist_ok=True)
+        for name in os.listdir(wheels):
+            if not os.path.exists(os.path.join(wheelhouse, name)):
+                replace_file(os.path.join(wheels, name), os.path.join(wheelhouse, name))
+
+    _run(
+        [
+            *PIP,
+            "install",
+            "--no-index",
+            "--find-links",
+            wheels,
+            "-r",
+            requirements,
+            "-t",
+            target,
+            *platform,
+        ]
+    )
+
+
+def _run(command: List[str]):
+    """
+    Runs command with its output kept, so layers built at once do not mix theirs.
+    """
+    subprocess.run(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def replace_file(source: str, destination: str):
+    """
+    Copies source over destination, so nothing ever sees half a file - not even
+    another build writing the same one.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+    partial = f"{destination}.{os.getpid()}-{threading.get_ident()}.partial"
+    shutil.copyfile(source, partial)
+    os.replace(partial, destination)
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m layers.build_layers",
+        description="Builds the lambda layer zips whose inputs changed.",
+    )
+    parser.add_argument(
+        "layers",
+        nargs="*",
+        help=f"the layers to build, of {', '.join(LAYER_BUILDS)} (default all)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv(CACHE_DIR_ENV_VARIABLE) or DEFAULT_CACHE_DIR,
+        help=f"where built zips are kept (default ${CACHE_DIR_ENV_VARIABLE} or "
+        + f"{DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--force", action="store_true", help="build even if unchanged")
+    parser.add_argument("--keys", action="store_true", help="only print the keys")
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="layers built at once (default all)"
+    )
+    parser.add_argument("--root", default=".")
+    args = parser.parse_args(arguments)
+
+    unknown = [name for name in args.layers if name not in LAYER_BUILDS]
+    if unknown:
+        parser.error(f"unknown layers {', '.join(unknown)}")
+
+    layers = [LAYER_BUILDS[name] for name in args.layers or LAYER_BUILDS]
+
+    if args.keys:
+        for layer in layers:
+            print(f"{layer.name} {layer_key(layer, args.root)}")
+        return 0
+
+    start = time.perf_counter()
+    results = build_all(
+        layers,
+        args.root,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        force=args.force,
+        jobs=args.jobs,
+    )
+    wall_seconds = time.perf_counter() - start
+
+    for layer, result in zip(layers, results):
+        for line in result.report:
+            print(line)
+        if result.succeeded:
+            print(f"***{layer.name}: {result.status} ({layer.output})")
+        else:
+            print(as_fail(f"***{layer.name} failed: {result.error}"))
+
+    total = sum(result.seconds for result in results)
+    print(f"***layers: {wall_seconds:.1f}s, {total:.1f}s of builds")
+
+    return 0 if all(result.succeeded for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
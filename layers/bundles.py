@@ -0,0 +1,369 @@
+"""
+Dependency bundles: a layer per lambda with only what its handler can import, in place of
+the shared layer every lambda of its stack gets - a pipeline lambda that never imports
+jira does not load a layer with jira in it on a cold start.
+
+What a handler reaches is worked out statically (see import_graph.py) from the lambda's
+directory, the shared sources (common/) and the packages installed for its stack's
+layer. The bundle holds the installed packages it reaches, whole, and the modules of
+common/ it reaches, and is slimmed and zipped like the layers are (see build_layers.py)
+into bundles/<function>.zip beside the lambdas' directories.
+
+A lambda is deployed with its bundle instead of the shared layers when its config sets
+x_dependency_bundle (see LambdaLayerConfigs.for_bundle). A bundle is keyed by its layer's
+key and the sources of the lambda and of common/, and only built again when one changes.
+
+Usage, from the repository root:
+    python -m layers.bundles            # the lambdas with x_dependency_bundle
+    python -m layers.bundles --all      # every lambda, and what each one would save
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from cdk_configs.resource_configurations.constructs import (
+    DEPENDENCY_BUNDLE_DIRECTORY,
+    LambdaFunctionConfigs,
+)
+from cdk_configs.resource_configurations.lambda_configs import (
+    PIPELINE_LAMBDAS,
+    PRODUCT_LAMBDAS,
+)
+from cdk_configs.utilities.color import as_fail, as_warning
+from layers.archive import directory_files, write_zip
+from layers.build_layers import (
+    CACHE_DIR_ENV_VARIABLE,
+    DEFAULT_CACHE_DIR,
+    IGNORED_DIRECTORIES,
+    IGNORED_SUFFIXES,
+    LAYER_BUILDS,
+    LAYER_DIRECTORY,
+    WHEELHOUSE_DIRECTORY,
+    LayerBudgetError,
+    install_requirements,
+    layer_key,
+    read_key,
+    replace_file,
+    slim_layer,
+)
+from layers.import_graph import ImportGraph
+
+# The packages of the repository the lambdas import, such as common.aws.codepipeline
+SHARED_SOURCES = ("common",)
+
+# Bump it when a change to this file changes what goes into the bundles
+BUNDLER_VERSION = "1"
+
+
+@dataclass(frozen=True)
+class FunctionGroup:
+    """
+    The lambdas of one stack, which share a layer.
+
+    Properties:
+        layer: [str] - the name of their layer in LAYER_BUILDS.
+        directory: [str] - the base directory of their code.
+        functions: [Dict[str, LambdaFunctionConfigs]] - their configs.
+    """
+
+    layer: str
+    directory: str
+    functions: Dict[str, LambdaFunctionConfigs]
+
+
+FUNCTION_GROUPS = (
+    FunctionGroup(
+        layer="common_layer",
+        directory="aws_lambda_functions",
+        functions=PRODUCT_LAMBDAS,
+    ),
+    FunctionGroup(
+        layer="pipeline_layer",
+        directory="stacks/pipeline/pipeline_lambdas",
+        functions=PIPELINE_LAMBDAS,
+    ),
+)
+
+
+@dataclass
+class BundleResult:
+    """
+    Properties:
+        function: [str] - the lambda's name.
+        status: [str] - "up to date", "built" or "nothing" when the lambda imports
+            nothing a bundle would hold.
+        bundle_bytes: [int] - the bundle's size unzipped.
+        layer_bytes: [int] - the size unzipped of the layer it replaces, None if that
+            has not been built.
+        missing: [List[str]] - imports of the lambda found nowhere.
+        error: [str] - why it failed, None if it did not.
+    """
+
+    function: str
+    status: str = ""
+    bundle_bytes: int = 0
+    layer_bytes: Optional[int] = None
+    missing: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def bundle_output(group: FunctionGroup, name: str, root: str = ".") -> str:
+    return os.path.join(
+        root, group.directory, DEPENDENCY_BUNDLE_DIRECTORY, f"{name}.zip"
+    )
+
+
+def bundle_key(group: FunctionGroup, name: str, root: str = ".") -> str:
+    """
+    Returns:
+        [str] the hex sha256 of everything the lambda's bundle is built from: its
+        layer's key, and the sources of the lambda and of the shared packages.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"bundler={BUNDLER_VERSION}\0".encode())
+    digest.update(f"layer={layer_key(LAYER_BUILDS[group.layer], root)}\0".encode())
+
+    directories = [
+        os.path.join(group.directory, _code_directory(group.functions[name])),
+        *SHARED_SOURCES,
+    ]
+    for directory in directories:
+        for path in _tree_files(os.path.join(root, directory)):
+            digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode())
+            digest.update(b"\0")
+            with open(path, "rb") as source:
+                digest.update(source.read())
+
+    return digest.hexdigest()
+
+
+def build_group(
+    group: FunctionGroup,
+    names: List[str],
+    root: str = ".",
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    force: bool = False,
+) -> List[BundleResult]:
+    """
+    Builds the bundles of the lambdas names of group. Their layer's requirements are
+    installed once, only if a bundle has to be built.
+
+    Returns:
+        [List[BundleResult]] in the order of names. A failed bundle is returned with its
+        error, not raised.
+    """
+    layer = LAYER_BUILDS[group.layer]
+    layer_bytes = _unzipped_size(os.path.join(root, layer.output))
+    keys = {name: bundle_key(group, name, root) for name in names}
+
+    results = {}
+    for name in names:
+        output = bundle_output(group, name, root)
+        if not force and read_key(output) == keys[name]:
+            results[name] = BundleResult(
+                function=name,
+                status="up to date",
+                bundle_bytes=_unzipped_size(output),
+                layer_bytes=layer_bytes,
+            )
+
+    to_build = [name for name in names if name not in results]
+    if to_build:
+        with tempfile.TemporaryDirectory(prefix=f"{group.layer}-bundles-") as working:
+            site_directory = os.path.join(working, "site")
+            install_requirements(
+                os.path.join(root, layer.requirements),
+                site_directory,
+                os.path.join(cache_dir, WHEELHOUSE_DIRECTORY) if cache_dir else None,
+                layer.python_version,
+                layer.architectures[0],
+            )
+            graph = ImportGraph(root, list(SHARED_SOURCES), site_directory)
+
+            for name in to_build:
+                result = BundleResult(function=name, layer_bytes=layer_bytes)
+                try:
+                    _build_bundle(group, name, graph, keys[name], root, result)
+                except (FileNotFoundError, LayerBudgetError) as error:
+                    result.error = str(error)
+                results[name] = result
+
+    return [results[name] for name in names]
+
+
+def _build_bundle(
+    group: FunctionGroup,
+    name: str,
+    graph: ImportGraph,
+    key: str,
+    root: str,
+    result: BundleResult,
+):
+    config = group.functions[name]
+    reach = graph.reach(
+        os.path.join(root, group.directory, _code_directory(config)),
+        _handler_module(config),
+    )
+    result.missing = sorted(reach.missing)
+
+    output = bundle_output(group, name, root)
+    if not (reach.top_levels or reach.shared_modules):
+        # lambda rejects a layer with nothing in it - such a lambda needs no layers
+        result.status = "nothing"
+        if os.path.exists(output):
+            os.remove(output)
+        if config.x_dependency_bundle:
+            raise FileNotFoundError(
+                f"{name} imports nothing to bundle - unset its x_dependency_bundle"
+            )
+        return
+
+    with tempfile.TemporaryDirectory(prefix=f"{name}-") as working_directory:
+        target = os.path.join(working_directory, LAYER_DIRECTORY)
+        os.makedirs(target)
+
+        for entry in sorted(reach.top_levels | reach.distributions):
+            source = os.path.join(graph.site_directory, entry)
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(target, entry))
+            else:
+                shutil.copyfile(source, os.path.join(target, entry))
+
+        for path in sorted(reach.shared_modules):
+            destination = os.path.join(target, os.path.relpath(path, root))
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(path, destination)
+
+        slim_layer(LAYER_BUILDS[group.layer], target, [])
+        result.bundle_bytes = sum(
+            os.path.getsize(path) for path, _ in directory_files(target, ".")
+        )
+
+        archive = os.path.join(working_directory, f"{name}.zip")
+        write_zip(
+            archive, directory_files(working_directory, LAYER_DIRECTORY), comment=key
+        )
+        replace_file(archive, output)
+    result.status = "built"
+
+
+def _code_directory(config: LambdaFunctionConfigs) -> str:
+    """
+    The directory of the lambda's code under its group's directory, from its location
+    (directory.file.handler).
+    """
+    return config.location.split(".")[0]
+
+
+def _handler_module(config: LambdaFunctionConfigs) -> str:
+    return ".".join(config.location.split(".")[1:-1])
+
+
+def _tree_files(directory: str) -> List[str]:
+    files = []
+    for path, directories, names in os.walk(directory):
+        directories[:] = sorted(
+            name for name in directories if name not in IGNORED_DIRECTORIES
+        )
+        files.extend(
+            os.path.join(path, name)
+            for name in sorted(names)
+            if not name.endswith(IGNORED_SUFFIXES)
+        )
+    return files
+
+
+def _unzipped_size(zip_path: str) -> Optional[int]:
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            return sum(info.file_size for info in archive.infolist())
+    except (OSError, zipfile.BadZipFile):
+        return None
+
+
+def print_report(results: List[BundleResult]):
+    print(
+        f"\n{'function':<30}{'status':<12}{'layer kb':>10}{'bundle kb':>11}"
+        f"{'saved kb':>10}{'saved':>7}"
+    )
+    for result in results:
+        if not result.succeeded:
+            print(f"{result.function:<30}{'FAILED':<12}")
+            continue
+
+        row = f"{result.function:<30}{result.status:<12}"
+        if result.layer_bytes:
+            saved = result.layer_bytes - result.bundle_bytes
+            row += (
+                f"{result.layer_bytes / 1024:>10.0f}{result.bundle_bytes / 1024:>11.0f}"
+                f"{saved / 1024:>10.0f}{saved / result.layer_bytes:>7.0%}"
+            )
+        else:
+            row += f"{'-':>10}{result.bundle_bytes / 1024:>11.0f}"
+        print(row)
+
+    for result in results:
+        if result.missing:
+            print(
+                as_warning(
+                    f"\n***{result.function} imports what neither it, common/ nor "
+                    + "its layer has: "
+                    + ", ".join(result.missing)
+                )
+            )
+        if not result.succeeded:
+            print(as_fail(f"\n***{result.function} failed: {result.error}"))
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m layers.bundles",
+        description="Builds a layer per lambda of only the dependencies it imports.",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="bundle every lambda, not only those with x_dependency_bundle",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv(CACHE_DIR_ENV_VARIABLE) or DEFAULT_CACHE_DIR,
+        help="shares its wheels with the layer builds",
+    )
+    parser.add_argument("--force", action="store_true", help="build even if unchanged")
+    parser.add_argument("--root", default=".")
+    args = parser.parse_args(arguments)
+
+    results = []
+    for group in FUNCTION_GROUPS:
+        names = [
+            name
+            for name, config in group.functions.items()
+            if args.all or config.x_dependency_bundle
+        ]
+        if names:
+            results.extend(
+                build_group(group, names, args.root, args.cache_dir, args.force)
+            )
+
+    if not results:
+        print("***No lambdas have x_dependency_bundle - nothing to bundle")
+        return 0
+
+    print_report(results)
+    return 0 if all(result.succeeded for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Static import analysis of a lambda: which modules its handler can reach, read from the
+source with ast rather than by importing anything.
+
+A module is looked for where python would find it in the lambda:
+* the function's own directory (its code asset, the root of the lambda),
+* the repository's shared sources (common/), which the lambdas import as `common.*`,
+* the packages installed for its layer,
+* and the runtime - the standard library and the boto3 the python runtimes come with.
+
+Anything else is missing, unless it was imported in a `try` that handles ImportError.
+
+Shared sources are followed module by module, so a function that imports only
+common.aws.codepipeline does not reach common.jira_integration (and jira). An installed
+package is taken whole, along with the rest of its distribution (its .libs, a cffi
+backend) - anything in it can import the rest at runtime - and every import in it is
+followed, though what it does not find is not reported as missing.
+"""
+
+import ast
+import os
+import sys
+import sysconfig
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Come with the lambda python runtimes
+RUNTIME_PROVIDED = {"boto3", "botocore", "s3transfer", "jmespath", "dateutil", "six"}
+
+IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+
+DIST_INFO_SUFFIX = ".dist-info"
+
+
+@dataclass
+class Reach:
+    """
+    What a function's handler reaches.
+
+    Properties:
+        function_modules: [Set[str]] - files of the function's own directory.
+        shared_modules: [Set[str]] - files of the shared sources, relative to the
+            repository root.
+        distributions: [Set[str]] - .dist-info directories of the installed packages.
+        top_levels: [Set[str]] - the installed packages and modules, by their names in
+            the install directory (so with a module's file suffix).
+        runtime: [Set[str]] - top level modules of the standard library and runtime.
+        missing: [Set[str]] - imports found nowhere.
+    """
+
+    function_modules: Set[str] = field(default_factory=set)
+    shared_modules: Set[str] = field(default_factory=set)
+    distributions: Set[str] = field(default_factory=set)
+    top_levels: Set[str] = field(default_factory=set)
+    runtime: Set[str] = field(default_factory=set)
+    missing: Set[str] = field(default_factory=set)
+
+
+def module_imports(path: str, module: str) -> Iterator[Tuple[str, bool]]:
+    """
+    Parameters:
+        path: [str] - a python source file.
+        module: [str] - its module name, to resolve relative imports against.
+
+    Returns:
+        [Iterator[Tuple[str, bool]]] (module name, optional) of each import in it,
+        wherever it is in the file. optional when a handler of its `try` catches
+        ImportError. `from a import b` gives both a and a.b - b may be a module.
+    """
+    with open(path, "rb") as source:
+        try:
+            tree = ast.parse(source.read(), path)
+        except (SyntaxError, ValueError):
+            return
+
+    is_package = os.path.basename(path).startswith("__init__.")
+    package = module if is_package else module.rpartition(".")[0]
+
+    guarded = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try) and any(
+            _catches_import_error(handler) for handler in node.handlers
+        ):
+            for statement in node.body:
+                guarded.update(id(child) for child in ast.walk(statement))
+
+    for node in ast.walk(tree):
+        optional = id(node) in guarded
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name, optional
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = package.split(".") if package else []
+                parts = (
+                    parts[: len(parts) - (node.level - 1)] if node.level > 1 else parts
+                )
+                base = ".".join(filter(None, [*parts, base]))
+            if base:
+                yield base, optional
+            for alias in node.names:
+                if alias.name != "*":
+                    yield ".".join(filter(None, [base, alias.name])), True
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    if handler.type is None:
+        return True
+    names = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    return any(
+        isinstance(name, ast.Name) and name.id in IMPORT_ERRORS for name in names
+    )
+
+
+def stdlib_modules() -> Set[str]:
+    """
+    Returns:
+        [Set[str]] the top level modules of this python's standard library.
+    """
+    if hasattr(sys, "stdlib_module_names"):
+        return set(sys.stdlib_module_names)
+
+    names = set(sys.builtin_module_names)
+    stdlib = sysconfig.get_paths()["stdlib"]
+    for directory in (stdlib, os.path.join(stdlib, "lib-dynload")):
+        for name in os.listdir(directory) if os.path.isdir(directory) else []:
+            if name != "site-packages":
+                names.add(name.split(".")[0])
+    return names
+
+
+def distributions(site_directory: str) -> Dict[str, Set[str]]:
+    """
+    Returns:
+        [Dict[str, Set[str]]] {top level name in site_directory: all of the top level
+        names of the distribution it belongs to, its .dist-info included}, from the
+        RECORD of each distribution pip installed there.
+    """
+    owners = {}
+    for name in os.listdir(site_directory):
+        record = os.path.join(site_directory, name, "RECORD")
+        if not (name.endswith(DIST_INFO_SUFFIX) and os.path.isfile(record)):
+            continue
+
+        with open(record, encoding="utf-8") as record_file:
+            top_levels = {
+                line.split(",")[0].split("/")[0] for line in record_file if line.strip()
+            }
+        top_levels = {
+            top_level
+            for top_level in top_levels
+            if os.path.exists(os.path.join(site_directory, top_level))
+            and not top_level.startswith("..")
+        } | {name}
+
+        for top_level in top_levels:
+            owners[top_level] = top_levels
+    return owners
+
+
+class ImportGraph:
+    """
+    Resolves what a function reaches, against one set of shared sources and one layer's
+    installed packages. Reuse one for every function of a layer - each package is read
+    once.
+
+    Parameters:
+        root: [str] - the repository root.
+        shared_sources: [List[str]] - the shared packages, relative to root.
+        site_directory: [str] - where the layer's requirements were pip installed (-t).
+    """
+
+    def __init__(self, root: str, shared_sources: List[str], site_directory: str):
+        self.root = root
+        self.shared_sources = {os.path.basename(source) for source in shared_sources}
+        self.site_directory = site_directory
+        self.stdlib = stdlib_modules()
+        self.owners = distributions(site_directory)
+        self._package_imports: Dict[str, Set[Tuple[str, bool]]] = {}
+
+    def reach(self, function_directory: str, handler_module: str) -> Reach:
+        """
+        Parameters:
+            function_directory: [str] - the function's code directory.
+            handler_module: [str] - the module of its handler, such as
+                "github_tag_lambda".
+
+        Returns:
+            [Reach] everything the handler can import.
+
+        Raises:
+            FileNotFoundError if the handler module is not in function_directory.
+        """
+        reach = Reach()
+        handler = self._find(function_directory, handler_module)
+        if handler is None:
+            raise FileNotFoundError(f"{handler_module} is not in {function_directory}")
+
+        pending = [(handler_module, False)]
+        seen = set()
+        while pending:
+            module, optional = pending.pop()
+            if module in seen:
+                continue
+            seen.add(module)
+            pending.extend(self._resolve(function_directory, module, optional, reach))
+
+        return reach
+
+    def _resolve(
+        self, function_directory: str, module: str, optional: bool, reach: Reach
+    ) -> Iterator[Tuple[str, bool]]:
+        """
+        Adds module to reach and returns what it imports in turn.
+        """
+        top_level = module.split(".")[0]
+
+        local = self._find(function_directory, module)
+        if local is not None or self._find(function_directory, top_level) is not None:
+            if local is not None and local not in reach.function_modules:
+                reach.function_modules.add(local)
+                yield from module_imports(local, module)
+            return
+
+        if top_level in self.shared_sources:
+            yield from self._resolve_shared(module, reach)
+            return
+
+        installed = self._installed(top_level)
+        if installed is not None:
+            for entry in self.owners.get(installed, {installed}):
+                if entry in reach.top_levels:
+                    continue
+                if entry.endswith(DIST_INFO_SUFFIX):
+                    reach.distributions.add(entry)
+                else:
+                    reach.top_levels.add(entry)
+                    yield from self._imports_of_package(entry)
+            return
+
+        if top_level in self.stdlib or top_level in RUNTIME_PROVIDED:
+            reach.runtime.add(top_level)
+        elif not optional:
+            reach.missing.add(module)
+
+    def _resolve_shared(self, module: str, reach: Reach) -> Iterator[Tuple[str, bool]]:
+        parts = module.split(".")
+        # the packages above a module are imported with it
+        for depth in range(1, len(parts) + 1):
+            name = ".".join(parts[:depth])
+            path = self._find(self.root, name)
+            if path is None or path in reach.shared_modules:
+                continue
+            reach.shared_modules.add(path)
+            yield from module_imports(path, name)
+
+    def _find(self, directory: str, module: str) -> Optional[str]:
+        """
+        The source file of module under directory, None if it is not there.
+        """
+        base = os.path.join(directory, *module.split("."))
+        for candidate in (os.path.join(base, "__init__.py"), f"{base}.py"):
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def _installed(self, top_level: str) -> Optional[str]:
+        """
+        The name in site_directory of the installed package or module top_level.
+        """
+        if os.path.isdir(os.path.join(self.site_directory, top_level)):
+            return top_level
+        for name in sorted(os.listdir(self.site_directory)):
+            if name.split(".")[0] == top_level and os.path.isfile(
+                os.path.join(self.site_directory, name)
+            ):
+                return name
+        return None
+
+    def _imports_of_package(self, entry: str) -> Set[Tuple[str, bool]]:
+        """
+        Every import in an installed package, all optional - one the package's own
+        requirements do not provide is its business, not the function's.
+        """
+        if entry in self._package_imports:
+            return self._package_imports[entry]
+
+        imports = set()
+        path = os.path.join(self.site_directory, entry)
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                for name in names:
+                    if name.endswith(".py"):
+                        file_path = os.path.join(directory, name)
+                        module = os.path.splitext(
+                            os.path.relpath(file_path, self.site_directory)
+                        )[0].replace(os.sep, ".")
+                        if module.endswith(".__init__"):
+                            module = module[: -len(".__init__")]
+                        imports.update(
+                            (name, True)
+                            for name, _ in module_imports(file_path, module)
+                        )
+        elif entry.endswith(".py"):
+            imports.update(
+                (name, True) for name, _ in module_imports(path, entry[: -len(".py")])
+            )
+
+        self._package_imports[entry] = imports
+        return imports
@@ -0,0 +1,199 @@
+"""
+The slimming stage of a layer build (see build_layers.py): removes what a lambda never
+loads from the installed packages, byte-compiles them for the lambda's python version
+and reports the size of each package.
+
+What is kept on purpose:
+* METADATA and entry_points.txt of the .dist-info directories - packages read their own
+  version with importlib.metadata (jira does on import) - and their license files.
+* .c / .h files - cffi reads its own headers when it compiles a module, and they are
+  small.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+# Directories inside a package that are never imported by the package itself
+PRUNED_DIRECTORIES = {"__pycache__", "tests", "test", "docs", "doc", "examples"}
+
+# Console scripts pip installs beside the packages with -t
+PRUNED_TOP_LEVEL = {"bin"}
+
+PRUNED_SUFFIXES = (".pyi", ".pyc", ".pyo")
+PRUNED_FILE_NAMES = {"py.typed"}
+
+KEPT_DIST_INFO_FILES = {"METADATA", "entry_points.txt"}
+LICENSE_PREFIXES = ("LICENSE", "LICENCE", "COPYING", "NOTICE", "AUTHORS")
+
+DIST_INFO_SUFFIX = ".dist-info"
+
+# Where lambda unpacks a layer's python/ directory
+RUNTIME_DIRECTORY = "/opt/python"
+
+
+def prune(target: str):
+    """
+    Removes the files a lambda does not need from target, a layer's python/ directory.
+    """
+    for name in os.listdir(target):
+        path = os.path.join(target, name)
+        if name in PRUNED_TOP_LEVEL and os.path.isdir(path):
+            shutil.rmtree(path)
+        elif name.endswith(DIST_INFO_SUFFIX):
+            _prune_dist_info(path)
+
+    for directory, directories, names in os.walk(target):
+        top_level = directory == target
+        for name in list(directories):
+            if name.endswith(DIST_INFO_SUFFIX):
+                directories.remove(name)
+            elif name in PRUNED_DIRECTORIES and not (
+                top_level and name != "__pycache__"
+            ):
+                shutil.rmtree(os.path.join(directory, name))
+                directories.remove(name)
+
+        for name in names:
+            if name.endswith(PRUNED_SUFFIXES) or name in PRUNED_FILE_NAMES:
+                os.remove(os.path.join(directory, name))
+
+
+def _prune_dist_info(dist_info: str):
+    for directory, _, names in os.walk(dist_info, topdown=False):
+        in_licenses = os.path.relpath(directory, dist_info).startswith("licenses")
+        for name in names:
+            if not (
+                in_licenses
+                or name in KEPT_DIST_INFO_FILES
+                or name.upper().startswith(LICENSE_PREFIXES)
+            ):
+                os.remove(os.path.join(directory, name))
+        if directory != dist_info and not os.listdir(directory):
+            os.rmdir(directory)
+
+
+def find_interpreter(python_version: str) -> Optional[str]:
+    """
+    Parameters:
+        python_version: [str] - a "major.minor" version, such as "3.9".
+
+    Returns:
+        [str] a python of that version to byte-compile with - this one, or
+        python<version> on the PATH - None if there is none.
+    """
+    if "%d.%d" % sys.version_info[:2] == python_version:
+        return sys.executable
+
+    candidate = shutil.which(f"python{python_version}")
+    if candidate is None:
+        return None
+
+    # a pyenv shim is on the PATH whether or not that version is selected
+    try:
+        found = subprocess.run(
+            [candidate, "-c", "import sys; print('%d.%d' % sys.version_info[:2])"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+    except OSError:
+        return None
+    return candidate if found.stdout.strip() == python_version else None
+
+
+def compile_bytecode(target: str, interpreter: str, strip_sources: bool = False):
+    """
+    Byte-compiles target with interpreter. The .pyc files are unchecked-hash ones: the
+    layer never changes once it is published, so python loads them without checking
+    them against the sources.
+
+    Parameters:
+        target: [str] - the layer's python/ directory.
+        interpreter: [str] - a python of the lambda runtime's version.
+        strip_sources: [bool] - write each .pyc beside its .py and remove the .py, which
+            python then imports the .pyc in place of. Tracebacks lose their source lines.
+    """
+    subprocess.run(
+        [
+            interpreter,
+            "-m",
+            "compileall",
+            "-q",
+            "-j",
+            "0",
+            "--invalidation-mode",
+            "unchecked-hash",
+            # the path the layer is at in a lambda, rather than the temporary one it
+            # is built in - so tracebacks point at it and the build is reproducible
+            "-d",
+            RUNTIME_DIRECTORY,
+            *(["-b"] if strip_sources else []),
+            target,
+        ],
+        check=True,
+        # the order of a frozenset constant (`x in {"a", "b"}`) follows the str hashes
+        env={**os.environ, "PYTHONHASHSEED": "0"},
+    )
+
+    if not strip_sources:
+        return
+
+    for directory, _, names in os.walk(target):
+        for name in names:
+            if name.endswith(".py") and f"{name}c" in names:
+                os.remove(os.path.join(directory, name))
+
+
+def package_sizes(target: str) -> Dict[str, int]:
+    """
+    Returns:
+        [Dict[str, int]] {package: bytes} of each top level package or module of
+        target (a module's .py, .pyc and .so together), the .dist-info directories
+        together as "*.dist-info".
+    """
+    sizes = {}
+    for name in os.listdir(target):
+        path = os.path.join(target, name)
+        if name.endswith(DIST_INFO_SUFFIX):
+            package = f"*{DIST_INFO_SUFFIX}"
+        elif os.path.isdir(path):
+            package = name
+        else:
+            package = name.split(".")[0]
+        sizes[package] = sizes.get(package, 0) + _size(path)
+    return sizes
+
+
+def _size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def size_report(name: str, before: Dict[str, int], after: Dict[str, int]) -> List[str]:
+    """
+    Returns:
+        [List[str]] the lines of a table of the size of each package of layer name
+        before and after slimming, largest first.
+    """
+    lines = [
+        f"***{name} packages (kb):",
+        f"   {'package':<36}{'installed':>11}{'slimmed':>11}",
+    ]
+    for package in sorted(before, key=lambda package: -after.get(package, 0)):
+        lines.append(
+            f"   {package:<36}{before[package] / 1024:>11.0f}"
+            f"{after.get(package, 0) / 1024:>11.0f}"
+        )
+    lines.append(
+        f"   {'total':<36}{sum(before.values()) / 1024:>11.0f}"
+        f"{sum(after.values()) / 1024:>11.0f}"
+    )
+    return lines
@@ -0,0 +1,183 @@
+import hashlib
+
+import aws_cdk as cdk
+import jsii
+from aws_cdk import aws_codepipeline as codepipeline
+from aws_cdk import aws_codepipeline_actions as pipeline_actions
+from aws_cdk import aws_events as events
+from aws_cdk import aws_events_targets as targets
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda
+from constructs import Construct
+
+# CodePipeline limits Custom action provider names to this many characters.
+MAX_PROVIDER_LENGTH = 35
+
+
+def provider_name(name: str) -> str:
+    """
+    Keeps a Custom action provider name within the CodePipeline limit. Names that are
+    too long are cut short and suffixed with a hash of the full name, so different long
+    names (such as several LOCAL users) stay distinct.
+    """
+    if len(name) <= MAX_PROVIDER_LENGTH:
+        return name
+
+    suffix = hashlib.sha1(name.encode()).hexdigest()[:8]
+    return f"{name[:MAX_PROVIDER_LENGTH - len(suffix) - 1]}-{suffix}"
+
+
+class JobWorker(Construct):
+    """
+    Registers a Custom action type for a pipeline lambda and makes that lambda the job
+    worker for it: the lambda is invoked on a schedule and claims every pending job for
+    the action type, across every pipeline using it, in one invocation (see
+    common.aws.job_worker.CustomActionJobWorker).
+
+    Parameters:
+        handler: [aws_lambda.Function] - the lambda that works the jobs.
+        provider: [str] - the Custom action provider name, shortened with
+            provider_name() if needed.
+        schedule: [events.Schedule][OPTIONAL] - how often the worker polls. Defaults to
+            once a minute, the finest an EventBridge schedule allows.
+        version: [str][OPTIONAL] - the Custom action version.
+
+    Methods:
+        action(action_name, user_parameters, run_order) - returns a pipeline action that
+            queues a job for this worker.
+    """
+
+    category = codepipeline.ActionCategory.INVOKE
+    # How CodePipeline spells the category in action type ARNs and PollForJobs.
+    category_name = "Invoke"
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        *,
+        handler: aws_lambda.Function,
+        provider: str,
+        schedule: events.Schedule = None,
+        version: str = "1",
+    ) -> None:
+        super().__init__(scope, id)
+
+        self.provider = provider_name(provider)
+        self.version = version
+        stack = cdk.Stack.of(self)
+
+        codepipeline.CustomActionRegistration(
+            self,
+            "ActionType",
+            provider=self.provider,
+            version=self.version,
+            category=self.category,
+            artifact_bounds=codepipeline.ActionArtifactBounds(
+                min_inputs=0, max_inputs=0, min_outputs=0, max_outputs=0
+            ),
+            action_properties=[
+                codepipeline.CustomActionProperty(
+                    name="UserParameters",
+                    required=False,
+                    key=False,
+                    secret=False,
+                    queryable=False,
+                    description="JSON parameters passed to the job worker",
+                )
+            ],
+        )
+
+        events.Rule(
+            self,
+            "Schedule",
+            schedule=schedule or events.Schedule.rate(cdk.Duration.minutes(1)),
+            targets=[targets.LambdaFunction(handler)],
+        )
+
+        handler.add_environment("JOB_WORKER_CATEGORY", self.category_name)
+        handler.add_environment("JOB_WORKER_PROVIDER", self.provider)
+        handler.add_environment("JOB_WORKER_VERSION", self.version)
+
+        handler.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["codepipeline:PollForJobs"],
+                resources=[
+                    stack.format_arn(
+                        service="codepipeline",
+                        resource="actiontype",
+                        resource_name=f"Custom/{self.category_name}/"
+                        f"{self.provider}/{self.version}",
+                    )
+                ],
+            )
+        )
+        handler.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=[
+                    "codepipeline:AcknowledgeJob",
+                    "codepipeline:GetJobDetails",
+                    "codepipeline:PutJobSuccessResult",
+                    "codepipeline:PutJobFailureResult",
+                ],
+                resources=["*"],
+            )
+        )
+
+    def action(
+        self, action_name: str, user_parameters: dict = None, run_order: int = None
+    ) -> "JobWorkerAction":
+        return JobWorkerAction(
+            action_name=action_name,
+            provider=self.provider,
+            version=self.version,
+            user_parameters=user_parameters,
+            run_order=run_order,
+        )
+
+
+class JobWorkerAction(pipeline_actions.Action):
+    """
+    A pipeline action for a Custom action type registered by JobWorker. Takes the same
+    user_parameters as a LambdaInvokeAction, so the worker lambda sees the same
+    input_parameters either way.
+    """
+
+    def __init__(
+        self,
+        *,
+        action_name: str,
+        provider: str,
+        version: str = "1",
+        user_parameters: dict = None,
+        run_order: int = None,
+    ) -> None:
+        super().__init__(
+            action_name=action_name,
+            artifact_bounds=codepipeline.ActionArtifactBounds(
+                min_inputs=0, max_inputs=0, min_outputs=0, max_outputs=0
+            ),
+            category=JobWorker.category,
+            provider=provider,
+            owner="Custom",
+            version=version,
+            run_order=run_order,
+        )
+        self._user_parameters = user_parameters or {}
+
+    @jsii.member(jsii_name="bound")
+    def _bound(
+        self,
+        scope: Construct,
+        stage: codepipeline.IStage,
+        *,
+        bucket,
+        role: iam.IRole,
+    ) -> codepipeline.ActionConfig:
+        return codepipeline.ActionConfig(
+            configuration={
+                "UserParameters": cdk.Stack.of(scope).to_json_string(
+                    self._user_parameters
+                )
+            }
+        )
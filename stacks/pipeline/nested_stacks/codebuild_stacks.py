@@ -12,6 +12,8 @@ from cdk_configs.resource_configurations.constructs import (
     LogGroupConfigs,
 )
 from constructs import Construct
+from cdk_configs.utilities.partitions import partition_scope, stable_partition
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
 from cdk_configs.product_properties.common_props import (
     DeploymentProperties,
     ProductSetting,
@@ -22,6 +24,7 @@ from cdk_configs.product_properties.pipeline_and_deployment_props import (
 
 
 class PipelineCodebuilds(cdk.NestedStack):
+    @SYNTH_PROFILER.timed("nested stack: PipelineCodebuilds")
     def __init__(
         self,
         scope: Construct,
@@ -125,17 +128,31 @@ class PipelineCodebuilds(cdk.NestedStack):
         # Testing                          #
         ####################################
 
+        # Spread over more nested stacks when there are too many for this one - see
+        # cdk_configs/utilities/partitions.py. Run `make placements` and commit
+        # cdk_configs/partition_placement.json with new codebuilds.
+        placement = stable_partition(
+            "PipelineCodebuilds",
+            {
+                name: config.resource_count()
+                + PIPELINE_CODEBUILD_LOG_GROUP.resource_count()
+                for name, config in PIPELINE_CODEBUILDS.items()
+            },
+            props.UPDATE_PLACEMENTS,
+        )
+
         codebuild_config: CodebuildConfigs
         for name, codebuild_config in PIPELINE_CODEBUILDS.items():
             name_prefix = props.prefix_tag(custom_prefix=props.prefix)
             log_group = PIPELINE_CODEBUILD_LOG_GROUP
+            scope = partition_scope(self, placement[name])
 
             self.codebuild_mapping[name] = codebuild.PipelineProject(
-                self,
+                scope,
                 name,
                 **codebuild_config.props(
                     log_group=logs.LogGroup(
-                        self,
+                        scope,
                         f"{name_prefix}-{name}-Logs",
                         **log_group.props(
                             props.USING_PRODUCTION_VALUES,
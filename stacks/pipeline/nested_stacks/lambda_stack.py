@@ -4,11 +4,14 @@ from pathlib import Path
 import aws_cdk as cdk
 from aws_cdk import aws_lambda
 from constructs import Construct
+from cdk_configs.utilities.partitions import partition_scope, stable_partition
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
 from cdk_configs.product_properties.common_props import DeploymentProperties
 from cdk_configs.resource_configurations.constructs import (
     LambdaLayerConfigs,
     LambdaFunctionConfigs,
 )
+from cdk_configs.resource_names import DeploymentResourceName
 from cdk_configs.resource_configurations.lambda_configs import (
     PIPELINE_LAMBDAS,
     PIPELINE_LAYERS,
@@ -19,6 +22,7 @@ base_directory = os.path.join(Path(__file__).parents[1], "pipeline_lambdas")
 
 
 class PipelineLambdas(cdk.NestedStack):
+    @SYNTH_PROFILER.timed("nested stack: PipelineLambdas")
     def __init__(
         self,
         scope: Construct,
@@ -56,18 +60,51 @@ class PipelineLambdas(cdk.NestedStack):
         # Lambdas                          #
         ####################################
 
+        # Spread over more nested stacks when there are too many for this one - see
+        # cdk_configs/utilities/partitions.py. Run `make placements` and commit
+        # cdk_configs/partition_placement.json with new lambdas.
+        placement = stable_partition(
+            "PipelineLambdas",
+            {
+                name: config.resource_count(in_vpc=True)
+                for name, config in PIPELINE_LAMBDAS.items()
+            },
+            props.UPDATE_PLACEMENTS,
+        )
+
         # TypeHint Annotation
         function_config: LambdaFunctionConfigs
         for name, function_config in PIPELINE_LAMBDAS.items():
-            # set the cdk specific run time values of the function:
+            scope = partition_scope(self, placement[name])
+
+            # only the dependencies it imports, see layers/bundles.py
+            layer_configs = list(PIPELINE_LAYERS.values())
+            function_layers = pipeline_layers
+            if function_config.x_dependency_bundle:
+                bundle_config = PIPELINE_LAYERS[
+                    DeploymentResourceName.PIPELINE_LAYER
+                ].for_bundle(name)
+                layer_configs = [bundle_config]
+                function_layers = [
+                    aws_lambda.LayerVersion(
+                        scope,
+                        f"{name}-Dependencies",
+                        **bundle_config.props(
+                            base_directory,
+                            props.prefix_tag(custom_prefix=props.prefix),
+                        ),
+                    )
+                ]
 
-            function_config.vpc = props.vpc(self)
+            function_config.check_layers(layer_configs)
 
             self.lambda_mapping[name] = aws_lambda.Function(
-                self,
+                scope,
                 name,
-                layers=pipeline_layers,
+                layers=function_layers,
                 **function_config.props(
-                    base_directory, props.prefix_tag(custom_prefix=props.prefix)
+                    base_directory,
+                    props.prefix_tag(custom_prefix=props.prefix),
+                    vpc=props.vpc(scope),
                 ),
             )
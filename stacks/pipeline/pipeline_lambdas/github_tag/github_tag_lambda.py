@@ -1,5 +1,6 @@
 from utilities import TagGit
-from common.aws.codepipeline import PipelineTokens
+from common.aws.codepipeline import PIPELINE_JOB_KEY, PipelineTokens
+from common.aws.job_worker import CustomActionJobWorker
 from aws_lambda_powertools import Logger
 
 
@@ -11,9 +12,21 @@ def lambda_handler(event: dict, context: dict):
     """
     Used within the CodePipeline, checks for the commit sha that is passed into the
     parameters for this lambda from the Source, and moves the tag to that commit
+
+    When invoked on a schedule instead of by CodePipeline, it runs as the job worker for
+    its Custom action and works through every pending job in one invocation.
     """
-    pipeline_values = PipelineTokens(event)
+    if PIPELINE_JOB_KEY not in event:
+        return CustomActionJobWorker.from_environment(process_job).run(context)
+
+    process_job(PipelineTokens(event))
+    return None
+
 
+def process_job(pipeline_values: PipelineTokens):
+    """
+    Moves the tag for a single pipeline job and reports the result to the pipeline.
+    """
     commit_sha = pipeline_values.input_parameters.get("COMMIT_SHA")
     logger.append_keys(commitSha=commit_sha)
 
@@ -24,6 +37,6 @@ def lambda_handler(event: dict, context: dict):
         pipeline_values.put_job_success(
             {"tagName": client.tag_name, "currentCommitSha": commit_sha}
         )
+        return
 
     pipeline_values.put_job_failure("Tag failed to update")
-    return None
@@ -1,9 +1,14 @@
-from common.aws.codepipeline import PipelineTokens
-from utilities import GitCommitHistory
+from common.aws.aws_lambda import has_time_remaining
+from common.aws.codepipeline import PIPELINE_JOB_KEY, PipelineTokens
+from common.aws.job_worker import CustomActionJobWorker
+from utilities import GitCommitHistory, JiraUpdateProgress
 from aws_lambda_powertools import Logger
 
 logger = Logger()
 
+# Time kept back from the lambda timeout to checkpoint and report to the pipeline.
+CONTINUATION_RESERVE_MS = 15000
+
 
 @logger.inject_lambda_context(clear_state=True, log_event=True)
 def lambda_handler(event: dict, context: dict) -> dict:
@@ -13,18 +18,47 @@ def lambda_handler(event: dict, context: dict) -> dict:
     commits between the last tag and now.
 
     Then parses those for Card Numbers and attempts to update each status to Done.
+
+    If there are more cards than can be updated before the lambda times out, it stops
+    and checkpoints its progress in a continuation token. CodePipeline re-invokes the
+    action and it picks up where it stopped.
+
+    When invoked on a schedule instead of by CodePipeline, it runs as the job worker for
+    its Custom action and works through every pending job in one invocation.
     """
 
-    try:
+    if PIPELINE_JOB_KEY not in event:
+        return CustomActionJobWorker.from_environment(
+            lambda pipeline_values: process_job(pipeline_values, context)
+        ).run(context, CONTINUATION_RESERVE_MS)
+
+    process_job(PipelineTokens(event), context)
+    return {}
+
 
-        pipeline_values = PipelineTokens(event)
+def process_job(pipeline_values: PipelineTokens, context: dict):
+    """
+    Updates the cards for a single pipeline job and reports the result to the pipeline.
+    """
+
+    try:
 
         client = GitCommitHistory(pipeline_values.input_parameters.get("COMMIT_SHA"))
 
-        pipeline_values.put_job_success(output_variables=client.update_jira())
+        progress = client.update_jira(
+            progress=JiraUpdateProgress.from_token(pipeline_values.continuation_token),
+            should_continue=lambda: has_time_remaining(
+                context, CONTINUATION_RESERVE_MS
+            ),
+        )
+
+        if progress.complete:
+            pipeline_values.put_job_success(
+                output_variables=client.output_variables(progress)
+            )
+        else:
+            pipeline_values.put_job_continuation(progress.as_token())
 
     except Exception as e:
         logger.exception("Error in updating jira cards")
         pipeline_values.put_job_failure("Unable to complete update values", e)
-
-    return {}
@@ -2,14 +2,51 @@ import os
 from common.git_integration.git_client import GitClient
 from github.Commit import Commit
 from common.jira_integration.jira_client import JiraClient, JiraStatus
+from dataclasses import dataclass, field
 from datetime import datetime
 from aws_lambda_powertools import Logger
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
 import re
 
 logger = Logger(child=True)
 
 
+@dataclass
+class JiraUpdateProgress:
+    """
+    How far through the card list an update has got. Small enough to be carried between
+    invocations in a CodePipeline continuation token.
+
+    The card list itself is rebuilt from the git history on every invocation (oldest
+    commit first, so new commits can only add cards to the end) and only the offset
+    and the cards that did not update are carried over. Cards before the offset that
+    are in neither list were updated successfully.
+    """
+
+    offset: int = 0
+    cards_not_found: List[str] = field(default_factory=list)
+    cards_error_out: List[str] = field(default_factory=list)
+    complete: bool = False
+
+    @classmethod
+    def from_token(cls, token: Optional[dict]) -> "JiraUpdateProgress":
+        if token is None:
+            return cls()
+
+        return cls(
+            offset=token.get("offset", 0),
+            cards_not_found=token.get("notFound", []),
+            cards_error_out=token.get("errors", []),
+        )
+
+    def as_token(self) -> dict:
+        return {
+            "offset": self.offset,
+            "notFound": self.cards_not_found,
+            "errors": self.cards_error_out,
+        }
+
+
 class GitCommitHistory(GitClient):
     def __init__(self, commit_sha: str = None):
         super().__init__()
@@ -20,35 +57,77 @@ class GitCommitHistory(GitClient):
 
         return
 
-    def update_jira(self, commit_sha: Optional[str] = None) -> Dict[str, Any]:
+    def update_jira(
+        self,
+        commit_sha: Optional[str] = None,
+        progress: Optional[JiraUpdateProgress] = None,
+        should_continue: Optional[Callable[[], bool]] = None,
+    ) -> JiraUpdateProgress:
         """
         Updates JIRA cards found in commit messages to DONE status if Prod or IN REVIEW
         if dev.
 
         Parameters:
             commit_sha: Optional[str] - an optional sha to find commits leading UP TO.
+            progress: Optional[JiraUpdateProgress] - where a previous invocation got
+                to. Cards before progress.offset are skipped.
+            should_continue: Optional[Callable] - checked before each card. Once it
+                returns False the update stops and the returned progress is not
+                complete.
 
         Returns:
-            List of card numbers that were updated.
+            JiraUpdateProgress of the update.
 
         """
-        commit_history = self._get_all_commits_since_last_deployment(commit_sha)
+        progress = progress if progress is not None else JiraUpdateProgress()
 
-        self.jira_client = MassJiraUpdate(card_numbers)
-        card_numbers = [
-            self._parse_for_issue_number(commit, self.jira_client.project)
-            for commit in commit_history
-        ]
+        self.jira_client = MassJiraUpdate()
+        self.card_numbers = self._get_card_numbers(self.jira_client.project, commit_sha)
+        self.jira_client.cards_not_found = progress.cards_not_found
+        self.jira_client.cards_error_out = progress.cards_error_out
+
+        progress.offset += self.jira_client.update_status(
+            self.card_numbers[progress.offset :], should_continue
+        )
+        progress.complete = progress.offset >= len(self.card_numbers)
 
-        self.jira_client.update_status(card_numbers)
+        return progress
+
+    def output_variables(self, progress: JiraUpdateProgress) -> Dict[str, str]:
+        """
+        The output variables for a completed update. CodePipeline output variables must
+        be strings, so each list of cards is comma separated.
+        """
+        skipped = set(progress.cards_not_found + progress.cards_error_out)
 
         return {
-            "allCards": list(filter(None, card_numbers)),
-            "notFoundCards": self.jira_client.cards_not_found,
-            "errorCards": self.jira_client.cards_error_out,
-            "successfulCards": self.jira_client.cards_updated,
+            "allCards": ",".join(self.card_numbers),
+            "notFoundCards": ",".join(progress.cards_not_found),
+            "errorCards": ",".join(progress.cards_error_out),
+            "successfulCards": ",".join(
+                card for card in self.card_numbers if card not in skipped
+            ),
         }
 
+    def _get_card_numbers(
+        self, project_id: str, commit_sha: Optional[str] = None
+    ) -> List[str]:
+        """
+        The unique card numbers in the commit history, in the order they first appear
+        from the oldest commit.
+        """
+        commit_history = self._get_all_commits_since_last_deployment(commit_sha)
+
+        if commit_history is None:
+            return []
+
+        card_numbers = [
+            self._parse_for_issue_number(commit, project_id)
+            for commit in commit_history.reversed
+        ]
+
+        return list(dict.fromkeys(filter(None, card_numbers)))
+
     def _get_all_commits_since_last_deployment(self, commit_sha: str = None):
         """
         Checks over the git history since the last tag for a deployment, retrieving all
@@ -97,19 +176,21 @@ class GitCommitHistory(GitClient):
             project_id: [str] - the project id to search for
 
         Returns:
-            card_number: [str] the card value or None
+            card_number: [str] the card value (as ABCD-1234) or None
 
         Expects:
             the card number to be some variety of: ABCD-1234 | ABCD 1234 | ABCD - 1234
             and ignores case
         """
 
-        return re.search(
+        match = re.search(
             f"({project_id.lower()})" + "(\s{0,1}-{0,1}\s{0,1})(\d{4})",
             commit.commit.message,
             re.IGNORECASE,
         )
 
+        return f"{match.group(1).upper()}-{match.group(3)}" if match else None
+
 
 class MassJiraUpdate(JiraClient):
     def __init__(self, jira_url: str = None, jira_project: str = None) -> None:
@@ -118,26 +199,63 @@ class MassJiraUpdate(JiraClient):
         self.cards_error_out = []
         self.cards_updated = []
 
-    def update_status(self, card_numbers: List[str]):
+    def update_status(
+        self,
+        card_numbers: List[str],
+        should_continue: Optional[Callable[[], bool]] = None,
+    ) -> int:
+        """
+        Updates the cards to the status in the UPDATE_TO_STATUS env variable.
+
+        Parameters:
+            card_numbers: List[str] - the cards to update, in order.
+            should_continue: Optional[Callable] - checked before each card, the update
+                stops as soon as it returns False.
+
+        Returns:
+            [int] the number of cards processed (updated, not found or errored)
+        """
         self.card_numbers = card_numbers
-        self._update_all_to_status(JiraStatus[os.getenv("UPDATE_TO_STATUS", "REVIEW")])
+        return self._update_all_to_status(
+            JiraStatus[os.getenv("UPDATE_TO_STATUS", "REVIEW")], should_continue
+        )
 
-    def _update_all_to_status(self, status: JiraStatus):
+    def _update_all_to_status(
+        self,
+        status: JiraStatus,
+        should_continue: Optional[Callable[[], bool]] = None,
+    ) -> int:
         """
         Loops over the card numbers provided and updates them all to the jira status
         provided
 
         Parameters:
             status: [JiraStatus] - a status Enum
+            should_continue: Optional[Callable] - checked before each card.
+
+        Returns:
+            [int] the number of cards processed
         """
 
+        processed = 0
         for issue in self.card_numbers:
+            if should_continue is not None and not should_continue():
+                logger.info(
+                    "Stopping before all cards were updated",
+                    extra={
+                        "processed": processed,
+                        "remaining": len(self.card_numbers) - processed,
+                    },
+                )
+                break
+
+            processed += 1
             try:
                 if issue is None:
                     continue
                 self.update_card_status(issue, status)
 
-                self.card_updated.append(issue)
+                self.cards_updated.append(issue)
                 logger.info(
                     "Cards Updated",
                     extra={
@@ -151,5 +269,8 @@ class MassJiraUpdate(JiraClient):
                 continue
 
             except Exception as e:
-                self.cards_error_out.append((issue, str(e)))
+                logger.exception(f"Unable to update {issue}")
+                self.cards_error_out.append(issue)
                 continue
+
+        return processed
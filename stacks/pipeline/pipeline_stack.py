@@ -9,6 +9,7 @@ from cdk_configs.product_properties.common_props import (
     DeploymentProperties,
 )
 from cdk_configs.resource_names import DeploymentResourceName
+from stacks.pipeline.custom_actions import JobWorker
 from stacks.pipeline.nested_stacks.codebuild_stacks import PipelineCodebuilds
 from stacks.pipeline.nested_stacks.lambda_stack import PipelineLambdas
 from constructs import Construct
@@ -252,24 +253,41 @@ class Pipeline(cdk.Stack):
         # Devops Lead Time Tracking
         ###
 
-        lead_time_tracking_steps = [
-            pipeline_actions.LambdaInvokeAction(
-                lambda_=pipeline_lambdas.lambda_mapping[
-                    DeploymentResourceName.GITHUB_TAG
-                ],
-                action_name="Tag-Commit-With-Prod",
-                user_parameters=pipeline_variables,
-                run_order=2,
-            ),
-            pipeline_actions.LambdaInvokeAction(
-                lambda_=pipeline_lambdas.lambda_mapping[
-                    DeploymentResourceName.JIRA_STATUS
-                ],
-                action_name="Update-Jira-Card-Status",
-                user_parameters=pipeline_variables,
-                run_order=999,
-            ),
-        ]
+        lead_time_lambdas = {
+            DeploymentResourceName.GITHUB_TAG: ("Tag-Commit-With-Prod", 2),
+            DeploymentResourceName.JIRA_STATUS: ("Update-Jira-Card-Status", 999),
+        }
+
+        lead_time_tracking_steps = []
+        for name, (action_name, run_order) in lead_time_lambdas.items():
+            handler = pipeline_lambdas.lambda_mapping[name]
+
+            if props.USE_JOB_WORKER:
+                # The lambda is scheduled and claims these jobs in batches, across
+                # every pipeline, instead of being invoked once per action.
+                worker = JobWorker(
+                    pipeline_lambdas,
+                    f"{name}-JobWorker",
+                    handler=handler,
+                    provider=props.prefix_tag(resource_name=name),
+                )
+                lead_time_tracking_steps.append(
+                    worker.action(
+                        action_name=action_name,
+                        user_parameters=pipeline_variables,
+                        run_order=run_order,
+                    )
+                )
+                continue
+
+            lead_time_tracking_steps.append(
+                pipeline_actions.LambdaInvokeAction(
+                    lambda_=handler,
+                    action_name=action_name,
+                    user_parameters=pipeline_variables,
+                    run_order=run_order,
+                )
+            )
 
         pipeline.add_stage(
             stage_name="DevOps-Lead-Time-Tracking", actions=lead_time_tracking_steps
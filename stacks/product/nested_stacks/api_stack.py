@@ -4,10 +4,13 @@ from aws_cdk import aws_route53_targets as r53_targets
 from aws_cdk import aws_apigateway as apigateway
 from aws_cdk import aws_certificatemanager as certmanager
 from constructs import Construct
+from cdk_configs.utilities.partitions import partition_scope, stable_partition
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
 from typing import Dict
 from aws_cdk.aws_lambda import IFunction
 from cdk_configs.product_properties.common_props import DeploymentProperties
 from cdk_configs.resource_configurations.constructs import (
+    LambdaIntegrations,
     RestApiResourceConfigs,
     RestApiMethodConfigs,
 )
@@ -15,6 +18,7 @@ from cdk_configs.resource_configurations.api_configs import (
     PRODUCT_REST_API,
     PRODUCT_API_VERSIONS,
     PRODUCT_API_RESOURCES,
+    UNSCOPED_API_VERSIONS,
 )
 from cdk_configs.product_properties.pipeline_and_deployment_props import (
     DeploymentSecretKey,
@@ -23,6 +27,7 @@ from cdk_configs.resource_names import ProductApiName
 
 
 class ProductApi(cdk.NestedStack):
+    @SYNTH_PROFILER.timed("nested stack: ProductApi")
     def __init__(
         self,
         scope: Construct,
@@ -48,42 +53,55 @@ class ProductApi(cdk.NestedStack):
             )
 
         # NOTE ON THE FOLLOWING:
-        # If you end up with a lot of versions and or a lot of resources/methods this
-        # can very quickly get out of hand. It would be better to divide your versions
-        # into multiple nested stacks then in order to keep under the 500 resource limit
-        # of a given Stack/NestedStack
+        # Every resource is built on each version, with its methods. So that lots of
+        # versions and resources/methods stay under the 500 resource limit of a
+        # Stack/NestedStack, each resource and its methods are placed in a partition -
+        # this stack, or a nested stack inside it. See cdk_configs/utilities/partitions.py,
+        # and run `make placements` with new resources.
         #
         # Note the Second:
         # The resources/methods are not saved anywhere. If you need them for something
         # outside this loop, then you'll have to map them as part of the loop.
 
-        # Type Hint Annotation
-        resource: Dict[str, any]
-        for name, resource in PRODUCT_API_RESOURCES.items():
-            resource_config: RestApiResourceConfigs
-            method_configs = Dict[str, any]
-
-            resource_config = resource.get("resource")
-            method_configs = resource.get("methods")
-
-            for version in versions.values():
-                # construct the resource for each version of the api sub-roots
-                resource_construct = apigateway.Resource(
-                    self, name, **resource_config.props(version)
+        placement = stable_partition(
+            "ProductApiResources",
+            {
+                name: len(versions)
+                * (
+                    resource["resource"].resource_count()
+                    + sum(
+                        method.resource_count()
+                        for method in resource["methods"].values()
+                    )
                 )
+                for name, resource in PRODUCT_API_RESOURCES.items()
+            },
+            props.UPDATE_PLACEMENTS,
+        )
 
-                method: RestApiMethodConfigs
-                for method_name, method in method_configs.items():
-                    # construct each method for that given resource
-                    # method name will be something like POST or GET or OPTIONS
-                    apigateway.Method(
-                        self,
-                        f"{name}-{method_name}",
-                        **method.props(
-                            resource=resource_construct, lambda_mapping=lambda_mapping
-                        ),
+        # Every lambda gets one integration, shared by all its methods on all versions,
+        # and each version's routes are built in a scope of their own (one per partition
+        # the version has routes in) so the construct ids can repeat between versions.
+        integrations = LambdaIntegrations(lambda_mapping, self.api)
+        version_routes = {}
+
+        # Type Hint Annotation
+        route: Dict[str, any]
+        for name, route in PRODUCT_API_RESOURCES.items():
+            scope = partition_scope(self, placement[name])
+
+            for version_name, version in versions.items():
+                key = (placement[name], version_name)
+                if key not in version_routes:
+                    version_routes[key] = ApiVersionRoutes(
+                        scope, version_name, version, integrations
                     )
 
+                version_routes[key].add_route(name, route)
+
+        # only the deployed stage may invoke the lambdas, see LambdaIntegrations
+        integrations.scope_permissions()
+
         ######################################
         # Domain Name                        #
         ######################################
@@ -121,3 +139,69 @@ class ProductApi(cdk.NestedStack):
         )
 
         # You may need/want to add AAAA Records or others here as well
+
+
+class ApiVersionRoutes(Construct):
+    """
+    The resources of PRODUCT_API_RESOURCES and their methods on one version of the api,
+    in a scope of their own so that every version builds them with the same ids.
+
+    Versions in UNSCOPED_API_VERSIONS get the scope id "Default", which cdk leaves out of
+    logical ids - their routes were deployed before versions had scopes and keep the
+    logical ids they had. (Changing them would replace the resources, and API Gateway
+    will not create a resource next to one with the same path.)
+
+    Parameters:
+        scope: [Construct] - the stack, or partition of it, to build the routes in.
+        version_name: [str] - the name of the version in PRODUCT_API_VERSIONS.
+        version: [aws_cdk.aws_apigateway.Resource] - the version's resource, which the
+            routes are built under.
+        integrations: [LambdaIntegrations] - the lambda integrations, shared between
+            the versions.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        version_name: str,
+        version: apigateway.Resource,
+        integrations: LambdaIntegrations,
+    ) -> None:
+        super().__init__(
+            scope,
+            (
+                "Default"
+                if version_name in UNSCOPED_API_VERSIONS
+                else f"{version_name}Routes"
+            ),
+        )
+        self.version = version
+        self.integrations = integrations
+
+    def add_route(self, name: str, route: Dict[str, any]) -> apigateway.Resource:
+        """
+        Builds the resource of route, and each of its methods, on this version.
+
+        Parameters:
+            name: [str] - the name of the route in PRODUCT_API_RESOURCES.
+            route: [Dict[str, any]] - {"resource": RestApiResourceConfigs, "methods":
+                {method name: RestApiMethodConfigs}}.
+
+        Returns:
+            [aws_cdk.aws_apigateway.Resource] the route's resource.
+        """
+        resource_config: RestApiResourceConfigs = route.get("resource")
+        resource = apigateway.Resource(
+            self, name, **resource_config.props(self.version)
+        )
+
+        method: RestApiMethodConfigs
+        for method_name, method in route.get("methods").items():
+            # method name will be something like POST or GET or OPTIONS
+            apigateway.Method(
+                self,
+                f"{name}-{method_name}",
+                **method.props(resource=resource, integrations=self.integrations),
+            )
+
+        return resource
@@ -6,13 +6,19 @@ from aws_cdk import aws_lambda
 from aws_cdk import aws_dynamodb as dynamodb
 from aws_cdk import aws_s3 as s3
 from constructs import Construct
+from cdk_configs.utilities.partitions import partition_scope, stable_partition
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
 from typing import Dict
 from cdk_configs.product_properties.common_props import DeploymentProperties
 from cdk_configs.resource_configurations.constructs import (
     LambdaLayerConfigs,
     LambdaFunctionConfigs,
 )
-from cdk_configs.resource_names import ProductBucketName, ProductDynamodbName
+from cdk_configs.resource_names import (
+    ProductBucketName,
+    ProductDynamodbName,
+    ProductLambdaName,
+)
 from cdk_configs.resource_configurations.lambda_configs import (
     PRODUCT_LAMBDAS,
     PRODUCT_LAYERS,
@@ -23,6 +29,7 @@ base_directory = os.path.join(Path(__file__).parents[3], "aws_lambda_functions")
 
 
 class ProductLambdas(cdk.NestedStack):
+    @SYNTH_PROFILER.timed("nested stack: ProductLambdas")
     def __init__(
         self,
         scope: Construct,
@@ -59,14 +66,42 @@ class ProductLambdas(cdk.NestedStack):
         common_buckets = [buckets[ProductBucketName.YOUR_BUCKET]]
         common_tables = [dynamodbs[ProductDynamodbName.YOUR_DYNAMO]]
 
+        # Spread over more nested stacks when there are too many for this one - see
+        # cdk_configs/utilities/partitions.py. Run `make placements` and commit
+        # cdk_configs/partition_placement.json with new lambdas.
+        placement = stable_partition(
+            "ProductLambdas",
+            {name: config.resource_count() for name, config in PRODUCT_LAMBDAS.items()},
+            props.UPDATE_PLACEMENTS,
+        )
+
         # TypeHint Annotation
         function_config: LambdaFunctionConfigs
         for name, function_config in PRODUCT_LAMBDAS.items():
+            scope = partition_scope(self, placement[name])
+
+            # only the dependencies it imports, see layers/bundles.py
+            layer_configs = list(PRODUCT_LAYERS.values())
+            function_layers = product_layers
+            if function_config.x_dependency_bundle:
+                bundle_config = PRODUCT_LAYERS[
+                    ProductLambdaName.COMMON_LAYER
+                ].for_bundle(name)
+                layer_configs = [bundle_config]
+                function_layers = [
+                    aws_lambda.LayerVersion(
+                        scope,
+                        f"{name}-Dependencies",
+                        **bundle_config.props(base_directory, props.prefix_tag()),
+                    )
+                ]
+
+            function_config.check_layers(layer_configs)
 
             self.lambda_mapping[name] = aws_lambda.Function(
-                self,
+                scope,
                 name,
-                layers=product_layers,
+                layers=function_layers,
                 **function_config.props(
                     base_directory=base_directory,
                     name_prefix=props.prefix_tag(),
@@ -15,9 +15,11 @@ from cdk_configs.resource_configurations.storage_configs import (
 )
 from typing import Dict
 from constructs import Construct
+from cdk_configs.utilities.synth_profiler import SYNTH_PROFILER
 
 
 class ProductStorage(cdk.NestedStack):
+    @SYNTH_PROFILER.timed("nested stack: ProductStorage")
     def __init__(
         self,
         scope: Construct,
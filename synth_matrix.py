@@ -0,0 +1,336 @@
+"""
+Synthesizes the app for every DeploymentTag with and without use_prod, in parallel, to
+check a change against all of the deployments at once:
+
+    python synth_matrix.py
+    python synth_matrix.py --tags DEV PROD --prod-values false --workers 2
+    make synth-matrix
+
+Each deployment gets its own cloud assembly, <outdir>/<tag> or <outdir>/<tag>-prod, and
+a summary of the stacks, templates (nested stacks included), resources and synth time of
+each one is printed and written to <outdir>/synth-matrix.json. Exits 1 if any of them
+failed to synthesize.
+
+Every worker process starts its own jsii runtime once and then synthesizes as many of
+the deployments as it is given, one cdk.App each - see build_app() in app.py.
+
+The app is synthesized as the cdk cli would: context lookups (the VPC) come from
+cdk.context.json, and a deployment that made one missing from it reports it. Run
+`make context` for that deployment first to fill them in.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from cdk_configs.product_properties.pipeline_and_deployment_props import (
+    ContextTag,
+    DeploymentTag,
+)
+
+DEFAULT_OUTDIR = "cdk.out.matrix"
+SUMMARY_FILE_NAME = "synth-matrix.json"
+CONTEXT_FILE_NAME = "cdk.context.json"
+CDK_JSON_FILE_NAME = "cdk.json"
+
+DEPLOYMENT_TAGS = [
+    DeploymentTag.LOCAL,
+    DeploymentTag.DEV,
+    DeploymentTag.TEST,
+    DeploymentTag.PROD,
+]
+
+
+@dataclass(frozen=True)
+class MatrixEnvironment:
+    """
+    One cell of the matrix.
+
+    Properties:
+        deploy_tag: [str] - a DeploymentTag value.
+        use_prod: [bool] - synthesize with `-c use_prod=True`.
+    """
+
+    deploy_tag: str
+    use_prod: bool
+
+    @property
+    def name(self) -> str:
+        return f"{self.deploy_tag}-prod" if self.use_prod else self.deploy_tag
+
+    def context(self) -> dict:
+        """
+        The cdk context this deployment is synthesized with - cdk.json and
+        cdk.context.json are added to it by synthesize(), as the cdk cli would.
+        """
+        context = {ContextTag.deploy_tag: self.deploy_tag}
+        if self.use_prod:
+            context[ContextTag.is_prod] = "True"
+        return context
+
+
+@dataclass
+class MatrixResult:
+    """
+    The summary of one deployment's synth.
+
+    Properties:
+        environment: [str] - MatrixEnvironment.name.
+        outdir: [str] - its cloud assembly.
+        seconds: [float] - time to build and synthesize the app.
+        stacks: [int] - top level stacks in the assembly.
+        templates: [int] - CloudFormation templates, nested stacks included.
+        resources: [int] - resources across all of the templates.
+        resources_per_template: [dict] - {template file name: resource count}.
+        missing_context: [List[str]] - lookups not found in cdk.context.json.
+        error: [str] - why the synth failed, None if it did not.
+    """
+
+    environment: str
+    outdir: str
+    seconds: float = 0.0
+    stacks: int = 0
+    templates: int = 0
+    resources: int = 0
+    resources_per_template: dict = field(default_factory=dict)
+    missing_context: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def environments(tags: List[str], prod_values: List[bool]) -> List[MatrixEnvironment]:
+    """
+    Returns:
+        [List[MatrixEnvironment]] every tag with every use_prod value.
+    """
+    return [
+        MatrixEnvironment(deploy_tag=tag, use_prod=use_prod)
+        for tag, use_prod in itertools.product(tags, prod_values)
+    ]
+
+
+def synthesize(
+    environment: MatrixEnvironment, outdir: str, verbose: bool = False
+) -> MatrixResult:
+    """
+    Builds and synthesizes the app for environment into outdir. Runs in a worker
+    process; aws_cdk is only imported here, never in the parent.
+
+    Returns:
+        [MatrixResult] a failed synth is returned with its error, not raised, so the
+        rest of the matrix still runs.
+    """
+    result = MatrixResult(environment=environment.name, outdir=outdir)
+    shutil.rmtree(outdir, ignore_errors=True)
+
+    start = time.perf_counter()
+    try:
+        output = contextlib.nullcontext() if verbose else _captured_stdout()
+        with output:
+            import aws_cdk as cdk
+
+            from app import build_app
+
+            app = cdk.App(
+                outdir=outdir, context={**_saved_context(), **environment.context()}
+            )
+            build_app(app)
+            app.synth()
+    except Exception:
+        result.error = traceback.format_exc(limit=-3).strip()
+    result.seconds = round(time.perf_counter() - start, 2)
+
+    if result.succeeded:
+        _count_resources(result)
+    return result
+
+
+def _captured_stdout():
+    """
+    Keeps the app's own printing (tags, deployment properties) out of the summary.
+    """
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _saved_context() -> dict:
+    """
+    The context the cdk cli gives every app: the lookups saved in cdk.context.json and
+    the "context" of cdk.json.
+    """
+    context = {}
+    for file_name, key in ((CONTEXT_FILE_NAME, None), (CDK_JSON_FILE_NAME, "context")):
+        if os.path.isfile(file_name):
+            with open(file_name) as context_file:
+                values = json.load(context_file)
+            context.update(values.get(key, {}) if key else values)
+    return context
+
+
+def _count_resources(result: MatrixResult):
+    with open(os.path.join(result.outdir, "manifest.json")) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    result.stacks = sum(
+        1
+        for artifact in manifest.get("artifacts", {}).values()
+        if artifact.get("type") == "aws:cloudformation:stack"
+    )
+    result.missing_context = [
+        entry.get("key", "")
+        for entry in manifest.get("missing", [])
+        if isinstance(entry, dict)
+    ]
+
+    for name in sorted(os.listdir(result.outdir)):
+        if not name.endswith(".template.json"):
+            continue
+        with open(os.path.join(result.outdir, name)) as template_file:
+            resources = len(json.load(template_file).get("Resources", {}))
+        result.resources_per_template[name] = resources
+        result.resources += resources
+    result.templates = len(result.resources_per_template)
+
+
+def run_matrix(
+    matrix: List[MatrixEnvironment],
+    outdir: str = DEFAULT_OUTDIR,
+    workers: int = None,
+    verbose: bool = False,
+) -> List[MatrixResult]:
+    """
+    Synthesizes every environment of matrix in a pool of worker processes.
+
+    Parameters:
+        matrix: [List[MatrixEnvironment]] - the deployments to synthesize.
+        outdir: [str] - the directory each deployment's cloud assembly is put in.
+        workers: [int] - worker processes, defaults to one per cpu (at most one per
+            deployment).
+        verbose: [bool] - let the app print while it is built.
+
+    Returns:
+        [List[MatrixResult]] in the order of matrix.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(matrix)))
+
+    # jsii runs node in a child process, which is not safe to fork - every worker is a
+    # fresh interpreter.
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=spawn) as pool:
+        futures = {
+            pool.submit(
+                synthesize, environment, os.path.join(outdir, environment.name), verbose
+            ): index
+            for index, environment in enumerate(matrix)
+        }
+        results = [None] * len(matrix)
+        for future in as_completed(futures):
+            result = future.result()
+            results[futures[future]] = result
+            status = "ok" if result.succeeded else "FAILED"
+            print(f"***{result.environment}: {status} in {result.seconds:.2f}s")
+
+    return results
+
+
+def print_summary(results: List[MatrixResult], wall_seconds: float):
+    print()
+    print(
+        f"{'environment':<14}{'status':<8}{'synth s':>9}{'stacks':>8}"
+        f"{'templates':>11}{'resources':>11}  largest template"
+    )
+    for result in results:
+        largest = max(
+            result.resources_per_template.items(),
+            key=lambda item: item[1],
+            default=None,
+        )
+        print(
+            f"{result.environment:<14}{'ok' if result.succeeded else 'FAILED':<8}"
+            f"{result.seconds:>9.2f}{result.stacks:>8}{result.templates:>11}"
+            f"{result.resources:>11}  "
+            + (f"{largest[0]} ({largest[1]})" if largest else "")
+        )
+
+    total = sum(result.seconds for result in results)
+    print(f"\nwall time {wall_seconds:.2f}s, {total:.2f}s of synths")
+
+    for result in results:
+        if result.missing_context:
+            print(
+                f"\n{result.environment} looked up values missing from "
+                f"{CONTEXT_FILE_NAME}, run `make context` for it: "
+                + ", ".join(result.missing_context)
+            )
+        if not result.succeeded:
+            print(f"\n{result.environment} failed:\n{result.error}")
+
+
+def _as_bool(value: str) -> bool:
+    if value.lower() in ("true", "1", "yes"):
+        return True
+    if value.lower() in ("false", "0", "no"):
+        return False
+    raise argparse.ArgumentTypeError(f"{value} is not true or false")
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python synth_matrix.py", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument(
+        "--tags",
+        nargs="+",
+        default=DEPLOYMENT_TAGS,
+        choices=DEPLOYMENT_TAGS,
+        help="the deploy_tags to synthesize (default all)",
+    )
+    parser.add_argument(
+        "--prod-values",
+        nargs="+",
+        type=_as_bool,
+        default=[False, True],
+        help="the use_prod values to synthesize each tag with (default false true)",
+    )
+    parser.add_argument("--outdir", default=DEFAULT_OUTDIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(arguments)
+
+    matrix = environments(args.tags, list(dict.fromkeys(args.prod_values)))
+
+    start = time.perf_counter()
+    results = run_matrix(matrix, args.outdir, args.workers, args.verbose)
+    wall_seconds = time.perf_counter() - start
+
+    print_summary(results, wall_seconds)
+
+    with open(os.path.join(args.outdir, SUMMARY_FILE_NAME), "w") as summary_file:
+        json.dump(
+            {
+                "wall_seconds": round(wall_seconds, 2),
+                "environments": [asdict(result) for result in results],
+            },
+            summary_file,
+            indent=2,
+        )
+
+    return 0 if all(result.succeeded for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())